@@ -7,7 +7,7 @@ import {
   selectDocuments,
   selectDocumentsLoading,
   selectDocumentsError,
-  uploadDocument,
+  uploadDocuments,
   selectUploadLoading,
   selectUploadError,
   selectUploadSuccess,
@@ -17,6 +17,7 @@ import {
 import { File, Upload, Download, AlertCircle, X, FileText, FilePlus, ChevronLeft, ChevronRight, Eye } from 'lucide-react';
 // Import PDF components
 import { Document, Page, pdfjs } from 'react-pdf';
+import api from '../services/api';
 
 pdfjs.GlobalWorkerOptions.workerSrc = "http://localhost:3000/pdf.worker.min.js";
 
@@ -188,25 +189,26 @@ const DocumentUploadModal: React.FC<UploadModalProps> = ({
   uploading,
   darkMode
 }) => {
-  const [selectedFile, setSelectedFile] = useState<File | null>(null);
+  const [selectedFiles, setSelectedFiles] = useState<File[]>([]);
   const [documentType, setDocumentType] = useState<string>('pleading');
   const [description, setDescription] = useState('');
 
   if (!isOpen) return null;
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-    if (e.target.files && e.target.files[0]) {
-      setSelectedFile(e.target.files[0]);
+    if (e.target.files && e.target.files.length > 0) {
+      setSelectedFiles(Array.from(e.target.files));
     }
   };
 
   const handleSubmit = (e: React.FormEvent) => {
     e.preventDefault();
 
-    if (!selectedFile) return;
+    if (selectedFiles.length === 0) return;
 
+    // All selected files go in one request to the batch endpoint
     const formData = new FormData();
-    formData.append('file', selectedFile);
+    selectedFiles.forEach((file) => formData.append('files', file));
     formData.append('case_id', caseId);
     formData.append('document_type', documentType);
 
@@ -286,6 +288,7 @@ const DocumentUploadModal: React.FC<UploadModalProps> = ({
                 className="hidden"
                 id="document-upload"
                 onChange={handleFileChange}
+                multiple
                 required
               />
               <label
@@ -293,9 +296,9 @@ const DocumentUploadModal: React.FC<UploadModalProps> = ({
                 className="cursor-pointer flex flex-col items-center justify-center py-3"
               >
                 <Upload className={`mb-2 ${darkMode ? 'text-gray-400' : 'text-gray-500'}`} />
-                {selectedFile ? (
+                {selectedFiles.length > 0 ? (
                   <span className="text-sm font-medium">
-                    {selectedFile.name}
+                    {selectedFiles.length === 1 ? selectedFiles[0].name : `${selectedFiles.length} files selected`}
                   </span>
                 ) : (
                   <span className={`text-sm ${darkMode ? 'text-gray-400' : 'text-gray-500'}`}>
@@ -321,7 +324,7 @@ const DocumentUploadModal: React.FC<UploadModalProps> = ({
             <button
               type="submit"
               className="px-4 py-2 bg-[#e8c4b8] text-gray-900 rounded-md text-sm font-medium hover:bg-[#ddb3a7] transition-colors duration-300 flex items-center gap-2"
-              disabled={!selectedFile || uploading}
+              disabled={selectedFiles.length === 0 || uploading}
             >
               {uploading ? (
                 <>
@@ -345,6 +348,40 @@ const DocumentUploadModal: React.FC<UploadModalProps> = ({
   );
 };
 
+// Small server-rendered image of a PDF or picture; falls back to the file icon
+interface ThumbnailProps {
+  documentId: string;
+  mimeType?: string;
+  darkMode: boolean;
+}
+
+const DocumentThumbnail: React.FC<ThumbnailProps> = ({ documentId, mimeType, darkMode }) => {
+  const [thumbnailUrl, setThumbnailUrl] = useState<string | null>(null);
+  const renderable = !!mimeType && (mimeType === 'application/pdf' || mimeType.startsWith('image/'));
+
+  useEffect(() => {
+    if (!renderable) return;
+    let objectUrl: string | null = null;
+    let cancelled = false;
+    api.get(`/documents/${documentId}/thumbnail`, { responseType: 'blob' })
+      .then((response) => {
+        if (cancelled) return;
+        objectUrl = URL.createObjectURL(response.data);
+        setThumbnailUrl(objectUrl);
+      })
+      .catch(() => setThumbnailUrl(null));
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [documentId, renderable]);
+
+  if (!thumbnailUrl) {
+    return <File className={`flex-shrink-0 mr-3 ${darkMode ? 'text-gray-400' : 'text-gray-500'}`} size={18} />;
+  }
+  return <img src={thumbnailUrl} alt="" className="flex-shrink-0 mr-3 w-10 h-10 object-cover rounded" />;
+};
+
 interface CaseFilesProps {
   caseId: string;
   darkMode: boolean;
@@ -397,7 +434,7 @@ const CaseFiles: React.FC<CaseFilesProps> = ({ caseId, darkMode }) => {
   }, [viewerModalOpen, documentUrl]);
 
   const handleUpload = (formData: FormData) => {
-    dispatch(uploadDocument(formData));
+    dispatch(uploadDocuments(formData));
   };
 
   // In CaseFiles.tsx
@@ -575,7 +612,7 @@ const CaseFiles: React.FC<CaseFilesProps> = ({ caseId, darkMode }) => {
                   <tr key={doc.id} className={darkMode ? 'bg-gray-800' : 'bg-white'}>
                     <td className={`px-6 py-4 whitespace-nowrap ${darkMode ? 'text-white' : 'text-gray-900'}`}>
                       <div className="flex items-center">
-                        <File className={`flex-shrink-0 mr-3 ${darkMode ? 'text-gray-400' : 'text-gray-500'}`} size={18} />
+                        <DocumentThumbnail documentId={doc.id} mimeType={doc.mime_type} darkMode={darkMode} />
                         <div>
                           <div className="font-medium">{doc.title}</div>
                           {doc.description && (
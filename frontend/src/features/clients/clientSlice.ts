@@ -63,9 +63,18 @@ export const fetchClients = createAsyncThunk<
     async (_, { rejectWithValue }) => {
         try {
             console.log('Fetching clients...');
-            const response = await api.get<Client[]>('/clients');
-            console.log('Clients fetched successfully:', response.data.length);
-            return response.data;
+            // The list is paginated; follow X-Next-Cursor until the last page
+            const clients: Client[] = [];
+            let cursor: string | undefined;
+            do {
+                const response = await api.get<Client[]>('/clients', {
+                    params: { limit: 500, ...(cursor ? { cursor } : {}) },
+                });
+                clients.push(...response.data);
+                cursor = response.headers['x-next-cursor'];
+            } while (cursor);
+            console.log('Clients fetched successfully:', clients.length);
+            return clients;
         } catch (error: any) {
             console.error('Error fetching clients:', error);
             if (error.response && error.response.data) {
@@ -18,6 +18,13 @@ export interface Document {
     updated_at: string;
 }
 
+// Result of a batch upload, one entry per file in the order sent
+export interface BatchUploadResult {
+    uploaded: number;
+    failed: number;
+    results: { filename: string; document?: Document; error?: string }[];
+}
+
 // Document state interface
 interface DocumentsState {
     documents: Document[];
@@ -90,6 +97,32 @@ export const uploadDocument = createAsyncThunk<
     }
 );
 
+// Upload several documents to one case in a single request
+export const uploadDocuments = createAsyncThunk<
+    BatchUploadResult,
+    FormData, // FormData containing the files and shared metadata
+    { rejectValue: { detail: string } }
+>(
+    'documents/uploadDocuments',
+    async (formData, { rejectWithValue }) => {
+        try {
+            const response = await api.post<BatchUploadResult>('/documents/upload/batch', formData, {
+                headers: {
+                    'Content-Type': 'multipart/form-data',
+                },
+            });
+            console.log(`Uploaded ${response.data.uploaded} documents, ${response.data.failed} failed`);
+            return response.data;
+        } catch (error: any) {
+            console.error('Error uploading documents:', error);
+            if (error.response && error.response.data) {
+                return rejectWithValue(error.response.data);
+            }
+            return rejectWithValue({ detail: 'Failed to upload documents' });
+        }
+    }
+);
+
 // Download a document (returns URL)
 export const getDocumentDownloadUrl = createAsyncThunk<
     string,
@@ -177,6 +210,31 @@ const documentsSlice = createSlice({
                 state.uploadError = action.payload?.detail || 'Failed to upload document';
             })
 
+            // Upload several documents
+            .addCase(uploadDocuments.pending, (state) => {
+                state.uploadLoading = true;
+                state.uploadError = null;
+                state.uploadSuccess = false;
+            })
+            .addCase(uploadDocuments.fulfilled, (state, action: PayloadAction<BatchUploadResult>) => {
+                state.uploadLoading = false;
+                action.payload.results.forEach((result) => {
+                    if (result.document) {
+                        state.documents.push(result.document);
+                    }
+                });
+                const failed = action.payload.results.filter((result) => result.error);
+                // Keep the modal open to show which files need another try
+                state.uploadSuccess = failed.length === 0;
+                state.uploadError = failed.length
+                    ? `Failed to upload ${failed.map((result) => result.filename).join(', ')}`
+                    : null;
+            })
+            .addCase(uploadDocuments.rejected, (state, action) => {
+                state.uploadLoading = false;
+                state.uploadError = action.payload?.detail || 'Failed to upload documents';
+            })
+
             // Download document
             .addCase(downloadDocument.pending, (state) => {
                 state.downloadLoading = true;
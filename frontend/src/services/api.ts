@@ -135,4 +135,28 @@ api.interceptors.response.use(
   }
 );
 
+export interface BatchItem {
+  id?: string;
+  method?: 'GET' | 'POST' | 'PUT' | 'PATCH' | 'DELETE';
+  path: string;
+  headers?: Record<string, string>;
+  body?: unknown;
+}
+
+export interface BatchItemResponse<T = any> {
+  id?: string;
+  status: number;
+  headers: Record<string, string>;
+  body: T;
+}
+
+// Sends several requests in one round trip (POST /batch). The server
+// authenticates once and runs the items in order on one session; each item
+// carries its own status, so callers must check it rather than rely on axios
+// errors.
+export const batch = async (requests: BatchItem[]): Promise<BatchItemResponse[]> => {
+  const response = await api.post<{ responses: BatchItemResponse[] }>('/batch', { requests });
+  return response.data.responses;
+};
+
 export default api;
\ No newline at end of file
@@ -1,11 +1,13 @@
 # auth.py
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from database import get_db
+from database import (
+    get_db, SessionLocal, open_read_session, parse_write_time, BATCH_SCOPE_KEY, WRITE_COOKIE, WRITE_HEADER
+)
 from models import Advocate
 from config import get_settings
 from passlib.context import CryptContext
@@ -15,8 +17,10 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 async def get_current_advocate(
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> Advocate:
@@ -24,11 +28,36 @@ async def get_current_advocate(
     Validates the JWT token and returns the current authenticated advocate.
     This function serves as a dependency for protected routes.
     """
+    batch = request.scope.get(BATCH_SCOPE_KEY)
+    if batch is not None:
+        # Authenticated once for the whole batch
+        return batch.advocate
+    return advocate_from_token(token, db)
+
+async def get_stream_advocate(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    access_token: Optional[str] = Query(None)
+) -> Advocate:
+    """
+    Authenticates long-lived streaming requests.
+    Browsers' EventSource cannot send headers, so the token may also come as
+    the access_token query parameter. The database session is closed before
+    the stream starts instead of being held for the connection's lifetime.
+    """
+    db = SessionLocal()
+    try:
+        return advocate_from_token(token or access_token, db)
+    finally:
+        db.close()
+
+def advocate_from_token(token: Optional[str], db: Session) -> Advocate:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if not token:
+        raise credentials_exception
     
     try:
         payload = jwt.decode(
@@ -50,8 +79,35 @@ async def get_current_advocate(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Advocate account is inactive"
         )
+    # Lets the session remember who wrote, for read-your-writes routing
+    db.info["advocate_id"] = advocate.id
     return advocate
 
+def get_read_db(
+    request: Request,
+    current_advocate = Depends(get_current_advocate),
+    primary: Session = Depends(get_db)
+):
+    """
+    Session for read-only endpoints, served by a read replica when one is
+    configured. Advocates who just wrote something, through this worker or
+    any other, are kept on the primary.
+    """
+    if BATCH_SCOPE_KEY in request.scope:
+        # Sub-requests of a batch share its session
+        yield primary
+        return
+    # Authentication is done, so give its primary connection back to the pool
+    # rather than holding it for the rest of the request
+    primary.close()
+    # The write may have gone through another worker, which only the client knows
+    wrote_at = parse_write_time(request.headers.get(WRITE_HEADER) or request.cookies.get(WRITE_COOKIE))
+    db = open_read_session(current_advocate.id, wrote_at)
+    try:
+        yield db
+    finally:
+        db.close()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify that a plain password matches its hashed version.
@@ -104,44 +160,6 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
-async def get_current_advocate(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Advocate:
-    """
-    Get the current authenticated advocate from their JWT token.
-    This is used as a dependency in routes that require authentication.
-    """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        # Decode the JWT token
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        advocate_id: str = payload.get("sub")
-        if advocate_id is None:
-            raise credentials_exception
-        
-    except JWTError:
-        raise credentials_exception
-    
-    # Get the advocate from the database
-    advocate = db.query(Advocate).filter(Advocate.id == advocate_id).first()
-    if advocate is None:
-        raise credentials_exception
-    if not advocate.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Advocate account is inactive"
-        )
-    return advocate
-
 # Additional helper function for token creation
 def generate_advocate_token(advocate: Advocate) -> str:
     """
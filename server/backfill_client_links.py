@@ -0,0 +1,58 @@
+# backfill_client_links.py
+"""
+Links clients that no advocate can see to advocates.
+
+    python backfill_client_links.py [--advocate EMAIL]
+
+Clients are visible to an advocate through an advocate_clients link or
+one of the advocate's cases. Clients created before links existed and
+not on any case are visible to no one. Every client was visible to every
+advocate before, so by default each such client is linked to every
+advocate; --advocate links them to that advocate only. Run once after
+upgrading; clients created since are linked as they are created.
+"""
+import argparse
+from sqlalchemy import exists, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import SessionLocal
+from models import Advocate, AdvocateClient, Case, Client
+
+
+def unlinked_clients():
+    """Clients with neither an advocate link nor a case"""
+    return select(Client.id).where(
+        ~exists().where(AdvocateClient.client_id == Client.id),
+        ~exists().where(Case.client_id == Client.id)
+    )
+
+
+def backfill(advocate_email=None) -> int:
+    with SessionLocal() as db:
+        advocates = select(Advocate.id)
+        if advocate_email is not None:
+            advocates = advocates.where(Advocate.email == advocate_email)
+            if db.execute(advocates).first() is None:
+                raise SystemExit(f"No advocate with email {advocate_email}")
+        advocates, clients = advocates.subquery(), unlinked_clients().subquery()
+        # Every advocate paired with every unlinked client
+        pairs = select(advocates.c.id, clients.c.id).select_from(advocates.join(clients, true()))
+        # One INSERT ... SELECT; links added concurrently are left alone
+        linked = db.execute(
+            pg_insert(AdvocateClient.__table__)
+            .from_select(["advocate_id", "client_id"], pairs)
+            .on_conflict_do_nothing()
+            .returning(AdvocateClient.__table__.c.client_id)
+        ).scalars().all()
+        db.commit()
+        return len(set(linked))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link clients that no advocate can see")
+    parser.add_argument("--advocate", metavar="EMAIL", help="Link them to this advocate only")
+    args = parser.parse_args()
+    print(f"Linked {backfill(args.advocate)} clients")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# backfill_similarity.py
+"""
+Adds existing documents to the near-duplicate index.
+
+    python backfill_similarity.py [--processes N] [--batch-size N]
+
+Uploads are indexed by a background job; this covers documents stored
+before that, and rebuilds signatures computed with an older scheme.
+Text extraction and MinHashing run in N processes (default: every
+core); signatures are written as each batch completes, so an
+interrupted run resumes where it stopped.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import or_, select
+from database import SessionLocal
+from models import Document, DocumentSignature
+from services.similarity_service import SimilarityService
+from utils.minhash import SCHEME, TEXT_TYPES
+
+
+def pending_documents(after, limit: int):
+    """Ids of text documents without a current signature, in id order"""
+    with SessionLocal() as db:
+        query = (
+            select(Document.id)
+            .outerjoin(DocumentSignature, DocumentSignature.document_id == Document.id)
+            .where(
+                or_(DocumentSignature.document_id.is_(None), DocumentSignature.scheme != SCHEME),
+                or_(Document.mime_type.in_(TEXT_TYPES), Document.mime_type.like("text/%"))
+            )
+            .order_by(Document.id)
+            .limit(limit)
+        )
+        if after is not None:
+            query = query.where(Document.id > after)
+        return db.execute(query).scalars().all()
+
+
+async def backfill(processes: int, batch_size: int) -> None:
+    service = SimilarityService()
+    # Spawned, like the worker's processes, so none inherits pooled connections
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    indexed = failed = 0
+    started = time.monotonic()
+    after = None
+    try:
+        while True:
+            ids = await asyncio.to_thread(pending_documents, after, batch_size)
+            if not ids:
+                break
+            # Ids only move forward, so documents that keep failing are skipped
+            after = ids[-1]
+            results = await asyncio.gather(*(service.index(document_id, pool) for document_id in ids), return_exceptions=True)
+            for document_id, result in zip(ids, results):
+                if isinstance(result, BaseException):
+                    failed += 1
+                    print(f"Error indexing document {document_id}: {str(result)}")
+                else:
+                    indexed += 1
+            print(f"Indexed {indexed} documents ({failed} failed) in {time.monotonic() - started:.1f}s")
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add existing documents to the near-duplicate index")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(backfill(args.processes, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
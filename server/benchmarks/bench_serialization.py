@@ -0,0 +1,118 @@
+# benchmarks/bench_serialization.py
+"""
+Compares the default FastAPI response path for case lists with the
+projected FastJSONResponse path used by list_cases.
+
+Run from the server directory:
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+
+import argparse
+import json
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List
+from pydantic import TypeAdapter
+from models import Case, CaseResponse
+from utils.serialization import FastJSONResponse, _projection
+
+
+def build_rows(count: int) -> List[dict]:
+    """Builds synthetic cases shaped like a realistic list_cases payload"""
+    now = datetime.now(timezone.utc)
+    advocate_id = uuid.uuid4()
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": uuid.uuid4(),
+            "advocate_id": advocate_id,
+            "client_id": uuid.uuid4(),
+            "case_metadata": {"source": "benchmark"},
+            "cnr": f"DLCT01{i:06d}2024",
+            "court_case_title": f"Petitioner {i} vs Respondent {i}",
+            "court_case_type": "CS (COMM)",
+            "filing_number": f"{i}/2024",
+            "registration_number": f"{i}/2024",
+            "court_status": {"caseStage": "Evidence", "nextHearingDate": "2024-11-02"},
+            "parties_details": {"petitioners": [f"Petitioner {i}"], "respondents": [f"Respondent {i}"]},
+            "acts_sections": {"acts": "Code of Civil Procedure", "sections": "37"},
+            "fir_details": {},
+            "court_history": [
+                {"judge": "ADJ-04", "businessDate": "2024-01-10", "purpose": "Appearance"},
+                {"judge": "ADJ-04", "businessDate": "2024-03-14", "purpose": "Evidence"},
+            ],
+            "created_at": now,
+            "updated_at": now,
+        })
+    return rows
+
+
+def before(objects) -> bytes:
+    """
+    What FastAPI does for response_model=List[CaseResponse] with ORM objects:
+    validate from attributes, dump to JSON-compatible Python, then json.dumps.
+    """
+    adapter = TypeAdapter(List[CaseResponse])
+    validated = adapter.validate_python(objects, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def after(rows) -> bytes:
+    """The projected path: Row tuples to dicts, encoded directly"""
+    return FastJSONResponse([row._asdict() for row in rows]).body
+
+
+def measure(fn, payload, repeat: int) -> dict:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn(payload))
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "best_seconds": round(best, 4),
+        "mean_seconds": round(sum(timings) / len(timings), 4),
+        "rows_per_second": round(len(payload) / best),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    data = build_rows(args.rows)
+    objects = [SimpleNamespace(**row) for row in data]
+    # The projection only selects columns that exist on the table
+    columns, defaults = _projection(Case, CaseResponse)
+    Row = namedtuple("Row", list(defaults) + [column.key for column in columns])
+    rows = [Row(**row) for row in data]
+
+    results = {
+        "rows": args.rows,
+        "before": measure(before, objects, args.repeat),
+        "after": measure(after, rows, args.repeat),
+    }
+    results["speedup"] = round(results["before"]["best_seconds"] / results["after"]["best_seconds"], 1)
+
+    print(f"{'path':<8}{'best (s)':>12}{'rows/s':>14}{'bytes':>14}")
+    for name in ("before", "after"):
+        r = results[name]
+        print(f"{name:<8}{r['best_seconds']:>12}{r['rows_per_second']:>14}{r['bytes']:>14}")
+    print(f"speedup: {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
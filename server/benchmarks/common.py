@@ -0,0 +1,71 @@
+# benchmarks/common.py
+"""
+Helpers shared by the benchmark stand-ins, the seeder and the load generator.
+"""
+
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+# Seeded documents have no stored bytes; the storage stand-in synthesizes
+# them on demand, and the seeder records the same size in the database
+MIN_OBJECT_SIZE = 8 * 1024
+MAX_OBJECT_SIZE = 256 * 1024
+
+BENCH_PASSWORD = "benchmark"
+
+# Written by the seeder: the cases it created for each advocate, so the
+# load generator does not depend on the API to find them
+SEED_MANIFEST = Path(__file__).resolve().parent / "results" / "seed-manifest.json"
+
+
+def synthetic_size(path: str) -> int:
+    return MIN_OBJECT_SIZE + zlib.crc32(path.encode()) % (MAX_OBJECT_SIZE - MIN_OBJECT_SIZE)
+
+
+def synthetic_bytes(path: str) -> bytes:
+    """Deterministic PDF-looking content for an object that was never uploaded"""
+    size = synthetic_size(path)
+    block = f"%PDF-1.4\n% synthetic object {path}\n".encode()
+    return (block * (size // len(block) + 1))[:size]
+
+
+def advocate_email(index: int) -> str:
+    return f"bench-advocate-{index}@example.com"
+
+
+def write_manifest(path: Path, cases: Dict[str, List[dict]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cases))
+
+
+def read_manifest(path: Path) -> Dict[str, List[dict]]:
+    """Cases per advocate email, as {"id", "cnr"} dicts"""
+    if not path.exists():
+        raise SystemExit(f"No seed manifest at {path}; run benchmarks.seed first")
+    return json.loads(path.read_text())
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (in milliseconds) for one endpoint"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / duration, 2) if duration else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 2) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if count else 0.0,
+    }
@@ -0,0 +1,82 @@
+# benchmarks/ecourts_stub.py
+"""
+Local stand-in for the eCourts case API used by /cases/fetch-court-details.
+
+Returns a realistic, deterministic case for any CNR after a configurable
+delay (ECOURTS_STUB_LATENCY_MS, default 300), and 404 for CNRs starting
+with "INVALID".
+
+Run from the server directory:
+    uvicorn benchmarks.ecourts_stub:app --port 9002
+and point the app at it with COURT_API_BASE_URL=http://127.0.0.1:9002/eciapi/17
+"""
+
+import asyncio
+import os
+import zlib
+from fastapi import FastAPI, Header, HTTPException, Body
+
+LATENCY_SECONDS = int(os.environ.get("ECOURTS_STUB_LATENCY_MS", "300")) / 1000
+
+app = FastAPI(title="eCourts stand-in")
+
+
+def build_case(cnr: str, court_type: str) -> dict:
+    seed = zlib.crc32(cnr.encode())
+    number = seed % 9000 + 1000
+    year = 2015 + seed % 10
+    hearings = 3 + seed % 12
+    return {
+        "cnr": cnr,
+        "title": f"Petitioner {number} vs State of Delhi",
+        "details": {
+            "type": "CS (COMM)" if court_type != "supreme-court" else "SLP (C)",
+            "filingNumber": f"{number}/{year}",
+            "filingDate": f"{year}-03-{seed % 28 + 1:02d}",
+            "registrationNumber": f"{number + 17}/{year}",
+            "registrationDate": f"{year}-04-{seed % 28 + 1:02d}",
+        },
+        "status": {
+            "firstHearingDate": f"{year}-05-02",
+            "nextHearingDate": "2025-11-14",
+            "caseStage": ["Appearance", "Evidence", "Arguments", "Orders"][seed % 4],
+            "courtNumberAndJudge": f"{seed % 40 + 1}-District Judge (Commercial)",
+            "decisionDate": None,
+            "natureOfDisposal": None,
+        },
+        "parties": {
+            "petitioners": [f"Petitioner {number}"],
+            "petitionerAdvocates": [f"Advocate {seed % 500}"],
+            "respondents": ["State of Delhi", f"Respondent {number}"],
+            "respondentAdvocates": ["Public Prosecutor"],
+        },
+        "actsAndSections": {
+            "acts": "Code of Civil Procedure, 1908",
+            "sections": str(seed % 150 + 1),
+        },
+        "firstInformationReport": {
+            "policeStation": f"PS Sector {seed % 60}",
+            "firNumber": str(seed % 900 + 100),
+            "year": str(year),
+        } if seed % 3 == 0 else None,
+        "history": [
+            {
+                "judge": f"{seed % 40 + 1}-District Judge",
+                "businessDate": f"{year + i // 6}-{i % 12 + 1:02d}-10",
+                "nextDate": f"{year + (i + 1) // 6}-{(i + 1) % 12 + 1:02d}-10",
+                "purpose": ["Appearance", "Evidence", "Arguments", "Orders"][i % 4],
+            }
+            for i in range(hearings)
+        ],
+    }
+
+
+@app.post("/eciapi/17/{court_type}/case")
+async def get_case(court_type: str, body: dict = Body(...), x_api_key: str = Header(None)):
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="Missing API key")
+    cnr = body.get("cnr", "")
+    await asyncio.sleep(LATENCY_SECONDS)
+    if not cnr or cnr.startswith("INVALID"):
+        raise HTTPException(status_code=404, detail="Case not found")
+    return build_case(cnr, court_type)
@@ -0,0 +1,170 @@
+# benchmarks/loadgen.py
+"""
+Scripted load generator for the API.
+
+Each virtual user logs in as one of the seeded advocates and repeatedly
+walks the main flows: list cases, open a case, list its documents, upload
+a document, get its download URL, fetch its content and delete it. Every
+fifth iteration also looks a case up in the court API. Cases are picked
+from the manifest the seeder wrote. A failed login or case list stops
+the run, so a broken endpoint is not reported as a fast one.
+
+Run from the server directory against a running app:
+    python -m benchmarks.loadgen --base-url http://127.0.0.1:8100 --users 20 --duration 60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.common import BENCH_PASSWORD, SEED_MANIFEST, advocate_email, read_manifest, summarize
+
+UPLOAD_SIZE = 64 * 1024
+
+
+class LoadError(RuntimeError):
+    """A request every iteration depends on failed; the run is meaningless"""
+
+
+def _describe(response: Optional[httpx.Response]) -> str:
+    if response is None:
+        return "transport error"
+    return f"{response.status_code} {response.text[:200]}"
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[name].append(time.perf_counter() - start)
+            self.errors[name] += 1
+            self.statuses[name]["transport_error"] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        self.statuses[name][str(response.status_code)] += 1
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, duration: float) -> Dict[str, dict]:
+        endpoints = {
+            name: {**summarize(values, self.errors[name], duration), "status_codes": dict(self.statuses[name])}
+            for name, values in sorted(self.latencies.items())
+        }
+        everything = [value for values in self.latencies.values() for value in values]
+        endpoints["ALL"] = summarize(everything, sum(self.errors.values()), duration)
+        return endpoints
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    index: int,
+    advocates: int,
+    deadline: float,
+    cases: Dict[str, List[dict]]
+):
+    rng = random.Random(index)
+    email = advocate_email(index % advocates)
+    own_cases = cases.get(email)
+    if not own_cases:
+        raise LoadError(f"The seed manifest has no cases for {email}")
+    response = await recorder.request(
+        client, "POST /auth/token", "POST", "/auth/token",
+        data={"username": email, "password": BENCH_PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        raise LoadError(f"Login as {email} failed: {_describe(response)}")
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    payload = os.urandom(UPLOAD_SIZE)
+    iteration = 0
+
+    while time.perf_counter() < deadline:
+        iteration += 1
+        response = await recorder.request(client, "GET /cases", "GET", "/cases/", headers=headers)
+        if response is None or response.status_code != 200:
+            raise LoadError(f"GET /cases/ failed: {_describe(response)}")
+        case = rng.choice(own_cases)
+
+        await recorder.request(client, "GET /cases/{id}", "GET", f"/cases/{case['id']}", headers=headers)
+        await recorder.request(client, "GET /documents/case/{id}", "GET", f"/documents/case/{case['id']}", headers=headers)
+
+        if iteration % 5 == 0 and case.get("cnr"):
+            await recorder.request(
+                client, "POST /cases/fetch-court-details", "POST", "/cases/fetch-court-details",
+                headers=headers, json={"cnr": case["cnr"]}
+            )
+
+        response = await recorder.request(
+            client, "POST /documents/upload", "POST", "/documents/upload/",
+            headers=headers,
+            data={"case_id": case["id"], "document_type": "evidence"},
+            files={"file": (f"bench-{index}-{iteration}.pdf", payload, "application/pdf")}
+        )
+        if response is None or response.status_code != 200:
+            continue
+        document_id = response.json()["id"]
+
+        await recorder.request(client, "GET /documents/{id}/download", "GET", f"/documents/{document_id}/download", headers=headers)
+        await recorder.request(client, "GET /documents/{id}/content", "GET", f"/documents/{document_id}/content", headers=headers)
+        await recorder.request(client, "DELETE /documents/{id}", "DELETE", f"/documents/{document_id}", headers=headers)
+
+
+async def run_load(base_url: str, users: int, duration: float, advocates: int, manifest: Path = SEED_MANIFEST) -> dict:
+    cases = read_manifest(manifest)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(virtual_user(client, recorder, i, advocates, deadline, cases) for i in range(users)))
+        elapsed = time.perf_counter() - started
+    return {
+        "base_url": base_url,
+        "users": users,
+        "duration_seconds": round(elapsed, 2),
+        "endpoints": recorder.report(elapsed),
+    }
+
+
+def print_report(results: dict) -> None:
+    print(f"{'endpoint':<36}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, stats in results["endpoints"].items():
+        print(
+            f"{name:<36}{stats['requests']:>7}{stats['errors']:>5}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the API with a scripted workload")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8100")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--advocates", type=int, default=20, help="Number of seeded advocates to log in as")
+    parser.add_argument("--manifest", type=Path, default=SEED_MANIFEST, help="Case ids written by benchmarks.seed")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(args.base_url, args.users, args.duration, args.advocates, args.manifest))
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/run.py
+"""
+Runs the offline end-to-end benchmark.
+
+Starts the storage and eCourts stand-ins and the API under uvicorn, seeds
+the local Postgres database, drives the workload and saves per-endpoint
+throughput and p50/p95/p99 latencies as JSON.
+
+Needs a local Postgres server reachable with the given credentials; nothing
+talks to Supabase or the real court API. Run from the server directory:
+    python -m benchmarks.run --db-name lex_bench --users 20 --duration 60
+Add --storage local to keep documents on the local filesystem backend
+instead of the storage stand-in.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+from benchmarks.common import SEED_MANIFEST
+from benchmarks.loadgen import run_load, print_report
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process serving {url} exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def _uvicorn(app: str, port: int, env: dict, workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=SERVER_DIR,
+        env=env
+    )
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--db-host", default="localhost")
+    parser.add_argument("--db-port", default="5432")
+    parser.add_argument("--db-user", default="postgres")
+    parser.add_argument("--db-password", default="postgres")
+    parser.add_argument("--db-name", default="lex_bench")
+    parser.add_argument("--db-sslmode", default="disable")
+    parser.add_argument("--advocates", type=int, default=20)
+    parser.add_argument("--cases-per-advocate", type=int, default=250)
+    parser.add_argument("--documents-per-case", type=int, default=8)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--storage-port", type=int, default=9001)
+    parser.add_argument("--storage", choices=["stub", "local"], default="stub",
+                        help="Supabase stand-in over HTTP, or the local filesystem backend")
+    parser.add_argument("--ecourts-port", type=int, default=9002)
+    parser.add_argument("--ecourts-latency-ms", type=int, default=300)
+    parser.add_argument("--output", help="Results path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    if "bench" not in args.db_name and not args.skip_seed:
+        parser.error("Seeding resets the database; use a database whose name contains 'bench'")
+    if args.skip_seed and not SEED_MANIFEST.exists():
+        parser.error(f"--skip-seed needs the manifest of a previous seed at {SEED_MANIFEST}")
+
+    storage_dir = tempfile.mkdtemp(prefix="lex-bench-storage-")
+    env = {
+        # The load generator would mostly measure the rate limiter; set
+        # RATE_LIMIT_ENABLED=true to benchmark with it
+        "RATE_LIMIT_ENABLED": "false",
+        **os.environ,
+        "DB_HOST": args.db_host,
+        "DB_PORT": args.db_port,
+        "DB_USER": args.db_user,
+        "DB_PASSWORD": args.db_password,
+        "DB_NAME": args.db_name,
+        "DB_SSLMODE": args.db_sslmode,
+        "SUPABASE_PROJECT_ID": "benchmark",
+        "SUPABASE_ANON_KEY": "benchmark",
+        "SUPABASE_SERVICE_KEY": "benchmark",
+        "SUPABASE_STORAGE_URL": f"http://127.0.0.1:{args.storage_port}/storage/v1",
+        "COURT_API_KEY": "benchmark",
+        "COURT_API_BASE_URL": f"http://127.0.0.1:{args.ecourts_port}/eciapi/17",
+        "JWT_SECRET_KEY": "benchmark-secret",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "600",
+        "BENCH_STORAGE_DIR": storage_dir,
+        "ECOURTS_STUB_LATENCY_MS": str(args.ecourts_latency_ms),
+    }
+    if args.storage == "local":
+        env.update({
+            "STORAGE_BACKEND": "local",
+            "STORAGE_LOCAL_ROOT": storage_dir,
+            "PUBLIC_API_URL": f"http://127.0.0.1:{args.app_port}",
+        })
+
+    if not args.skip_seed:
+        print("Seeding database...")
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--reset",
+             "--advocates", str(args.advocates),
+             "--cases-per-advocate", str(args.cases_per_advocate),
+             "--documents-per-case", str(args.documents_per_case)],
+            cwd=SERVER_DIR, env=env, check=True
+        )
+
+    processes = []
+    try:
+        if args.storage == "stub":
+            storage = _uvicorn("benchmarks.storage_stub:app", args.storage_port, env)
+            processes.append(storage)
+        ecourts = _uvicorn("benchmarks.ecourts_stub:app", args.ecourts_port, env)
+        processes.append(ecourts)
+        api = _uvicorn("main:app", args.app_port, env, workers=args.workers)
+        processes.append(api)
+
+        if args.storage == "stub":
+            _wait_until_up(f"http://127.0.0.1:{args.storage_port}/storage/v1/bucket", storage)
+        _wait_until_up(f"http://127.0.0.1:{args.ecourts_port}/docs", ecourts)
+        _wait_until_up(f"http://127.0.0.1:{args.app_port}/openapi.json", api)
+
+        print(f"Running {args.users} users for {args.duration:.0f}s...")
+        results = asyncio.run(run_load(
+            f"http://127.0.0.1:{args.app_port}", args.users, args.duration, args.advocates
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    results["run"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "workers": args.workers,
+        "advocates": args.advocates,
+        "cases_per_advocate": args.cases_per_advocate,
+        "documents_per_case": args.documents_per_case,
+        "ecourts_latency_ms": args.ecourts_latency_ms,
+    }
+
+    print_report(results)
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).resolve().parent / "results" / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
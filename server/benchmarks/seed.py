@@ -0,0 +1,168 @@
+# benchmarks/seed.py
+"""
+Seeds a local Postgres database with realistic advocate, client, case and
+document volumes for benchmarking.
+
+Configure the database with the usual DB_* settings (DB_SSLMODE=disable for
+a local server) and run from the server directory:
+    python -m benchmarks.seed --advocates 20 --cases-per-advocate 250 --reset
+"""
+
+import argparse
+import random
+import uuid
+from pathlib import Path
+from sqlalchemy import insert, text
+from auth import get_password_hash
+from config import get_settings
+from create_tables import create_tables
+from database import engine
+from models import Base, Advocate, AdvocateClient, Client, Case, Document, DocumentType, DocumentStatus
+from benchmarks.common import BENCH_PASSWORD, SEED_MANIFEST, advocate_email, synthetic_size, write_manifest
+from benchmarks.ecourts_stub import build_case
+
+CHUNK_SIZE = 2000
+
+
+def _insert_chunked(connection, table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        connection.execute(insert(table), rows[start:start + CHUNK_SIZE])
+
+
+def seed(
+    advocates: int = 20,
+    clients_per_advocate: int = 100,
+    cases_per_advocate: int = 250,
+    documents_per_case: int = 8,
+    reset: bool = False,
+    random_seed: int = 42,
+    manifest: Path = SEED_MANIFEST
+) -> dict:
+    """
+    Creates the schema if needed and inserts the benchmark data set, then
+    writes the manifest of each advocate's case ids for the load generator
+    """
+    rng = random.Random(random_seed)
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    create_tables()
+
+    # bcrypt is deliberately slow; every seeded advocate shares one hash
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    document_types = list(DocumentType)
+
+    advocate_rows, client_rows, link_rows, case_rows, document_rows = [], [], [], [], []
+    cases_by_advocate = {}
+    for a in range(advocates):
+        advocate_id = uuid.uuid4()
+        advocate_rows.append({
+            "id": advocate_id,
+            "email": advocate_email(a),
+            "password_hash": password_hash,
+            "full_name": f"Benchmark Advocate {a}",
+            "phone": f"+91-98{a:08d}",
+            "bar_number": f"D/{1000 + a}/2010",
+            "license_state": "Delhi",
+            "firm_name": f"Bench & Associates {a % 5}",
+            "is_active": True,
+        })
+
+        client_ids = []
+        for c in range(clients_per_advocate):
+            client_id = uuid.uuid4()
+            client_ids.append(client_id)
+            client_rows.append({
+                "id": client_id,
+                "email": f"bench-client-{a}-{c}@example.com",
+                "full_name": f"Client {rng.choice(['Sharma', 'Verma', 'Gupta', 'Khan', 'Singh', 'Iyer'])} {a}-{c}",
+                "phone": f"+91-99{a:04d}{c:04d}",
+                "address": {"line1": f"{c} Civil Lines", "city": "New Delhi", "postal_code": "110054"},
+                "company_name": f"Company {c % 40}" if c % 3 else None,
+                "is_active": True,
+            })
+            link_rows.append({"advocate_id": advocate_id, "client_id": client_id})
+
+        for k in range(cases_per_advocate):
+            case_id = uuid.uuid4()
+            cnr = f"DLCT01{a:03d}{k:05d}2024"
+            court = build_case(cnr, "district-court")
+            cases_by_advocate.setdefault(advocate_email(a), []).append({"id": str(case_id), "cnr": cnr})
+            case_rows.append({
+                "id": case_id,
+                "advocate_id": advocate_id,
+                "client_id": rng.choice(client_ids),
+                "cnr": cnr,
+                "court_case_title": court["title"],
+                "court_case_type": court["details"]["type"],
+                "filing_number": court["details"]["filingNumber"],
+                "registration_number": court["details"]["registrationNumber"],
+                "court_status": court["status"],
+                "parties_details": court["parties"],
+                "acts_sections": court["actsAndSections"],
+                "fir_details": court["firstInformationReport"] or {},
+                "court_history": court["history"],
+                "case_metadata": {"seeded": True},
+            })
+
+            for d in range(rng.randint(documents_per_case // 2, documents_per_case * 3 // 2)):
+                filename = f"document-{d}.pdf"
+                path = f"cases/{case_id}/documents/{uuid.uuid4()}-{filename}"
+                document_rows.append({
+                    "id": uuid.uuid4(),
+                    "case_id": case_id,
+                    "title": filename,
+                    "document_type": rng.choice(document_types),
+                    "description": None,
+                    "s3_path": path,
+                    "original_filename": filename,
+                    "file_size": synthetic_size(path),
+                    "mime_type": "application/pdf",
+                    "status": DocumentStatus.PROCESSED,
+                    "document_metadata": {},
+                })
+
+    with engine.begin() as connection:
+        _insert_chunked(connection, Advocate.__table__, advocate_rows)
+        _insert_chunked(connection, Client.__table__, client_rows)
+        _insert_chunked(connection, AdvocateClient.__table__, link_rows)
+        _insert_chunked(connection, Case.__table__, case_rows)
+        _insert_chunked(connection, Document.__table__, document_rows)
+        connection.execute(text("ANALYZE"))
+    write_manifest(manifest, cases_by_advocate)
+
+    return {
+        "advocates": len(advocate_rows),
+        "clients": len(client_rows),
+        "cases": len(case_rows),
+        "documents": len(document_rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a local benchmark database")
+    parser.add_argument("--advocates", type=int, default=20)
+    parser.add_argument("--clients-per-advocate", type=int, default=100)
+    parser.add_argument("--cases-per-advocate", type=int, default=250)
+    parser.add_argument("--documents-per-case", type=int, default=8)
+    parser.add_argument("--reset", action="store_true", help="Drop all tables first")
+    parser.add_argument("--manifest", type=Path, default=SEED_MANIFEST, help="Where to write the seeded case ids")
+    parser.add_argument("--force", action="store_true", help="Allow --reset on a database not named *bench*")
+    args = parser.parse_args()
+
+    if args.reset and "bench" not in get_settings().DB_NAME and not args.force:
+        parser.error(f"Refusing to reset database {get_settings().DB_NAME!r}; use a *bench* database or --force")
+
+    counts = seed(
+        advocates=args.advocates,
+        clients_per_advocate=args.clients_per_advocate,
+        cases_per_advocate=args.cases_per_advocate,
+        documents_per_case=args.documents_per_case,
+        reset=args.reset,
+        manifest=args.manifest
+    )
+    print("Seeded: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/storage_stub.py
+"""
+Local stand-in for the Supabase Storage REST API.
+
+Implements the object endpoints DocumentService uses (upload, download,
+delete, sign) on top of a directory. Objects that were never uploaded,
+such as the ones created by the seeder, are synthesized deterministically.
+
+Run from the server directory:
+    BENCH_STORAGE_DIR=/tmp/lex-storage uvicorn benchmarks.storage_stub:app --port 9001
+and point the app at it with SUPABASE_STORAGE_URL=http://127.0.0.1:9001/storage/v1
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Body
+from fastapi.responses import Response
+from benchmarks.common import synthetic_bytes
+
+STORAGE_DIR = Path(os.environ.get("BENCH_STORAGE_DIR") or tempfile.mkdtemp(prefix="lex-storage-"))
+
+app = FastAPI(title="Storage stand-in")
+
+
+def _object_path(bucket: str, path: str) -> Path:
+    target = (STORAGE_DIR / bucket / path).resolve()
+    if not str(target).startswith(str(STORAGE_DIR.resolve())):
+        raise HTTPException(status_code=400, detail="Invalid object path")
+    return target
+
+
+def _read(bucket: str, path: str) -> bytes:
+    target = _object_path(bucket, path)
+    if target.exists():
+        return target.read_bytes()
+    if (target.parent / (target.name + ".deleted")).exists():
+        raise HTTPException(status_code=404, detail="Object not found")
+    return synthetic_bytes(path)
+
+
+def _serve(data: bytes, range_header: Optional[str]) -> Response:
+    """Serves the object, honouring a single "bytes=start-end" range like Supabase does"""
+    if range_header:
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(data) - 1
+            else:
+                start = max(0, len(data) - int(match.group(2)))
+                end = len(data) - 1
+            end = min(end, len(data) - 1)
+            if start > end:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{len(data)}"})
+            return Response(
+                content=data[start:end + 1],
+                status_code=206,
+                media_type="application/octet-stream",
+                headers={"Content-Range": f"bytes {start}-{end}/{len(data)}", "Accept-Ranges": "bytes"}
+            )
+    return Response(content=data, media_type="application/octet-stream", headers={"Accept-Ranges": "bytes"})
+
+
+@app.get("/storage/v1/bucket")
+async def list_buckets():
+    return [{"id": "documents", "name": "documents", "public": False}]
+
+
+@app.post("/storage/v1/object/sign/{bucket}/{path:path}")
+async def sign_object(bucket: str, path: str, body: dict = Body(default={})):
+    token = hashlib.sha256(f"{bucket}/{path}:{body.get('expiresIn')}".encode()).hexdigest()
+    return {"signedURL": f"/object/sign/{bucket}/{path}?token={token}"}
+
+
+@app.get("/storage/v1/object/sign/{bucket}/{path:path}")
+async def get_signed_object(bucket: str, path: str, request: Request, token: str):
+    return _serve(_read(bucket, path), request.headers.get("range"))
+
+
+@app.post("/storage/v1/object/list/{bucket}")
+async def list_objects(bucket: str, body: dict = Body(default={})):
+    prefix = body.get("prefix", "")
+    base = _object_path(bucket, prefix)
+    if not base.is_dir():
+        return []
+    return [
+        {"name": entry.name, "metadata": {"size": entry.stat().st_size}}
+        for entry in sorted(base.iterdir())
+        if entry.is_file() and not entry.name.endswith(".deleted")
+    ][: int(body.get("limit", 100))]
+
+
+@app.get("/storage/v1/object/public/{bucket}/{path:path}")
+async def get_public_object(bucket: str, path: str, request: Request):
+    return _serve(_read(bucket, path), request.headers.get("range"))
+
+
+@app.head("/storage/v1/object/{bucket}/{path:path}")
+async def head_object(bucket: str, path: str):
+    data = _read(bucket, path)
+    return Response(headers={"Content-Length": str(len(data)), "Accept-Ranges": "bytes"})
+
+
+@app.get("/storage/v1/object/{bucket}/{path:path}")
+async def get_object(bucket: str, path: str, request: Request):
+    return _serve(_read(bucket, path), request.headers.get("range"))
+
+
+@app.post("/storage/v1/object/{bucket}/{path:path}")
+async def upload_object(bucket: str, path: str, request: Request):
+    """Takes a multipart form with a file field, or the raw object as the body"""
+    target = _object_path(bucket, path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as f:
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            file = (await request.form())["file"]
+            while chunk := await file.read(1024 * 1024):
+                f.write(chunk)
+        else:
+            async for chunk in request.stream():
+                f.write(chunk)
+    tombstone = target.parent / (target.name + ".deleted")
+    if tombstone.exists():
+        tombstone.unlink()
+    return {"Key": f"{bucket}/{path}"}
+
+
+@app.delete("/storage/v1/object/{bucket}/{path:path}")
+async def delete_object(bucket: str, path: str):
+    target = _object_path(bucket, path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        target.unlink()
+    # Remember the deletion so synthesized objects disappear too
+    (target.parent / (target.name + ".deleted")).touch()
+    return {"message": "Successfully deleted"}
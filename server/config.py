@@ -14,6 +14,24 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 1800
+    # Connections idle in the pool longer than this are pinged before use, since
+    # Supabase and proxies drop idle connections; busy ones are not (0 disables)
+    DB_POOL_PING_IDLE_SECONDS: float = 30.0
+    DB_POOL_WARMUP_CONNECTIONS: Optional[int] = None  # Opened at startup; defaults to DB_POOL_SIZE
+    # Set when DB_HOST/DB_PORT point at PgBouncer or Supavisor in transaction mode.
+    # LISTEN needs a session of its own, so it then uses DB_DIRECT_HOST/DB_DIRECT_PORT.
+    DB_PGBOUNCER_MODE: bool = False
+    DB_DIRECT_HOST: Optional[str] = None
+    DB_DIRECT_PORT: Optional[str] = None
+    DB_SSLMODE: str = "require"  # Supabase requires SSL; local databases may use "disable"
+    # Comma-separated read replica hosts ("host" or "host:port"), sharing the primary's
+    # credentials and database name. Empty sends all reads to the primary.
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_CHECK_INTERVAL: int = 10  # Seconds between replica health checks
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # Replicas further behind are skipped
+    # After an advocate writes, their reads stay on the primary for this long
+    # so they see their own changes despite replication lag
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
 
     # Server settings
     SERVER_HOST: str = "0.0.0.0"
@@ -23,12 +41,46 @@ class Settings(BaseSettings):
     SUPABASE_PROJECT_ID: str  # The project ID part of your Supabase URL
     SUPABASE_ANON_KEY: str    # Public anon key for Storage API
     SUPABASE_SERVICE_KEY: str # Secret service role key (for admin operations)
+    # Overrides the Storage API base URL, e.g. to point at a local stand-in
+    SUPABASE_STORAGE_URL: Optional[str] = None
+    SUPABASE_BUCKET: str = "documents"
     
-    # Keep AWS settings for S3 compatibility with existing code
+    # Where document files are kept: "supabase", "s3" (or S3-compatible) or "local"
+    STORAGE_BACKEND: str = "supabase"
+    STORAGE_LOCAL_ROOT: str = "storage-data"  # Directory used by the local backend
+    # Base URL this API is reached at; signed URLs of the local backend point here
+    PUBLIC_API_URL: str = "http://localhost:8000"
+    SIGNED_URL_EXPIRES_SECONDS: int = 3600
+    DOCUMENT_BATCH_MAX_FILES: int = 100  # Files accepted by one batch upload
+    DOCUMENT_UPLOAD_CONCURRENCY: int = 6  # Files of a batch sent to storage at once
+    
+    # Thumbnails and previews of PDFs and images
+    RENDITION_WORKERS: int = 2  # Renderer processes per API or worker process
+    RENDITION_THUMBNAIL_PX: int = 256  # Longest side
+    RENDITION_PREVIEW_PX: int = 1024
+    RENDITION_MAX_SOURCE_MB: int = 50  # Larger files get no renditions
+    RENDITION_CACHE_SECONDS: int = 86400  # Browser cache lifetime of a rendition
+    PDF_EXTRACT_MAX_PAGES: int = 500  # Pages one /documents/{id}/pages request may ask for
+    PDF_PAGE_CACHE_MB: int = 64  # Recently extracted page ranges kept per process
+    # Near-duplicate detection (GET /documents/{id}/similar)
+    SIMILARITY_MIN_SCORE: float = 0.8  # Default estimated text overlap to count as a near-duplicate
+    SIMILARITY_MAX_SOURCE_MB: int = 100  # Larger files are not indexed
+    # Document revisions (POST /documents/{id}/versions)
+    DOCUMENT_VERSION_SNAPSHOT_INTERVAL: int = 10  # Most deltas applied to rebuild a version is one less
+    DOCUMENT_VERSION_MAX_DELTA_RATIO: float = 0.5  # Larger deltas are stored as snapshots instead
+    DOCUMENT_VERSION_DELTA_MAX_MB: int = 64  # Larger files are always stored whole
+    DOCUMENT_VERSION_CACHE_MB: int = 64  # Rebuilt versions kept per process
+    
+    # S3 backend settings
     AWS_ACCESS_KEY: Optional[str] = None
     AWS_SECRET_KEY: Optional[str] = None
     AWS_REGION: Optional[str] = None
     S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # For S3-compatible services such as MinIO
+    S3_MULTIPART_PART_SIZE_MB: int = 8  # S3 requires at least 5
+    S3_MULTIPART_CONCURRENCY: int = 8  # Parts of one object uploaded at once
+    S3_TRANSFER_THREADS: int = 16  # Shared by all transfers of a process
+    S3_MULTIPART_ABORT_AFTER_HOURS: int = 24  # Incomplete uploads older than this are aborted at startup
     
     # JWT Settings
     JWT_SECRET_KEY: str
@@ -36,6 +88,85 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
     COURT_API_KEY: Optional[str] = None
+    COURT_API_BASE_URL: str = "https://apis.akshit.net/eciapi/17"
+
+    # Client typeahead runs on every keystroke; queries slower than this are cancelled
+    CLIENT_SUGGEST_TIMEOUT_MS: int = 200
+
+    # Background job workers (python worker.py)
+    JOB_WORKER_PROCESSES: int = 2
+    JOB_WORKER_CONCURRENCY: int = 8  # Jobs run at once per worker process
+    JOB_POLL_INTERVAL_SECONDS: float = 5.0  # Fallback when no NOTIFY arrives
+
+    # POST /batch limits. Reads cost 1 and anything else BATCH_WRITE_COST
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_MAX_COST: int = 40
+    BATCH_WRITE_COST: int = 5
+
+    # Live event feed (GET /events/stream)
+    EVENT_QUEUE_SIZE: int = 100  # Events buffered per client before it is told to resync
+    EVENT_HEARTBEAT_SECONDS: int = 15  # Keeps idle connections open through proxies
+
+    # In-process cache of list responses, per advocate
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL_SECONDS: float = 30.0
+    RESULT_CACHE_MAX_ENTRIES: int = 5000
+    RESULT_CACHE_NOTIFY: bool = True  # Tell other workers about invalidations over NOTIFY
+
+    # In-process cache of the case ids each advocate owns, for access checks
+    ACCESS_CACHE_ENABLED: bool = True
+    ACCESS_CACHE_TTL_SECONDS: float = 300.0
+    ACCESS_CACHE_MAX_ADVOCATES: int = 10000
+
+    # Rate limits per advocate (or client IP when unauthenticated) and route class
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" per worker, or "postgres" shared by all workers
+    RATE_LIMIT_READ_PER_MINUTE: float = 600
+    RATE_LIMIT_READ_BURST: int = 100
+    RATE_LIMIT_WRITE_PER_MINUTE: float = 120
+    RATE_LIMIT_WRITE_BURST: int = 30
+    RATE_LIMIT_AUTH_PER_MINUTE: float = 10
+    RATE_LIMIT_AUTH_BURST: int = 5
+    RATE_LIMIT_UPLOAD_PER_MINUTE: float = 30
+    RATE_LIMIT_UPLOAD_BURST: int = 10
+    RATE_LIMIT_COURT_PER_MINUTE: float = 10
+    RATE_LIMIT_COURT_BURST: int = 5
+    RATE_LIMIT_COURT_GLOBAL_PER_MINUTE: float = 60  # Shared court API key quota, all advocates together
+    # Requests of a class served at once per worker; 0 for no cap
+    CONCURRENCY_AUTH_LIMIT: int = 4  # bcrypt hashing is CPU-bound
+    CONCURRENCY_UPLOAD_LIMIT: int = 4
+    CONCURRENCY_QUEUE_TIMEOUT_SECONDS: float = 2.0  # Wait for a slot before answering 503
+
+    # Idempotency-Key support for uploads and client creation
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 300  # After this an unfinished original is presumed dead
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0  # How long a duplicate waits for the original
+
+    # Bulk case onboarding from CNR numbers (POST /cases/onboard)
+    CASE_ONBOARD_MAX_CNRS: int = 500
+    CASE_ONBOARD_BATCH_SIZE: int = 100  # Cases inserted per statement
+    COURT_FETCH_CONCURRENCY: int = 8  # Court API requests in flight per job
+    COURT_FETCH_RETRIES: int = 3
+    COURT_FETCH_BACKOFF_SECONDS: float = 1.0  # First retry delay; doubles per retry
+    COURT_FETCH_TIMEOUT_SECONDS: float = 20.0
+
+    # Indexed PDF bundles of case documents (POST /cases/{id}/bundle)
+    CASE_BUNDLE_MAX_DOCUMENTS: int = 200
+
+    # Response compression settings
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    # Comma-separated content types (or prefixes ending in "/") that are never compressed
+    COMPRESSION_EXCLUDED_TYPES: str = (
+        "application/pdf,image/,video/,audio/,application/zip,"
+        "application/gzip,application/zstd,text/event-stream"
+    )
+    # Estimated milliseconds of CPU one buffered response may spend compressing
+    # (0 disables the check); larger bodies are sent uncompressed
+    COMPRESSION_CPU_BUDGET_MS: int = 50
 
     class Config:
         env_file = ".env"
@@ -47,7 +178,7 @@ class Settings(BaseSettings):
         Constructs a PostgreSQL connection URL from individual components.
         This provides a convenient way to get the full database connection string.
         """
-        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?sslmode=require"
+        return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}?sslmode={self.DB_SSLMODE}"
 
     @property
     def supabase_url(self) -> str:
@@ -56,6 +187,13 @@ class Settings(BaseSettings):
         """
         return f"https://{self.SUPABASE_PROJECT_ID}.supabase.co"
 
+    @property
+    def storage_api_url(self) -> str:
+        """
+        Returns the Supabase Storage API base URL, honouring SUPABASE_STORAGE_URL.
+        """
+        return self.SUPABASE_STORAGE_URL or f"{self.supabase_url}/storage/v1"
+
 @lru_cache()
 def get_settings() -> Settings:
     """
@@ -1,10 +1,24 @@
 # Create a file called create_tables.py in your project root
+from sqlalchemy import text
 from models import Base
 from database import engine
 
 def create_tables():
+    with engine.begin() as connection:
+        # Needed by the trigram indexes used for client typeahead
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=engine)
+    create_indexes()
+
+def create_indexes():
+    """
+    create_all only creates indexes together with new tables, so indexes
+    added to existing tables are created here.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 if __name__ == "__main__":
     create_tables()
-    print("Tables created successfully!")
\ No newline at end of file
+    print("Tables created successfully!")
@@ -1,15 +1,27 @@
 # database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.engine import URL
+import itertools
+import math
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.selectable import CTE
+from fastapi import Request
 from config import get_settings
+from utils.db_pool import InstrumentedQueuePool, instrument_engine
 
 # Get validated settings
 settings = get_settings()
 
 # Create the database URL using validated settings
 # For Supabase, we need to specify SSL mode
-connection_args = {"sslmode": "require"}
+connection_args = {"sslmode": settings.DB_SSLMODE}
 DATABASE_URL = URL.create(
     drivername="postgresql",
     username=settings.DB_USER,
@@ -20,27 +32,228 @@ DATABASE_URL = URL.create(
     query=connection_args  # Required for Supabase
 )
 
+def create_pooled_engine(url: URL, **kwargs) -> Engine:
+    """
+    Creates an engine with an instrumented pool and idle-connection liveness checks.
+    psycopg2 never uses server-side prepared statements, so these engines are
+    safe behind PgBouncer/Supavisor in transaction mode as they are.
+    """
+    pooled = create_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        echo=False,
+        **kwargs
+    )
+    instrument_engine(pooled, settings.DB_POOL_PING_IDLE_SECONDS)
+    return pooled
+
 # Create the SQLAlchemy engine with proper PostgreSQL settings
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=settings.DB_POOL_SIZE,
-    max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_timeout=settings.DB_POOL_TIMEOUT,
-    pool_recycle=settings.DB_POOL_RECYCLE,
-    echo=False
-)
+engine = create_pooled_engine(DATABASE_URL)
+
+# LISTEN/NOTIFY subscribers hold a session-level LISTEN, which a
+# transaction-mode pooler cannot keep on one server connection
+if settings.DB_PGBOUNCER_MODE and settings.DB_DIRECT_HOST:
+    listen_engine = create_engine(
+        DATABASE_URL.set(host=settings.DB_DIRECT_HOST, port=settings.DB_DIRECT_PORT or settings.DB_PORT),
+        poolclass=NullPool
+    )
+else:
+    if settings.DB_PGBOUNCER_MODE:
+        print("Warning: DB_PGBOUNCER_MODE without DB_DIRECT_HOST; LISTEN may not receive notifications")
+    listen_engine = engine
 
 # The rest of your code remains the same
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+# Scope key under which POST /batch hands its sub-requests a shared
+# session and the already authenticated advocate
+BATCH_SCOPE_KEY = "lex.batch"
+
+def get_db(request: Request):
     """
     Create a new database session for each request and close it when done.
     This function is used as a FastAPI dependency.
     """
+    batch = request.scope.get(BATCH_SCOPE_KEY)
+    if batch is not None:
+        # The batch owns the session and closes it
+        yield batch.db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Read replicas
+
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class Replica:
+    def __init__(self, host: str):
+        hostname, _, port = host.strip().partition(":")
+        self.name = host.strip()
+        self.engine = create_pooled_engine(
+            DATABASE_URL.set(host=hostname, port=port or settings.DB_PORT),
+            # Fail over quickly instead of hanging on an unreachable replica
+            connect_args={"connect_timeout": 3}
+        )
+        self.healthy = True
+
+class ReplicaSet:
+    """
+    Round-robin over the configured read replicas.
+    A background thread checks every replica's reachability and replication
+    lag; unreachable or lagging replicas are skipped until they recover.
+    """
+
+    def __init__(self, hosts: List[str]):
+        self.replicas = [Replica(host) for host in hosts if host.strip()]
+        self._counter = itertools.count()
+        self._checker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def candidates(self) -> List[Replica]:
+        """Healthy replicas, starting with the next one in rotation"""
+        self._ensure_checker()
+        start = next(self._counter)
+        count = len(self.replicas)
+        rotated = [self.replicas[(start + i) % count] for i in range(count)]
+        return [replica for replica in rotated if replica.healthy]
+
+    def mark_down(self, replica: Replica) -> None:
+        if replica.healthy:
+            print(f"Read replica {replica.name} marked unhealthy")
+        replica.healthy = False
+
+    def check(self, replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as connection:
+                lag = connection.execute(REPLICA_LAG_SQL).scalar()
+            healthy = lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        except Exception:
+            healthy = False
+        if healthy and not replica.healthy:
+            print(f"Read replica {replica.name} is healthy again")
+        elif not healthy:
+            self.mark_down(replica)
+        replica.healthy = healthy
+
+    def _ensure_checker(self) -> None:
+        if self._checker is not None:
+            return
+        with self._lock:
+            if self._checker is None:
+                self._checker = threading.Thread(target=self._check_forever, name="replica-health", daemon=True)
+                self._checker.start()
+
+    def _check_forever(self) -> None:
+        while True:
+            for replica in self.replicas:
+                self.check(replica)
+            time.sleep(settings.DB_REPLICA_CHECK_INTERVAL)
+
+replicas = ReplicaSet(settings.DB_REPLICA_HOSTS.split(","))
+
+# Read-your-writes: when each advocate last committed a write in this process.
+# Other workers and hosts learn of a write from the client, which gets its
+# time back in a cookie (and header) and sends it with its next requests.
+_last_writes: Dict[str, float] = {}
+
+WRITE_COOKIE = "lex_wrote_at"
+WRITE_HEADER = "X-Last-Write"
+
+# Per request: a dict the commit hook records the write time in, for
+# ReadYourWritesMiddleware to hand back to the client
+request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+def record_write(advocate_id: uuid.UUID) -> None:
+    now = time.monotonic()
+    _last_writes[str(advocate_id)] = now
+    if len(_last_writes) > 10000:
+        cutoff = now - settings.DB_READ_YOUR_WRITES_SECONDS
+        for key in [key for key, at in _last_writes.items() if at < cutoff]:
+            _last_writes.pop(key, None)
+
+def wrote_recently(advocate_id: uuid.UUID) -> bool:
+    at = _last_writes.get(str(advocate_id))
+    return at is not None and time.monotonic() - at < settings.DB_READ_YOUR_WRITES_SECONDS
+
+def parse_write_time(value: Optional[str]) -> Optional[float]:
+    """Write time (Unix seconds) from the cookie or header; None if absent or invalid"""
+    try:
+        at = float(value) if value else None
+    except ValueError:
+        return None
+    return at if at is not None and math.isfinite(at) else None
+
+def write_cookie_max_age() -> int:
+    return math.ceil(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _flagged_flush(session, flush_context):
+    session.info["wrote"] = True
+
+def _is_write(statement) -> bool:
+    if statement.is_dml:
+        return True
+    # SELECT ... FROM (INSERT ... RETURNING) data-modifying CTEs
+    if statement.is_select:
+        return any(isinstance(source, CTE) and source.element.is_dml for source in statement.get_final_froms())
+    return False
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _flagged_dml(orm_execute_state):
+    if _is_write(orm_execute_state.statement):
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit(session):
+    advocate_id = session.info.get("advocate_id")
+    if session.info.pop("wrote", False) and advocate_id is not None:
+        record_write(advocate_id)
+        writes = request_writes.get()
+        if writes is not None:
+            writes["at"] = time.time()
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _clear_flag(session):
+    session.info.pop("wrote", None)
+
+def open_read_session(advocate_id: Optional[uuid.UUID] = None, wrote_at: Optional[float] = None) -> Session:
+    """
+    Opens a session on a healthy read replica, falling back to the primary
+    when there are no replicas, none is reachable, or the advocate wrote
+    within the last DB_READ_YOUR_WRITES_SECONDS, as recorded by this process
+    or reported by the client in wrote_at (Unix seconds).
+    """
+    recent = (
+        (advocate_id is not None and wrote_recently(advocate_id))
+        or (wrote_at is not None and time.time() - wrote_at < settings.DB_READ_YOUR_WRITES_SECONDS)
+    )
+    if replicas.enabled and not recent:
+        for replica in replicas.candidates():
+            db = SessionLocal(bind=replica.engine)
+            try:
+                # Connect now so a dead replica fails over instead of failing the request
+                db.connection()
+                db.info["replica"] = replica.name
+                return db
+            except OperationalError:
+                db.close()
+                replicas.mark_down(replica)
+    return SessionLocal()
@@ -0,0 +1,3 @@
+# jobs/__init__.py
+from jobs.registry import JobContext, job_handler, get_handler
+from jobs.queue import JOBS_CHANNEL, enqueue
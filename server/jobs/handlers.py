@@ -0,0 +1,82 @@
+# jobs/handlers.py
+import uuid
+from typing import List
+from pydantic import BaseModel
+from jobs.registry import JobContext, job_handler
+
+DELETE_STORAGE_OBJECT = "documents.delete_object"
+ONBOARD_CASES = "cases.onboard_cnrs"
+RENDER_DOCUMENT = "documents.render"
+COMPILE_CASE_BUNDLE = "cases.compile_bundle"
+FINGERPRINT_DOCUMENT = "documents.fingerprint"
+
+
+class DeleteStorageObject(BaseModel):
+    path: str
+
+
+@job_handler(DELETE_STORAGE_OBJECT, payload=DeleteStorageObject, max_attempts=8, backoff_seconds=30.0)
+async def delete_storage_object(payload: DeleteStorageObject, context: JobContext):
+    """Removes a deleted document's file from storage"""
+    # Imported here because the service itself enqueues this job
+    from services.document_service import DocumentService
+    await DocumentService().delete_storage_object(payload.path)
+
+
+class RenderDocument(BaseModel):
+    document_id: uuid.UUID
+
+
+@job_handler(RENDER_DOCUMENT, payload=RenderDocument, max_attempts=3, backoff_seconds=30.0)
+async def render_document(payload: RenderDocument, context: JobContext):
+    """Creates the thumbnail and preview of a newly uploaded document"""
+    from services.rendition_service import RenditionService
+    renditions = await RenditionService().ensure(payload.document_id)
+    return {"renditions": sorted(renditions)}
+
+
+class FingerprintDocument(BaseModel):
+    document_id: uuid.UUID
+
+
+@job_handler(FINGERPRINT_DOCUMENT, payload=FingerprintDocument, max_attempts=3, backoff_seconds=30.0)
+async def fingerprint_document(payload: FingerprintDocument, context: JobContext):
+    """Adds a newly uploaded document to the near-duplicate index"""
+    from services.similarity_service import SimilarityService
+    indexed = await SimilarityService().index(payload.document_id)
+    return {"indexed": indexed}
+
+
+class OnboardCases(BaseModel):
+    advocate_id: uuid.UUID
+    client_id: uuid.UUID
+    cnrs: List[str]
+
+
+# Two at a time across all workers keeps bulk imports within the court API quota
+@job_handler(ONBOARD_CASES, payload=OnboardCases, max_attempts=3, concurrency=2, backoff_seconds=60.0)
+async def onboard_cases(payload: OnboardCases, context: JobContext):
+    """Creates cases from eCourts data for a list of CNR numbers"""
+    from services.case_onboarding_service import CaseOnboardingService
+    return await CaseOnboardingService().onboard(
+        payload.advocate_id, payload.client_id, payload.cnrs, context.report_progress
+    )
+
+
+class CompileCaseBundle(BaseModel):
+    advocate_id: uuid.UUID
+    case_id: uuid.UUID
+    document_ids: List[uuid.UUID]
+    title: str
+    input_hash: str
+
+
+# CPU-heavy; each job already fans out over the rendition process pool
+@job_handler(COMPILE_CASE_BUNDLE, payload=CompileCaseBundle, max_attempts=3, concurrency=2, backoff_seconds=60.0)
+async def compile_case_bundle(payload: CompileCaseBundle, context: JobContext):
+    """Builds one indexed, paginated PDF from documents of a case"""
+    from services.case_bundle_service import CaseBundleService
+    return await CaseBundleService().compile(
+        payload.advocate_id, payload.case_id, payload.document_ids,
+        payload.title, payload.input_hash, context.report_progress
+    )
@@ -0,0 +1,234 @@
+# jobs/queue.py
+import hashlib
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Union
+from pydantic import BaseModel
+from sqlalchemy import select, update, func, case
+from sqlalchemy.orm import Session
+from models import Job, JobStatus
+from jobs.registry import get_handler
+from utils.pg_listener import notify
+
+# Workers LISTEN on this channel; enqueue notifies it so idle workers wake
+# up immediately instead of waiting for their next poll
+JOBS_CHANNEL = "lex_jobs"
+
+# Upper bound for the exponential retry delay
+MAX_BACKOFF_SECONDS = 3600
+
+
+@dataclass
+class ClaimedJob:
+    """Snapshot of a claimed job, usable after its session is closed"""
+    id: uuid.UUID
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Union[BaseModel, dict],
+    priority: int = 100,
+    run_at: Optional[datetime] = None,
+    max_attempts: Optional[int] = None,
+    advocate_id: Optional[uuid.UUID] = None
+) -> Job:
+    """
+    Adds a job in the caller's transaction; nothing runs until it commits.
+    That makes enqueueing atomic with the write that caused it.
+    The payload is validated against the handler's payload model.
+    """
+    handler = get_handler(kind)
+    if handler is None:
+        raise ValueError(f"No handler registered for job kind {kind!r}")
+    if not isinstance(payload, handler.payload_model):
+        payload = handler.payload_model.model_validate(payload)
+
+    job = Job(
+        id=uuid.uuid4(),
+        kind=kind,
+        advocate_id=advocate_id,
+        payload=payload.model_dump(mode="json"),
+        status=JobStatus.QUEUED,
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts or handler.max_attempts
+    )
+    if run_at is not None:
+        job.run_at = run_at
+    db.add(job)
+    notify(db, JOBS_CHANNEL, kind)
+    return job
+
+
+def _lock_key(kind: str) -> int:
+    """Stable signed 64-bit advisory lock key for a job kind"""
+    return int.from_bytes(hashlib.sha1(f"jobs:{kind}".encode()).digest()[:8], "big", signed=True)
+
+
+def _claim(db: Session, worker_id: str, kinds: List[str], limit: int) -> List[ClaimedJob]:
+    """
+    Claims up to limit due jobs of the given kinds.
+    SKIP LOCKED lets any number of workers claim concurrently without
+    blocking on, or double-claiming, each other's rows.
+    """
+    candidates = (
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED, Job.run_at <= func.now(), Job.kind.in_(kinds))
+        .order_by(Job.priority, Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("candidates")
+    )
+    leases = {kind: timedelta(seconds=get_handler(kind).lease_seconds) for kind in kinds}
+    rows = db.execute(
+        update(Job)
+        .where(Job.id == candidates.c.id)
+        .values(
+            status=JobStatus.RUNNING,
+            attempts=Job.attempts + 1,
+            locked_by=worker_id,
+            locked_until=func.now() + case(leases, value=Job.kind, else_=timedelta(seconds=300))
+        )
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return [ClaimedJob(*row) for row in rows]
+
+
+def claim_jobs(db: Session, worker_id: str, kinds: Iterable[str], capacity: int) -> List[ClaimedJob]:
+    """
+    Claims up to capacity jobs and commits.
+    Kinds with a concurrency limit are claimed one kind at a time under a
+    transaction-scoped advisory lock, so the running count checked against
+    the limit cannot change underneath us in another worker.
+    """
+    handlers = [get_handler(kind) for kind in kinds]
+    claimed: List[ClaimedJob] = []
+
+    unlimited = [handler.kind for handler in handlers if handler.concurrency is None]
+    if unlimited:
+        claimed.extend(_claim(db, worker_id, unlimited, capacity))
+        db.commit()
+
+    for handler in handlers:
+        if handler.concurrency is None:
+            continue
+        room = capacity - len(claimed)
+        if room <= 0:
+            break
+        db.execute(select(func.pg_advisory_xact_lock(_lock_key(handler.kind))))
+        running = db.scalar(
+            select(func.count()).select_from(Job)
+            .where(Job.kind == handler.kind, Job.status == JobStatus.RUNNING)
+        )
+        room = min(room, handler.concurrency - running)
+        if room > 0:
+            claimed.extend(_claim(db, worker_id, [handler.kind], room))
+        # Committing releases the advisory lock
+        db.commit()
+
+    return claimed
+
+
+def complete_job(db: Session, job_id: uuid.UUID, worker_id: str, result: Optional[dict]) -> None:
+    values = dict(status=JobStatus.SUCCEEDED, locked_by=None, locked_until=None, last_error=None)
+    if result is not None:
+        values["result"] = result
+    # The locked_by guard ignores workers whose lease was taken over
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def fail_job(db: Session, job: ClaimedJob, worker_id: str, error: str, retry: bool = True) -> JobStatus:
+    """
+    Records a failed attempt. The job is retried with exponential backoff and
+    jitter until max_attempts, then dead-lettered. Returns the new status.
+    """
+    handler = get_handler(job.kind)
+    if retry and job.attempts < job.max_attempts:
+        base = handler.backoff_seconds if handler else 10.0
+        delay = min(base * 2 ** (job.attempts - 1), MAX_BACKOFF_SECONDS) * random.uniform(0.8, 1.2)
+        values = dict(status=JobStatus.QUEUED, run_at=func.now() + timedelta(seconds=delay))
+    else:
+        values = dict(status=JobStatus.DEAD)
+
+    db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(locked_by=None, locked_until=None, last_error=error, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return values["status"]
+
+
+def extend_lease(db: Session, job_id: uuid.UUID, worker_id: str, lease_seconds: int) -> bool:
+    """Heartbeat for long-running jobs; returns False if the lease was lost"""
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == worker_id, Job.status == JobStatus.RUNNING)
+        .values(locked_until=func.now() + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def save_progress(db: Session, job_id: uuid.UUID, progress: dict) -> None:
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.RUNNING)
+        .values(result=progress)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def recover_expired(db: Session) -> int:
+    """
+    Requeues jobs whose worker died or stalled past its lease, or
+    dead-letters them if they have no attempts left.
+    """
+    expired = (Job.status == JobStatus.RUNNING, Job.locked_until < func.now())
+    requeued = db.execute(
+        update(Job)
+        .where(*expired, Job.attempts < Job.max_attempts)
+        .values(status=JobStatus.QUEUED, run_at=func.now(), locked_by=None, locked_until=None,
+                last_error="Lease expired before the job finished")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    dead = db.execute(
+        update(Job)
+        .where(*expired, Job.attempts >= Job.max_attempts)
+        .values(status=JobStatus.DEAD, locked_by=None, locked_until=None,
+                last_error="Lease expired before the job finished")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return requeued + dead
+
+
+def retry_dead_job(db: Session, job_id: uuid.UUID) -> bool:
+    """Puts a dead-lettered job back in the queue with a fresh set of attempts"""
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.DEAD)
+        .values(status=JobStatus.QUEUED, attempts=0, run_at=func.now(), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        notify(db, JOBS_CHANNEL, "retry")
+    db.commit()
+    return result.rowcount == 1
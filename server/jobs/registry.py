@@ -0,0 +1,74 @@
+# jobs/registry.py
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Type, Union
+from pydantic import BaseModel
+
+
+@dataclass
+class JobContext:
+    """
+    What a handler gets besides its payload.
+    report_progress stores a JSON-serializable dict in the job's result column
+    while the job runs, so status endpoints can show partial progress.
+    """
+    job_id: uuid.UUID
+    attempt: int
+    max_attempts: int
+    report_progress: Callable[[dict], None]
+
+
+@dataclass
+class JobHandler:
+    kind: str
+    func: Callable[[BaseModel, JobContext], Union[Optional[dict], Awaitable[Optional[dict]]]]
+    payload_model: Type[BaseModel]
+    max_attempts: int = 5
+    # Maximum jobs of this kind running at once across all worker processes
+    concurrency: Optional[int] = None
+    # How long a claimed job stays locked without a heartbeat before
+    # it is considered abandoned and handed to another worker
+    lease_seconds: int = 300
+    # First retry delay; doubles with every further attempt
+    backoff_seconds: float = 10.0
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(
+    kind: str,
+    payload: Type[BaseModel],
+    max_attempts: int = 5,
+    concurrency: Optional[int] = None,
+    lease_seconds: int = 300,
+    backoff_seconds: float = 10.0
+):
+    """
+    Registers a function as the handler for a job kind.
+    The function receives the validated payload model and a JobContext and
+    may be sync (run in a thread) or async. Whatever dict it returns is
+    stored as the job's result; raising schedules a retry.
+    """
+    def decorator(func):
+        if kind in _handlers:
+            raise ValueError(f"Duplicate handler for job kind {kind!r}")
+        _handlers[kind] = JobHandler(
+            kind=kind,
+            func=func,
+            payload_model=payload,
+            max_attempts=max_attempts,
+            concurrency=concurrency,
+            lease_seconds=lease_seconds,
+            backoff_seconds=backoff_seconds
+        )
+        return func
+    return decorator
+
+
+def get_handler(kind: str) -> Optional[JobHandler]:
+    return _handlers.get(kind)
+
+
+def all_handlers() -> Dict[str, JobHandler]:
+    return dict(_handlers)
@@ -1,10 +1,38 @@
 # main.py
 from fastapi import FastAPI
-from routers import advocates, clients, cases, documents, auth
+from routers import advocates, clients, cases, documents, auth, jobs, events, health, batch, storage
+import asyncio
 from fastapi.middleware.cors import CORSMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.read_your_writes import ReadYourWritesMiddleware
+from middleware.rate_limit import RateLimitMiddleware, MemoryBucketStore, PostgresBucketStore, route_classes
+from config import get_settings
+from services.event_bus import event_bus
+from services.result_cache import result_cache
+from services.rendition_service import shutdown_rendition_pool
+from database import engine, replicas
+from utils.db_pool import warm_pool
+from storage import get_storage
+
+settings = get_settings()
 
 app = FastAPI(title="Legal Document Management System")
 
+# Admission control; added before CORS so rejections still carry CORS headers
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        classes=route_classes(settings),
+        store=PostgresBucketStore(engine) if settings.RATE_LIMIT_BACKEND == "postgres" else MemoryBucketStore(),
+        secret_key=settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+        queue_timeout=settings.CONCURRENCY_QUEUE_TIMEOUT_SECONDS,
+    )
+
+# Keeps advocates on the primary right after a write, across workers
+if replicas.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Configure CORS properly 
 app.add_middleware(
     CORSMiddleware,
@@ -13,14 +41,71 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # You can restrict to specific HTTP methods if needed
     allow_headers=["*"],
+    # Let the frontend read pagination cursors, cache validators and backoff hints
+    expose_headers=["ETag", "X-Next-Cursor", "Retry-After", "X-Last-Write"],
 )
 
+# Compress JSON-heavy responses for clients on slow connections
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        levels={
+            "gzip": settings.COMPRESSION_GZIP_LEVEL,
+            "br": settings.COMPRESSION_BROTLI_QUALITY,
+            "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+        },
+        excluded_types=settings.COMPRESSION_EXCLUDED_TYPES.split(","),
+        cpu_budget_ms=settings.COMPRESSION_CPU_BUDGET_MS,
+    )
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(advocates.router, prefix="/advocates", tags=["Advocates"])
 app.include_router(clients.router, prefix="/clients", tags=["Clients"])
 app.include_router(cases.router, prefix="/cases", tags=["Cases"])
 app.include_router(documents.router, prefix="/documents", tags=["Documents"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(events.router, prefix="/events", tags=["Events"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
+app.include_router(batch.router, prefix="/batch", tags=["Batch"])
+app.include_router(storage.router, prefix="/storage", tags=["Storage"])
+
+@app.on_event("startup")
+async def warm_connection_pools():
+    connections = settings.DB_POOL_WARMUP_CONNECTIONS
+    if connections is None:
+        connections = settings.DB_POOL_SIZE
+    if connections <= 0:
+        return
+    engines = [engine] + [replica.engine for replica in replicas.replicas]
+    opened = await asyncio.gather(*(asyncio.to_thread(warm_pool, e, connections) for e in engines))
+    print(f"Warmed database pools with {sum(opened)} connections")
+
+@app.on_event("startup")
+async def start_result_cache():
+    await result_cache.start()
+
+@app.on_event("startup")
+async def clean_up_storage():
+    async def clean_up():
+        try:
+            await get_storage().cleanup()
+        except Exception as e:
+            print(f"Storage cleanup failed: {str(e)}")
+
+    # In the background: listing a large bucket must not hold up startup
+    app.state.storage_cleanup = asyncio.create_task(clean_up())
+
+@app.on_event("shutdown")
+async def stop_listeners():
+    await event_bus.stop()
+    await result_cache.stop()
+
+@app.on_event("shutdown")
+async def close_storage():
+    await get_storage().close()
+    shutdown_rendition_pool()
 
 if __name__ == "__main__":
     import uvicorn
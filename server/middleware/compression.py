@@ -0,0 +1,296 @@
+# middleware/compression.py
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# brotli and zstandard are optional; encodings whose module is missing
+# are simply never negotiated
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Server preference when the client accepts several encodings equally
+PREFERRED_ENCODINGS = ("zstd", "br", "gzip")
+
+# Buffered bodies above this size are compressed in a worker thread
+# (zlib, brotli and zstd all release the GIL) instead of on the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+class _Encoder:
+    """
+    Incremental compressor with a common interface for all encodings.
+    compress(flush=True) emits everything written so far, which is what
+    lets a StreamingResponse deliver each chunk without waiting for the end.
+    """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            # wbits=31 selects the gzip container
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "gzip":
+            out = self._compressor.compress(data)
+            return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+        if self.encoding == "br":
+            out = self._compressor.process(data)
+            return out + self._compressor.flush() if flush else out
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+    def oneshot(self, data: bytes) -> bytes:
+        return self.compress(data) + self.finish()
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order"""
+    modules = {"zstd": zstandard, "br": brotli, "gzip": zlib}
+    return [name for name in PREFERRED_ENCODINGS if modules[name] is not None]
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """
+    Picks the encoding with the highest q-value from the Accept-Encoding header,
+    breaking ties by server preference. Returns None for identity.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli/zstd response compression.
+
+    Buffered responses are compressed in one shot when they are above the
+    minimum size and within the CPU budget. Streaming responses are compressed
+    incrementally, flushing after every chunk. Already-compressed content
+    types, responses that already carry a Content-Encoding, partial (206 or
+    Content-Range) responses, Cache-Control: no-transform and 204/304
+    responses pass through untouched. Every response that could be
+    compressed for some client carries Vary: Accept-Encoding, whether or not
+    this one was, so shared caches don't serve one encoding to another client.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: Optional[Dict[str, int]] = None,
+        excluded_types: Iterable[str] = (),
+        cpu_budget_ms: int = 0
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+        self.excluded_types = tuple(t.strip().lower() for t in excluded_types if t.strip())
+        self.cpu_budget_ms = cpu_budget_ms
+        self.available = available_encodings()
+        # Observed compression throughput in bytes per second, per encoding;
+        # used to estimate whether a body fits in the CPU budget
+        self.throughput: Dict[str, float] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.available)
+        if encoding is None or scope["method"] == "HEAD":
+            async def send_with_vary(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    self.add_vary(message)
+                await send(message)
+
+            await self.app(scope, receive, send_with_vary)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def add_vary(self, start_message: Message) -> None:
+        """Adds Vary: Accept-Encoding when the response is one this middleware compresses"""
+        headers = MutableHeaders(scope=start_message)
+        if start_message["status"] == 204 or "content-encoding" in headers:
+            return
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return
+        if not self.is_excluded(headers.get("content-type", "")):
+            headers.add_vary_header("Accept-Encoding")
+
+    def is_excluded(self, content_type: str) -> bool:
+        content_type = content_type.split(";", 1)[0].strip().lower()
+        for excluded in self.excluded_types:
+            if excluded.endswith("/") and content_type.startswith(excluded):
+                return True
+            if content_type == excluded:
+                return True
+        return False
+
+    def within_budget(self, encoding: str, size: int) -> bool:
+        if not self.cpu_budget_ms or encoding not in self.throughput:
+            return True
+        estimated_ms = size / self.throughput[encoding] * 1000
+        return estimated_ms <= self.cpu_budget_ms
+
+    def record(self, encoding: str, size: int, elapsed: float) -> None:
+        if elapsed <= 0 or size < self.minimum_size:
+            return
+        observed = size / elapsed
+        previous = self.throughput.get(encoding)
+        # Exponentially weighted so the estimate follows load changes
+        self.throughput[encoding] = observed if previous is None else previous * 0.8 + observed * 0.2
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send_downstream = send
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            self.middleware.add_vary(message)
+            self.start_message = message
+            return
+
+        if self.passthrough:
+            await self.send_downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            # The start message is only released once the first body decides
+            # on compression, so until then nothing else may pass
+            if self.start_message is None:
+                await self.send_downstream(message)
+            elif message_type != "http.response.body":
+                # e.g. http.response.pathsend for zero-copy file responses
+                await self._flush_start()
+                self.passthrough = True
+                await self.send_downstream(message)
+            else:
+                await self._first_body(body, more_body)
+            return
+
+        chunk = self.encoder.compress(body, flush=more_body)
+        if not more_body:
+            chunk += self.encoder.finish()
+        await self.send_downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _flush_start(self) -> None:
+        if self.start_message is not None:
+            message, self.start_message = self.start_message, None
+            await self.send_downstream(message)
+
+    def _should_skip(self, headers: MutableHeaders) -> bool:
+        if self.start_message["status"] in (204, 206, 304):
+            return True
+        if "content-encoding" in headers:
+            return True
+        # Content-Range counts bytes of the unencoded representation
+        if "content-range" in headers:
+            return True
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return True
+        return self.middleware.is_excluded(headers.get("content-type", ""))
+
+    async def _first_body(self, body: bytes, more_body: bool) -> None:
+        middleware = self.middleware
+        headers = MutableHeaders(raw=self.start_message["headers"])
+
+        if self._should_skip(headers):
+            await self._send_plain(body, more_body)
+            return
+
+        if not more_body:
+            if len(body) < middleware.minimum_size or not middleware.within_budget(self.encoding, len(body)):
+                await self._send_plain(body, more_body)
+                return
+
+            encoder = _Encoder(self.encoding, middleware.levels[self.encoding])
+            started = time.perf_counter()
+            if len(body) > THREAD_THRESHOLD:
+                compressed = await anyio.to_thread.run_sync(encoder.oneshot, body)
+            else:
+                compressed = encoder.oneshot(body)
+            middleware.record(self.encoding, len(body), time.perf_counter() - started)
+
+            if len(compressed) >= len(body):
+                await self._send_plain(body, more_body)
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(compressed))
+            await self._flush_start()
+            await self.send_downstream({"type": "http.response.body", "body": compressed, "more_body": False})
+            return
+
+        # Streaming: honour the threshold when the length is declared up front
+        declared = headers.get("content-length")
+        if declared is not None and int(declared) < middleware.minimum_size:
+            await self._send_plain(body, more_body)
+            return
+
+        self.encoder = _Encoder(self.encoding, middleware.levels[self.encoding])
+        headers["Content-Encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        await self._flush_start()
+        await self.send_downstream({
+            "type": "http.response.body",
+            "body": self.encoder.compress(body, flush=True),
+            "more_body": True
+        })
+
+    async def _send_plain(self, body: bytes, more_body: bool) -> None:
+        self.passthrough = True
+        await self._flush_start()
+        await self.send_downstream({"type": "http.response.body", "body": body, "more_body": more_body})
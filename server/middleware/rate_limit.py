@@ -0,0 +1,265 @@
+# middleware/rate_limit.py
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from jose import JWTError, jwt
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Endpoints that hash passwords with bcrypt
+AUTH_PATHS = {"/auth/token", "/advocates", "/advocates/", "/advocates/signup"}
+
+UPLOAD_PATHS = {"/documents/upload", "/documents/upload/", "/documents/upload/batch", "/clients/import"}
+UPLOAD_PATTERN = re.compile(r"/documents/[^/]+/versions/?")
+
+COURT_PATHS = {"/cases/fetch-court-details", "/cases/onboard"}
+
+# Probes must keep working while the API sheds load
+EXEMPT_PREFIXES = ("/health",)
+
+# Set on every limited request so POST /batch can limit its sub-requests,
+# which run through the router directly rather than this middleware
+LIMITER_SCOPE_KEY = "lex.rate_limiter"
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class a request is limited under, or None when it is exempt"""
+    if method == "OPTIONS" or any(path.startswith(prefix) for prefix in EXEMPT_PREFIXES):
+        return None
+    if method == "POST" and path in AUTH_PATHS:
+        return "auth"
+    if method == "POST" and (path in UPLOAD_PATHS or UPLOAD_PATTERN.fullmatch(path)):
+        return "upload"
+    if path in COURT_PATHS:
+        return "court"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class ConcurrencyLimit:
+    """Caps how many requests of a class run at once in this worker"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+@dataclass
+class RouteClass:
+    name: str
+    rate: float  # Tokens added per second
+    burst: int
+    global_rate: Optional[float] = None  # Shared by all callers, e.g. an upstream API quota
+    concurrency: Optional[ConcurrencyLimit] = None
+
+
+def route_classes(settings) -> Dict[str, RouteClass]:
+    def limit(value: int) -> Optional[ConcurrencyLimit]:
+        return ConcurrencyLimit(value) if value > 0 else None
+
+    return {
+        "read": RouteClass("read", settings.RATE_LIMIT_READ_PER_MINUTE / 60, settings.RATE_LIMIT_READ_BURST),
+        "write": RouteClass("write", settings.RATE_LIMIT_WRITE_PER_MINUTE / 60, settings.RATE_LIMIT_WRITE_BURST),
+        "auth": RouteClass(
+            "auth", settings.RATE_LIMIT_AUTH_PER_MINUTE / 60, settings.RATE_LIMIT_AUTH_BURST,
+            concurrency=limit(settings.CONCURRENCY_AUTH_LIMIT)
+        ),
+        "upload": RouteClass(
+            "upload", settings.RATE_LIMIT_UPLOAD_PER_MINUTE / 60, settings.RATE_LIMIT_UPLOAD_BURST,
+            concurrency=limit(settings.CONCURRENCY_UPLOAD_LIMIT)
+        ),
+        "court": RouteClass(
+            "court", settings.RATE_LIMIT_COURT_PER_MINUTE / 60, settings.RATE_LIMIT_COURT_BURST,
+            global_rate=settings.RATE_LIMIT_COURT_GLOBAL_PER_MINUTE / 60
+        ),
+    }
+
+
+class MemoryBucketStore:
+    """
+    Token buckets in this process. With several workers each one enforces
+    the limits separately.
+    """
+
+    # Buckets idle this long are full again for any sensible rate
+    IDLE_SECONDS = 3600
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        """Takes cost tokens; returns 0 when allowed, else seconds until they are available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(burst), now]
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            return 0.0
+        bucket[0] = tokens
+        return (cost - tokens) / rate
+
+    def _prune(self, now: float) -> None:
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated > self.IDLE_SECONDS]
+        for key in idle:
+            del self._buckets[key]
+
+
+# Refill and take in one statement; SET expressions see the row as it was
+TAKE_SQL = text("""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, allowed, updated_at)
+    VALUES (:key, :burst - :cost, true, now())
+    ON CONFLICT (key) DO UPDATE SET
+        allowed = least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate) >= :cost,
+        tokens = least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate)
+            - CASE WHEN least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate) >= :cost
+                   THEN :cost ELSE 0 END,
+        updated_at = now()
+    RETURNING allowed, tokens
+""")
+
+PRUNE_SQL = text("DELETE FROM rate_limit_buckets WHERE updated_at < now() - make_interval(secs => :idle)")
+
+
+class PostgresBucketStore:
+    """
+    Token buckets in the rate_limit_buckets table, so the limits hold across
+    all workers and hosts. Costs one short statement per limited request.
+    When the database cannot be reached requests are let through: the
+    limiter must not turn a database blip into an outage of its own.
+    """
+
+    IDLE_SECONDS = 3600
+    PRUNE_INTERVAL_SECONDS = 600
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._pruned_at = time.monotonic()
+
+    def _take(self, key: str, rate: float, burst: int, cost: float) -> float:
+        with self.engine.begin() as connection:
+            allowed, tokens = connection.execute(
+                TAKE_SQL, {"key": key, "rate": rate, "burst": burst, "cost": cost}
+            ).one()
+            if time.monotonic() - self._pruned_at > self.PRUNE_INTERVAL_SECONDS:
+                self._pruned_at = time.monotonic()
+                connection.execute(PRUNE_SQL, {"idle": self.IDLE_SECONDS})
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        try:
+            return await asyncio.to_thread(self._take, key, rate, burst, cost)
+        except Exception as e:
+            print(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket rate limits per caller and route class, plus per-worker
+    concurrency caps for expensive classes.
+
+    Callers are identified by the advocate in their bearer token and fall
+    back to the client address (run uvicorn with --proxy-headers behind a
+    proxy). A caller over its rate gets 429; a request that cannot get a
+    concurrency slot within queue_timeout gets 503. Both carry Retry-After.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        classes: Dict[str, RouteClass],
+        store,
+        secret_key: str,
+        algorithm: str,
+        queue_timeout: float = 2.0,
+    ):
+        self.app = app
+        self.classes = classes
+        self.store = store
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.queue_timeout = queue_timeout
+
+    def wrap(self, app: ASGIApp) -> "RateLimitMiddleware":
+        """The same limits, buckets and slots, in front of another app"""
+        return RateLimitMiddleware(app, self.classes, self.store, self.secret_key, self.algorithm, self.queue_timeout)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        scope[LIMITER_SCOPE_KEY] = self
+        route_class = self.classes.get(classify(scope["method"], scope["path"]))
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.store.take(f"{route_class.name}:{self._caller(scope)}", route_class.rate, route_class.burst)
+        if not retry_after and route_class.global_rate:
+            retry_after = await self.store.take(f"{route_class.name}:*", route_class.global_rate, route_class.burst)
+        if retry_after:
+            await self._reject(scope, receive, send, 429, "Too many requests, slow down", retry_after)
+            return
+
+        limit = route_class.concurrency
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        if not await limit.acquire(self.queue_timeout):
+            await self._reject(scope, receive, send, 503, "Server busy, try again shortly", 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+    def _caller(self, scope: Scope) -> str:
+        token = None
+        authorization = Headers(scope=scope).get("authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+        else:
+            # Event streams pass the token in the query string
+            token = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("access_token", [None])[0]
+        if token:
+            try:
+                advocate_id = jwt.decode(token, self.secret_key, algorithms=[self.algorithm]).get("sub")
+                if advocate_id:
+                    return f"advocate:{advocate_id}"
+            except JWTError:
+                pass
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str, retry_after: float) -> None:
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
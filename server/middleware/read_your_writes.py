@@ -0,0 +1,40 @@
+# middleware/read_your_writes.py
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import WRITE_COOKIE, WRITE_HEADER, request_writes, write_cookie_max_age
+
+
+class ReadYourWritesMiddleware:
+    """
+    Hands the time of a request's committed write back to the client, as a
+    short-lived cookie and an X-Last-Write header. The client sends it with
+    its next requests, so any worker or host keeps it on the primary until
+    the replicas have caught up (see get_read_db).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        writes: dict = {}
+        token = request_writes.set(writes)
+
+        async def send_with_write_time(message: Message) -> None:
+            if message["type"] == "http.response.start" and "at" in writes:
+                at = f"{writes['at']:.3f}"
+                headers = MutableHeaders(scope=message)
+                headers.append(WRITE_HEADER, at)
+                headers.append(
+                    "Set-Cookie",
+                    f"{WRITE_COOKIE}={at}; Max-Age={write_cookie_max_age()}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_write_time)
+        finally:
+            request_writes.reset(token)
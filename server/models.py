@@ -1,10 +1,13 @@
 # models.py
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, ForeignKey, Enum, Text, BigInteger
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, Float, Boolean, DateTime, ForeignKey, Enum, Text, BigInteger, Index,
+    LargeBinary
+)
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 from pydantic import BaseModel, EmailStr, UUID4, Field
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Any, Literal
 from datetime import datetime
 import enum
 import uuid
@@ -72,6 +75,32 @@ class Client(Base, TimestampMixin):
     
     cases = relationship("Case", back_populates="client")
 
+    __table_args__ = (
+        # Keyset pagination of the client list
+        Index('ix_clients_full_name_id', 'full_name', 'id'),
+        # Trigram indexes for typeahead (requires the pg_trgm extension)
+        Index('ix_clients_full_name_trgm', 'full_name',
+              postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}),
+        Index('ix_clients_email_trgm', 'email',
+              postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('ix_clients_company_name_trgm', 'company_name',
+              postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'}),
+    )
+
+class AdvocateClient(Base, TimestampMixin):
+    """
+    Explicit link between an advocate and a client they work with.
+    Clients are visible to an advocate through this link or through a case.
+    """
+    __tablename__ = 'advocate_clients'
+
+    advocate_id = Column(UUID(as_uuid=True), ForeignKey('advocates.id', ondelete='CASCADE'), primary_key=True)
+    client_id = Column(UUID(as_uuid=True), ForeignKey('clients.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_advocate_clients_client_id', 'client_id'),
+    )
+
 # Pydantic models for Client API
 class ClientBase(BaseModel):
     email: EmailStr
@@ -99,6 +128,23 @@ class ClientResponse(ClientBase):
     class Config:
         from_attributes = True
 
+class ClientSuggestion(BaseModel):
+    id: UUID4
+    full_name: str
+    email: EmailStr
+    company_name: Optional[str] = None
+
+class ClientImportRowError(BaseModel):
+    row: int  # Spreadsheet row number, the header being row 1
+    email: Optional[str] = None
+    errors: List[str]
+
+class ClientImportResult(BaseModel):
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ClientImportRowError]
+
 class CaseStatus(enum.Enum):
     DRAFT = "draft"
     ACTIVE = "active"
@@ -130,6 +176,12 @@ class Case(Base, TimestampMixin):
     client = relationship("Client", back_populates="cases")
     documents = relationship("Document", back_populates="case")
 
+    __table_args__ = (
+        # Every case query is scoped by advocate; client_id makes the
+        # advocate -> clients lookup index-only
+        Index('ix_cases_advocate_id_client_id', 'advocate_id', 'client_id'),
+    )
+
 # Pydantic models for Case API
 class CaseBase(BaseModel):
     title: str
@@ -157,11 +209,27 @@ class CaseUpdate(BaseModel):
     status: Optional[CaseStatus] = None
     case_metadata: Optional[Dict] = None  # Changed from metadata
 
-class CaseResponse(CaseBase):
+class CaseOnboardRequest(BaseModel):
+    cnrs: List[str] = Field(min_length=1)
+    client_id: UUID4  # Client every onboarded case is filed under
+
+class CaseResponse(BaseModel):
+    # Exactly the columns of the cases table; title, case_number and status
+    # are not stored, so they are not part of the response
     id: UUID4
     advocate_id: UUID4
     client_id: UUID4
-    status: CaseStatus
+    cnr: Optional[str] = None
+    court_case_title: Optional[str] = None
+    court_case_type: Optional[str] = None
+    filing_number: Optional[str] = None
+    registration_number: Optional[str] = None
+    court_status: Optional[Dict] = Field(default_factory=dict)
+    parties_details: Optional[Dict] = Field(default_factory=dict)
+    acts_sections: Optional[Dict] = Field(default_factory=dict)
+    fir_details: Optional[Dict] = Field(default_factory=dict)
+    court_history: Optional[List] = Field(default_factory=list)
+    case_metadata: Optional[Dict] = Field(default_factory=dict)
     created_at: datetime
     updated_at: datetime
 
@@ -224,4 +292,196 @@ class DocumentResponse(DocumentBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class DocumentUploadResult(BaseModel):
+    filename: str
+    document: Optional[DocumentResponse] = None  # Set when the file was stored
+    error: Optional[str] = None
+
+class DocumentBatchUploadResult(BaseModel):
+    uploaded: int
+    failed: int
+    results: List[DocumentUploadResult]  # One per file, in request order
+
+class DocumentVersionStorage(enum.Enum):
+    SNAPSHOT = "snapshot"  # Stored whole
+    DELTA = "delta"  # Stored as a binary delta against the previous version
+
+class DocumentVersion(Base):
+    """
+    One revision of a document. The current content is always also kept
+    whole at Document.s3_path; older revisions are rebuilt from the
+    nearest snapshot and the deltas after it.
+    """
+    __tablename__ = 'document_versions'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), nullable=False)
+    version = Column(Integer, nullable=False)  # 1 for the original upload
+    storage = Column(Enum(DocumentVersionStorage), nullable=False)
+    storage_path = Column(String, nullable=False)  # The content for snapshots, the delta otherwise
+    stored_size = Column(BigInteger, nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    content_hash = Column(String(64), nullable=False)  # SHA-256 of the content
+    original_filename = Column(String, nullable=False)
+    mime_type = Column(String)
+    comment = Column(Text)
+    created_by = Column(UUID(as_uuid=True), ForeignKey('advocates.id', ondelete='SET NULL'))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index('ix_document_versions_document_id_version', 'document_id', 'version', unique=True),
+    )
+
+class DocumentVersionResponse(BaseModel):
+    id: UUID4
+    version: int
+    storage: DocumentVersionStorage
+    stored_size: int
+    file_size: int
+    content_hash: str
+    original_filename: str
+    mime_type: Optional[str]
+    comment: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SimilarDocument(BaseModel):
+    document: DocumentResponse
+    similarity: float  # Estimated share of text the two documents have in common, 0 to 1
+
+class DocumentSignature(Base):
+    """MinHash signature of a document's text, for finding near-duplicates"""
+    __tablename__ = 'document_signatures'
+
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True)
+    scheme = Column(SmallInteger, nullable=False)  # utils.minhash.SCHEME it was computed with
+    signature = Column(LargeBinary)  # Null when the document has too little text
+    shingle_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+
+class DocumentLshBucket(Base):
+    """LSH index over document signatures: one row per band of each signature"""
+    __tablename__ = 'document_lsh_buckets'
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        # Rows are replaced by document, and removed with it
+        Index('ix_document_lsh_buckets_document_id', 'document_id'),
+    )
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    DEAD = "dead"  # Gave up after max_attempts; kept for inspection and manual retry
+
+class Job(Base, TimestampMixin):
+    __tablename__ = 'jobs'
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String(100), nullable=False)
+    # Advocate the job was enqueued for, so they can poll its status
+    advocate_id = Column(UUID(as_uuid=True), ForeignKey('advocates.id', ondelete='CASCADE'))
+    payload = Column(JSONB, nullable=False, default={})
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    priority = Column(Integer, nullable=False, default=100)  # Lower runs first
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    locked_by = Column(String(255))
+    locked_until = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    result = Column(JSONB)
+
+    __table_args__ = (
+        # Workers only ever scan queued jobs that are due
+        Index('ix_jobs_queued', 'priority', 'run_at',
+              postgresql_where=(status == JobStatus.QUEUED)),
+        Index('ix_jobs_running_kind', 'kind',
+              postgresql_where=(status == JobStatus.RUNNING)),
+    )
+
+class JobResponse(BaseModel):
+    id: UUID4
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    result: Optional[Dict] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CaseBundleRequest(BaseModel):
+    document_ids: List[UUID4] = Field(min_length=1)  # In bundle order
+    title: Optional[str] = Field(default=None, max_length=200)
+
+class CaseBundleResponse(BaseModel):
+    cached: bool
+    document: Optional[DocumentResponse] = None  # Set when an identical bundle was already built
+    job: Optional[JobResponse] = None  # Otherwise the job compiling it
+
+class RateLimitBucket(Base):
+    """Token buckets shared by all API workers (RATE_LIMIT_BACKEND=postgres)"""
+    __tablename__ = 'rate_limit_buckets'
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    allowed = Column(Boolean, nullable=False)  # Outcome of the latest take
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+
+    # Losing the buckets in a crash only resets the limits, so skip the WAL
+    __table_args__ = {'prefixes': ['UNLOGGED']}
+
+class IdempotencyStatus(enum.Enum):
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+class IdempotencyKey(Base, TimestampMixin):
+    """Outcome of a request sent with an Idempotency-Key header, for replaying retries"""
+    __tablename__ = 'idempotency_keys'
+
+    advocate_id = Column(UUID(as_uuid=True), ForeignKey('advocates.id', ondelete='CASCADE'), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # Hash of the endpoint and request parameters; a key may not be reused for another request
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(Enum(IdempotencyStatus), nullable=False, default=IdempotencyStatus.IN_PROGRESS)
+    # An in-progress claim past this time belongs to a request that died
+    locked_until = Column(DateTime(timezone=True))
+    response_status = Column(Integer)
+    response_body = Column(JSONB)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None  # Echoed back so the caller can match responses
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., pattern=r"^/")  # Including any query string
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+class BatchItemResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResponse]
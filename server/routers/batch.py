@@ -0,0 +1,193 @@
+# routers/batch.py
+import json
+import re
+from dataclasses import dataclass
+from typing import List
+from urllib.parse import unquote
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from starlette.middleware.exceptions import ExceptionMiddleware
+from auth import get_current_advocate
+from config import get_settings
+from database import get_db, BATCH_SCOPE_KEY
+from middleware.rate_limit import LIMITER_SCOPE_KEY
+from models import Advocate, BatchItem, BatchRequest, BatchItemResponse, BatchResponse
+
+router = APIRouter()
+settings = get_settings()
+
+# Streams, batches, probes and logins make no sense inside a batch, and
+# uploads take multipart bodies while a sub-request's body is always JSON
+EXCLUDED_PREFIXES = ("/batch", "/events", "/health", "/auth", "/documents/upload", "/clients/import")
+VERSION_UPLOAD = re.compile(r"^/documents/[^/]+/versions/?$")
+
+# Request headers passed through to sub-requests
+FORWARDED_HEADERS = {"if-none-match", "if-match", "idempotency-key"}
+
+# Response headers not worth echoing per item
+DROPPED_HEADERS = {"content-length", "content-type", "content-encoding", "vary"}
+
+
+@dataclass
+class BatchContext:
+    db: Session
+    advocate: Advocate
+
+
+def item_cost(item: BatchItem) -> int:
+    return 1 if item.method == "GET" else settings.BATCH_WRITE_COST
+
+
+class SubRequest:
+    """Runs one batch item through the app's routes in-process"""
+
+    def __init__(self, request: Request, item: BatchItem, context: BatchContext):
+        self.item = item
+        path, _, query = item.path.partition("?")
+        parent = request.scope
+        headers = [(b"content-type", b"application/json"), (b"accept", b"application/json")]
+        authorization = request.headers.get("authorization")
+        if authorization:
+            headers.append((b"authorization", authorization.encode("latin-1")))
+        for name, value in item.headers.items():
+            if name.lower() in FORWARDED_HEADERS:
+                headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+
+        self.scope = {
+            "type": "http",
+            "asgi": parent.get("asgi", {"version": "3.0"}),
+            "http_version": parent.get("http_version", "1.1"),
+            "method": item.method,
+            "scheme": parent.get("scheme", "http"),
+            "server": parent.get("server"),
+            "client": parent.get("client"),
+            "root_path": parent.get("root_path", ""),
+            "path": unquote(path),
+            "raw_path": path.encode("latin-1"),
+            "query_string": query.encode("latin-1"),
+            "headers": headers,
+            "app": parent["app"],
+            "state": {},
+            BATCH_SCOPE_KEY: context,
+        }
+        self.body = b"" if item.body is None else json.dumps(item.body).encode()
+
+    @property
+    def excluded(self) -> bool:
+        path = self.scope["path"]
+        if self.item.method == "POST" and VERSION_UPLOAD.match(path):
+            return True
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in EXCLUDED_PREFIXES)
+
+    async def run(self, handler) -> BatchItemResponse:
+        if self.excluded:
+            return self.error(status.HTTP_400_BAD_REQUEST, "This endpoint cannot be batched")
+
+        start = {}
+        chunks: List[bytes] = []
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": self.body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        try:
+            await handler(self.scope, receive, send)
+        except Exception as e:
+            print(f"Error in batched {self.item.method} {self.item.path}: {e}")
+            return self.error(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error")
+
+        headers = {}
+        content_type = ""
+        for name, value in start.get("headers", []):
+            name = name.decode("latin-1").lower()
+            if name == "content-type":
+                content_type = value.decode("latin-1")
+            if name not in DROPPED_HEADERS:
+                headers[name] = value.decode("latin-1")
+
+        raw = b"".join(chunks)
+        if not raw:
+            body = None
+        elif content_type.startswith("application/json"):
+            body = json.loads(raw)
+        elif content_type.startswith("text/"):
+            body = raw.decode("utf-8", errors="replace")
+        else:
+            return self.error(status.HTTP_406_NOT_ACCEPTABLE, "Binary responses cannot be batched")
+
+        return BatchItemResponse(id=self.item.id, status=start.get("status", 500), headers=headers, body=body)
+
+    def error(self, status_code: int, detail: str) -> BatchItemResponse:
+        return BatchItemResponse(id=self.item.id, status=status_code, body={"detail": detail})
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    payload: BatchRequest,
+    request: Request,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Runs several API requests in one round trip.
+    The advocate is authenticated once and all items share one database
+    session. The session's queries are synchronous, so items run one at a
+    time, in order, each in its own transaction. Each item gets its own
+    status, headers and JSON body, and a failing item does not affect the
+    others; an item that fails with a 5xx is rolled back. Items count
+    against the rate limits of their own route class.
+    """
+    items = payload.requests
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests"
+        )
+    cost = sum(item_cost(item) for item in items)
+    if cost > settings.BATCH_MAX_COST:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch cost {cost} exceeds the limit of {settings.BATCH_MAX_COST}"
+        )
+
+    # Committing between items must not expire the shared advocate
+    db.expire_on_commit = False
+    context = BatchContext(db=db, advocate=current_advocate)
+    handler = ExceptionMiddleware(request.app.router, handlers=request.app.exception_handlers)
+    limiter = request.scope.get(LIMITER_SCOPE_KEY)
+    if limiter is not None:
+        # Each item is charged to its own route class, as if sent on its own
+        handler = limiter.wrap(handler)
+
+    def finish(sub_request: SubRequest, result: BatchItemResponse) -> BatchItemResponse:
+        # Ends the item's transaction, so transaction-scoped settings such
+        # as SET LOCAL statement_timeout don't leak into the next item. As
+        # outside a batch, a failed item's flushed writes are rolled back
+        # rather than committed.
+        if result.status >= 500:
+            db.rollback()
+            return result
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error committing batch item: {e}")
+            return sub_request.error(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal Server Error")
+        return result
+
+    responses: List[BatchItemResponse] = []
+    for item in items:
+        sub_request = SubRequest(request, item, context)
+        responses.append(finish(sub_request, await sub_request.run(handler)))
+
+    return BatchResponse(responses=responses)
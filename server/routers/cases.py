@@ -1,10 +1,28 @@
 # routers/cases.py
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Response
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
-from models import Case, CaseStatus, CaseCreate, CaseUpdate, CaseResponse, Client
-from auth import get_current_advocate  # Added this import
+from models import (
+    Case, CaseStatus, CaseCreate, CaseUpdate, CaseResponse, CaseOnboardRequest, Client, JobResponse,
+    CaseBundleRequest, CaseBundleResponse, Document
+)
+from auth import get_current_advocate, get_read_db  # Added this import
+from utils.etag import (
+    collection_etag, collection_etag_from_rows, resource_etag, resource_etag_from_row,
+    is_conditional, etag_matches, set_etag, not_modified
+)
+from utils.serialization import FastJSONResponse, project
+from services.event_bus import publish
+from services.result_cache import result_cache
+from services.access_service import AccessService
+from services.court_service import court_type_for
+from jobs import enqueue
+from jobs.handlers import COMPILE_CASE_BUNDLE, ONBOARD_CASES, CompileCaseBundle, OnboardCases
+from services.case_bundle_service import bundle_input_hash, find_bundle, find_bundle_job
+from utils.renditions import can_render
+from routers.clients import is_visible_client
 import uuid
 from datetime import datetime
 from pydantic import BaseModel
@@ -26,26 +44,52 @@ class CaseCreateWithOptionalClient(BaseModel):
 
 # Create the router object that FastAPI will use
 router = APIRouter()
+access_service = AccessService()
 @router.get("/", response_model=List[CaseResponse])
 async def list_cases(
+    request: Request,
     current_advocate = Depends(get_current_advocate),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     status: Optional[CaseStatus] = None
 ):
     """
     Lists all cases for the current advocate.
     Optionally filters cases by their status.
+    Supports If-None-Match so unchanged lists come back as an empty 304.
+    Rows are projected to dicts and encoded directly, without building ORM
+    objects or re-validating them against CaseResponse.
+    Responses are cached per advocate until a case changes or the TTL ends.
     """
+    params = (status.name if status else None,)
+    cached = result_cache.lookup(current_advocate.id, "cases", params)
+    if cached is not None:
+        return cached.respond(request)
+    epoch = result_cache.begin()
+    
     query = db.query(Case).filter(Case.advocate_id == current_advocate.id)
     
     if status:
         query = query.filter(Case.status == status)
     
-    return query.all()
+    if is_conditional(request):
+        etag = collection_etag(query, Case)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        cases = project(query, Case, CaseResponse)
+    else:
+        cases = project(query, Case, CaseResponse)
+        etag = collection_etag_from_rows(cases, Case)
+    
+    result = FastJSONResponse(cases)
+    set_etag(result, etag)
+    result_cache.store(epoch, current_advocate.id, "cases", result, params, db=db)
+    return result
 
 @router.get("/{case_id}", response_model=CaseResponse)
 async def get_case(
     case_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
@@ -53,10 +97,17 @@ async def get_case(
     Retrieves a specific case by its ID.
     Advocates can only access cases they are assigned to.
     """
-    case = db.query(Case).filter(
+    query = db.query(Case).filter(
         Case.id == case_id,
         Case.advocate_id == current_advocate.id
-    ).first()
+    )
+    
+    if is_conditional(request):
+        etag = resource_etag(query, Case)
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
+    
+    case = query.first()
     
     if not case:
         raise HTTPException(
@@ -64,25 +115,9 @@ async def get_case(
             detail="Case not found or you don't have access to it"
         )
     
+    set_etag(response, resource_etag_from_row(case, Case))
     return case
 
-@router.get("/", response_model=List[CaseResponse])
-async def list_cases(
-    current_advocate = Depends(get_current_advocate),
-    db: Session = Depends(get_db),
-    status: Optional[CaseStatus] = None
-):
-    """
-    Lists all cases for the current advocate.
-    Optionally filters cases by their status.
-    """
-    query = db.query(Case).filter(Case.advocate_id == current_advocate.id)
-    
-    if status:
-        query = query.filter(Case.status == status)
-    
-    return query.all()
-
 @router.put("/{case_id}", response_model=CaseResponse)
 async def update_case(
     case_id: uuid.UUID,
@@ -94,32 +129,162 @@ async def update_case(
     Updates an existing case.
     Advocates can only update cases they are assigned to.
     """
-    case = db.query(Case).filter(
-        Case.id == case_id,
-        Case.advocate_id == current_advocate.id
-    ).first()
+    # Only fields stored on the case are written
+    changes = {
+        field: value for field, value in update_data.dict(exclude_unset=True).items()
+        if field in Case.__table__.c
+    }
+    case_filter = (Case.id == case_id, Case.advocate_id == current_advocate.id)
+    
+    try:
+        if changes:
+            # One round trip: the access check is part of the UPDATE, which returns the new row
+            case = db.execute(
+                update(Case.__table__)
+                .where(*case_filter)
+                .values(**changes)
+                .returning(*Case.__table__.c)
+            ).one_or_none()
+            if case:
+                publish(db, current_advocate.id, "case.updated", {
+                    "case_id": case.id,
+                    "fields": sorted(changes)
+                })
+                result_cache.invalidate(db, current_advocate.id, "cases")
+            db.commit()
+        else:
+            case = db.query(Case).filter(*case_filter).first()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not update case: {str(e)}"
+        )
     
     if not case:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Case not found or you don't have access to it"
         )
+    return case
+
+@router.post("/onboard", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def onboard_cases(
+    payload: CaseOnboardRequest,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Creates cases for a list of CNR numbers, all filed under one client.
+    Court details are fetched and the cases inserted by a background job;
+    poll GET /jobs/{id} for per-CNR progress and the final outcome.
+    CNRs the advocate already has a case for are reported and skipped.
+    """
+    # CNRs are alphanumeric and case-insensitive; drop blanks and duplicates
+    cnrs = list(dict.fromkeys(cnr.strip().upper() for cnr in payload.cnrs if cnr.strip()))
+    if not cnrs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one CNR number is required"
+        )
+    settings = get_settings()
+    if len(cnrs) > settings.CASE_ONBOARD_MAX_CNRS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.CASE_ONBOARD_MAX_CNRS} CNR numbers can be onboarded at once"
+        )
+    client = db.query(Client.id).filter(
+        Client.id == payload.client_id,
+        is_visible_client(current_advocate.id)
+    ).first()
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
     
-    # Update case fields from the request data
-    for field, value in update_data.dict(exclude_unset=True).items():
-        setattr(case, field, value)
-    
-    try:
-        db.commit()
-        db.refresh(case)
-        return case
-    except Exception as e:
-        db.rollback()
+    job = enqueue(
+        db,
+        ONBOARD_CASES,
+        OnboardCases(advocate_id=current_advocate.id, client_id=payload.client_id, cnrs=cnrs),
+        advocate_id=current_advocate.id
+    )
+    db.commit()
+    return job
+
+@router.post("/{case_id}/bundle", response_model=CaseBundleResponse, status_code=status.HTTP_202_ACCEPTED)
+async def compile_case_bundle(
+    case_id: uuid.UUID,
+    payload: CaseBundleRequest,
+    response: Response,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Combines documents of a case, in the order given, into one PDF with an
+    index page and page numbers running through the whole bundle. The PDF
+    is compiled by a background job and stored as a new document of the
+    case; poll GET /jobs/{id} for its id. Asking again for the same
+    documents, unchanged, in the same order returns the stored bundle
+    straight away (200), or the job already compiling it.
+    """
+    if len(set(payload.document_ids)) != len(payload.document_ids):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not update case: {str(e)}"
+            detail="A document can only appear once in a bundle"
+        )
+    settings = get_settings()
+    if len(payload.document_ids) > settings.CASE_BUNDLE_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.CASE_BUNDLE_MAX_DOCUMENTS} documents can be bundled at once"
+        )
+    access_service.check_case(case_id, current_advocate.id, db)
+
+    by_id = {
+        document.id: document
+        for document in db.query(Document).filter(
+            Document.case_id == case_id,
+            Document.id.in_(payload.document_ids)
+        )
+    }
+    missing = [str(document_id) for document_id in payload.document_ids if document_id not in by_id]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Documents not found in this case: {', '.join(missing)}"
+        )
+    documents = [by_id[document_id] for document_id in payload.document_ids]
+    unsupported = [document.original_filename for document in documents if not can_render(document.mime_type)]
+    if unsupported:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Only PDFs and images can be bundled: {', '.join(unsupported)}"
         )
 
+    title = (payload.title or "").strip() or "Case bundle"
+    input_hash = bundle_input_hash(case_id, title, documents)
+    bundle = find_bundle(db, case_id, input_hash)
+    if bundle is not None:
+        response.status_code = status.HTTP_200_OK
+        return CaseBundleResponse(cached=True, document=bundle)
+    job = find_bundle_job(db, input_hash)
+    if job is None:
+        job = enqueue(
+            db,
+            COMPILE_CASE_BUNDLE,
+            CompileCaseBundle(
+                advocate_id=current_advocate.id,
+                case_id=case_id,
+                document_ids=payload.document_ids,
+                title=title,
+                input_hash=input_hash
+            ),
+            advocate_id=current_advocate.id
+        )
+        db.commit()
+    return CaseBundleResponse(cached=False, job=job)
+
 # Add a new endpoint
 @router.post("/fetch-court-details", response_model=Dict)
 async def fetch_court_details(
@@ -145,16 +310,9 @@ async def fetch_court_details(
             detail="Court API key not configured"
         )
     
-    # Determine court type from CNR
-    court_type = "district-court"  # Default
-    if cnr.startswith("DLHC"):  # Example pattern for High Court
-        court_type = "high-court"
-    elif cnr.startswith("SC"):  # Example pattern for Supreme Court
-        court_type = "supreme-court"
-    
     try:
         response = requests.post(
-            f"https://apis.akshit.net/eciapi/17/{court_type}/case",
+            f"{settings.COURT_API_BASE_URL}/{court_type_for(cnr)}/case",
             json={"cnr": cnr},
             headers={
                 "Content-Type": "application/json",
@@ -1,38 +1,148 @@
 # routers/clients.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request, Response, UploadFile, File, Query
+from sqlalchemy import select, insert, update, or_, tuple_, func, text, literal
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
-from models import Client, ClientCreate, ClientUpdate, ClientResponse, Case  # Import Case here
-from auth import get_current_advocate
+from models import (
+    Client, ClientCreate, ClientUpdate, ClientResponse, ClientSuggestion, ClientImportResult,
+    AdvocateClient, Case
+)
+from auth import get_current_advocate, get_read_db
+from utils.etag import (
+    page_etag_from_rows, resource_etag, resource_etag_from_row,
+    is_conditional, etag_matches, set_etag, not_modified
+)
+from utils.pagination import encode_cursor, decode_cursor, escape_like
+from config import get_settings
+from utils.serialization import FastJSONResponse, project
+from utils.db_errors import raise_integrity_error
+from services.client_import_service import ClientImportService
+from services.result_cache import result_cache
+from services.idempotency_service import IdempotencyService
 import uuid
 
 router = APIRouter()
+client_import_service = ClientImportService()
+idempotency_service = IdempotencyService()
+settings = get_settings()
+
+def is_visible_client(advocate_id: uuid.UUID):
+    """
+    Clients an advocate may see: those explicitly linked to them and those
+    on any of their cases.
+    """
+    linked = select(AdvocateClient.client_id).where(AdvocateClient.advocate_id == advocate_id)
+    through_cases = select(Case.client_id).where(Case.advocate_id == advocate_id)
+    return or_(Client.id.in_(linked), Client.id.in_(through_cases))
+
+def visible_clients(db: Session, advocate_id: uuid.UUID):
+    return db.query(Client).filter(is_visible_client(advocate_id))
 
 @router.get("/", response_model=List[ClientResponse])
 async def list_clients(
+    request: Request,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     current_advocate = Depends(get_current_advocate),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    Lists all clients.
-    In a production system, this would be filtered by advocate or firm.
+    Lists the clients visible to the current advocate, ordered by name.
+    The list is keyset-paginated: when more clients follow, the X-Next-Cursor
+    response header holds the cursor for the next page.
+    Supports If-None-Match so unchanged pages come back as an empty 304.
+    Pages are cached per advocate until a client changes or the TTL ends.
     """
-    # For now, return all clients
-    # In production, you would filter by advocate_id or firm_id
-    clients = db.query(Client).all()
-    return clients
+    params = (cursor, limit)
+    cached = result_cache.lookup(current_advocate.id, "clients", params)
+    if cached is not None:
+        return cached.respond(request)
+    epoch = result_cache.begin()
+    
+    query = visible_clients(db, current_advocate.id).order_by(Client.full_name, Client.id)
+    if cursor:
+        full_name, client_id = decode_cursor(cursor, str, uuid.UUID)
+        query = query.filter(tuple_(Client.full_name, Client.id) > tuple_(full_name, client_id))
+    
+    # One extra row tells us whether there is a next page
+    clients = project(query.limit(limit + 1), Client, ClientResponse)
+    has_next = len(clients) > limit
+    clients = clients[:limit]
+    
+    # Tagged from the page itself, so no query beyond the page's is needed
+    etag = page_etag_from_rows(clients, Client, cursor, limit, has_next)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    result = FastJSONResponse(clients)
+    set_etag(result, etag)
+    if has_next:
+        last = clients[-1]
+        result.headers["X-Next-Cursor"] = encode_cursor(last["full_name"], last["id"])
+    result_cache.store(epoch, current_advocate.id, "clients", result, params, db=db)
+    return result
+
+@router.get("/suggest", response_model=List[ClientSuggestion])
+async def suggest_clients(
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=25),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Typeahead search over the advocate's clients by name, email or company.
+    Matching uses the trigram indexes; names starting with the term rank
+    first, then by name similarity.
+    Called on every keystroke, so the query is cancelled after
+    CLIENT_SUGGEST_TIMEOUT_MS rather than letting slow searches queue up.
+    """
+    term = q.strip()
+    pattern = f"%{escape_like(term)}%"
+    
+    query = visible_clients(db, current_advocate.id).filter(or_(
+        Client.full_name.ilike(pattern, escape="\\"),
+        Client.email.ilike(pattern, escape="\\"),
+        Client.company_name.ilike(pattern, escape="\\")
+    )).order_by(
+        Client.full_name.ilike(f"{escape_like(term)}%", escape="\\").desc(),
+        func.similarity(Client.full_name, term).desc(),
+        Client.full_name
+    ).limit(limit)
+    
+    # SET LOCAL only lasts until the request's transaction ends
+    db.execute(text(f"SET LOCAL statement_timeout = {int(settings.CLIENT_SUGGEST_TIMEOUT_MS)}"))
+    try:
+        suggestions = project(query, Client, ClientSuggestion)
+    except OperationalError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Client search timed out, try a longer search term"
+        )
+    
+    return FastJSONResponse(suggestions)
 
 @router.get("/{client_id}", response_model=ClientResponse)
 async def get_client(
     client_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
     """
     Retrieves a specific client by ID.
     """
-    client = db.query(Client).filter(Client.id == client_id).first()
+    query = visible_clients(db, current_advocate.id).filter(Client.id == client_id)
+    
+    if is_conditional(request):
+        etag = resource_etag(query, Client)
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
+    
+    client = query.first()
     
     if not client:
         raise HTTPException(
@@ -40,37 +150,82 @@ async def get_client(
             detail="Client not found"
         )
     
+    set_etag(response, resource_etag_from_row(client, Client))
     return client
 @router.post("/", response_model=ClientResponse)
 async def create_client(
     client_data: ClientCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
     """
-    Creates a new client.
+    Creates a new client and links it to the current advocate.
+    Both inserts go out as one statement; a duplicate email is reported by
+    the unique constraint.
+    A retry sent with the same Idempotency-Key gets the original client back.
     """
-    # Create a new client
-    client = Client(
-        email=client_data.email,
-        full_name=client_data.full_name,
-        phone=client_data.phone,
-        address=client_data.address,
-        company_name=client_data.company_name,
-        is_active=True
-    )
-    
-    try:
-        db.add(client)
-        db.commit()
-        db.refresh(client)
-        return client
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not create client: {str(e)}"
+    async def create():
+        new_client = (
+            insert(Client.__table__)
+            .values(id=uuid.uuid4(), is_active=True, **client_data.dict())
+            .returning(*Client.__table__.c)
+            .cte("new_client")
+        )
+        link = (
+            insert(AdvocateClient.__table__)
+            .from_select(
+                ["advocate_id", "client_id"],
+                select(literal(current_advocate.id, AdvocateClient.advocate_id.type), new_client.c.id)
+            )
+            .cte("link")
         )
+        
+        try:
+            client = db.execute(select(new_client).add_cte(link)).one()
+            result_cache.invalidate(db, current_advocate.id, "clients")
+            db.commit()
+            return client
+        except IntegrityError as e:
+            db.rollback()
+            raise_integrity_error(e, "Could not create client")
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not create client: {str(e)}"
+            )
+        
+    
+    return await idempotency_service.run(
+        idempotency_key,
+        current_advocate.id,
+        "POST /clients/",
+        client_data.dict(),
+        create,
+        ClientResponse
+    )
+
+@router.post("/import", response_model=ClientImportResult)
+def import_clients(
+    file: UploadFile = File(...),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-imports clients from a CSV or XLSX file with a header row.
+    Valid rows are inserted in batches, all in one transaction, so a failed
+    import keeps nothing; every rejected row is listed in the response with
+    its row number and the reasons.
+    Declared as a plain function so the import runs in the threadpool
+    instead of blocking the event loop.
+    """
+    return client_import_service.import_clients(
+        file=file,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+
 @router.put("/{client_id}", response_model=ClientResponse)
 async def update_client(
     client_id: uuid.UUID,
@@ -81,25 +236,35 @@ async def update_client(
     """
     Updates an existing client.
     """
-    client = db.query(Client).filter(Client.id == client_id).first()
+    values = update_data.dict(exclude_unset=True)
+    if not values:
+        client = visible_clients(db, current_advocate.id).filter(Client.id == client_id).first()
+    else:
+        # The access check is part of the UPDATE, which returns the new row
+        try:
+            client = db.execute(
+                update(Client.__table__)
+                .where(Client.id == client_id, is_visible_client(current_advocate.id))
+                .values(**values)
+                .returning(*Client.__table__.c)
+            ).one_or_none()
+            if client:
+                # Other advocates may see the same client
+                result_cache.invalidate(db, None, "clients")
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise_integrity_error(e, "Could not update client")
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Could not update client: {str(e)}"
+            )
     
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Client not found"
         )
-    
-    # Update client fields from the request data
-    for field, value in update_data.dict(exclude_unset=True).items():
-        setattr(client, field, value)
-    
-    try:
-        db.commit()
-        db.refresh(client)
-        return client
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Could not update client: {str(e)}"
-        )
\ No newline at end of file
+    return client
@@ -1,25 +1,54 @@
 # routers/documents.py
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Header, HTTPException, Query, status, Request, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from database import get_db
-from models import Document, DocumentType, DocumentStatus, Case, DocumentResponse
-from auth import get_current_advocate
+from models import (
+    Document, DocumentType, DocumentStatus, DocumentResponse, DocumentBatchUploadResult, SimilarDocument,
+    DocumentVersionResponse
+)
+from auth import get_current_advocate, get_read_db
+from services.access_service import AccessService
 from services.document_service import DocumentService
+from services.result_cache import result_cache
+from services.idempotency_service import IdempotencyService
+from services.rendition_service import RenditionService
+from services.page_extraction_service import PageExtractionService
+from services.similarity_service import SimilarityService
+from services.document_version_service import DocumentVersionService
+from storage.local import LocalFileResponse
+from utils.http_range import parse_byte_range
+from utils.renditions import CONTENT_TYPE as RENDITION_CONTENT_TYPE
+from utils.pdf_pages import PageRangeError, parse_page_ranges
+from utils.etag import (
+    collection_etag, collection_etag_from_rows, resource_etag_from_row,
+    is_conditional, etag_matches, set_etag, not_modified, make_etag
+)
+from utils.serialization import FastJSONResponse, project
 import uuid
 from config import get_settings
 from fastapi.responses import StreamingResponse, RedirectResponse
 
 router = APIRouter()
+access_service = AccessService()
 document_service = DocumentService()
+idempotency_service = IdempotencyService()
+rendition_service = RenditionService()
+page_extraction_service = PageExtractionService()
+similarity_service = SimilarityService()
+document_version_service = DocumentVersionService()
 settings = get_settings()
 
+# What an empty document list is tagged with, whoever asks
+EMPTY_COLLECTION_ETAG = collection_etag_from_rows([], Document)
+
 @router.post("/upload/", response_model=DocumentResponse)
 async def upload_document(
     file: UploadFile = File(...),
     case_id: uuid.UUID = Form(...),
     document_type: DocumentType = Form(...),
     description: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
@@ -27,39 +56,94 @@ async def upload_document(
     Uploads a new document to the system.
     The document is associated with a specific case and can only be uploaded
     by an authenticated advocate.
+    A retry sent with the same Idempotency-Key gets the original document
+    back instead of storing the file again.
     """
-    # Verify that the advocate has access to this case
-    case = db.query(Case).filter(
-        Case.id == case_id,
-        Case.advocate_id == current_advocate.id
-    ).first()
+    async def upload():
+        try:
+            # The service checks that the advocate has access to this case
+            return await document_service.upload_document(
+                file=file,
+                case_id=case_id,
+                advocate_id=current_advocate.id,
+                document_type=document_type,
+                description=description,
+                db=db
+            )
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error uploading document: {str(e)}"
+            )
     
-    if not case:
+    return await idempotency_service.run(
+        idempotency_key,
+        current_advocate.id,
+        "POST /documents/upload/",
+        {
+            "case_id": case_id,
+            "document_type": document_type.value,
+            "description": description,
+            "filename": file.filename,
+            "size": file.size,
+            "content_type": file.content_type
+        },
+        upload,
+        DocumentResponse
+    )
+
+@router.post("/upload/batch", response_model=DocumentBatchUploadResult)
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    case_id: uuid.UUID = Form(...),
+    document_type: DocumentType = Form(...),
+    description: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Uploads several documents to one case in a single request, all with the
+    same type and description. Files that fail are reported in the results
+    while the rest are still stored.
+    """
+    if len(files) > settings.DOCUMENT_BATCH_MAX_FILES:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Case not found or you don't have access to it"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.DOCUMENT_BATCH_MAX_FILES} files can be uploaded at once"
         )
     
-    try:
-        # Call the document service to handle the upload
-        document = await document_service.upload_document(
-            file=file,
+    async def upload():
+        return await document_service.upload_documents(
+            files=files,
             case_id=case_id,
             advocate_id=current_advocate.id,
             document_type=document_type,
             description=description,
             db=db
         )
-        return document
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error uploading document: {str(e)}"
-        )
+    
+    return await idempotency_service.run(
+        idempotency_key,
+        current_advocate.id,
+        "POST /documents/upload/batch",
+        {
+            "case_id": case_id,
+            "document_type": document_type.value,
+            "description": description,
+            "files": [[file.filename, file.size, file.content_type] for file in files]
+        },
+        upload,
+        DocumentBatchUploadResult
+    )
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
@@ -68,11 +152,17 @@ async def get_document(
     Only accessible to authenticated advocates.
     """
     try:
+        # One query loads the document and checks access; the ETag is
+        # computed from the loaded row, so a 304 costs no extra query
         document = await document_service.get_document(
             document_id=document_id,
             advocate_id=current_advocate.id,
             db=db
         )
+        etag = resource_etag_from_row(document, Document)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return document
     except HTTPException as e:
         # Re-raise HTTP exceptions from the service
@@ -86,28 +176,42 @@ async def get_document(
 @router.get("/case/{case_id}", response_model=List[DocumentResponse])
 async def get_documents_by_case(
     case_id: uuid.UUID,
+    request: Request,
     current_advocate = Depends(get_current_advocate),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Lists all documents associated with a specific case.
     Only accessible to advocates assigned to the case.
+    Lists are cached per advocate and case until a document is added or
+    deleted or the TTL ends; only successful, access-checked lists are cached.
     """
-    # Verify that the advocate has access to this case
-    case = db.query(Case).filter(
-        Case.id == case_id,
-        Case.advocate_id == current_advocate.id
-    ).first()
+    cached = result_cache.lookup(current_advocate.id, "documents", scope=case_id)
+    if cached is not None:
+        return cached.respond(request)
+    epoch = result_cache.begin()
     
-    if not case:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Case not found or you don't have access to it"
-        )
+    # The access check is part of the documents query (or answered by the
+    # case id cache); only an empty result needs the case looked up
+    query = access_service.case_documents(case_id, current_advocate.id, db)
+    
+    if is_conditional(request):
+        etag = collection_etag(query, Document)
+        if etag == EMPTY_COLLECTION_ETAG:
+            access_service.check_case(case_id, current_advocate.id, db)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        documents = project(query, Document, DocumentResponse)
+    else:
+        documents = project(query, Document, DocumentResponse)
+        if not documents:
+            access_service.check_case(case_id, current_advocate.id, db)
+        etag = collection_etag_from_rows(documents, Document)
     
-    # Query documents related to this case
-    documents = db.query(Document).filter(Document.case_id == case_id).all()
-    return documents
+    result = FastJSONResponse(documents)
+    set_etag(result, etag)
+    result_cache.store(epoch, current_advocate.id, "documents", result, scope=case_id, db=db)
+    return result
 
 @router.get("/{document_id}/download")
 async def download_document(
@@ -127,8 +231,8 @@ async def download_document(
             db=db
         )
         
-        # Get a signed URL for the document from Supabase
-        download_url = document_service.generate_download_url(document.s3_path)
+        # Get a signed URL for the document from the storage backend
+        download_url = await document_service.generate_download_url(document.s3_path)
         
         # Return the URL
         return {"url": download_url}
@@ -144,12 +248,16 @@ async def download_document(
 @router.get("/{document_id}/content")
 async def get_document_content(
     document_id: uuid.UUID,
+    request: Request,
     current_advocate = Depends(get_current_advocate),
     db: Session = Depends(get_db)
 ):
     """
     Retrieves the content of a specific document by its ID.
     Only accessible to authenticated advocates.
+    Supports single byte-range requests, so viewers can fetch pages of a
+    large PDF without downloading all of it. Files on the local storage
+    backend are sent straight from disk.
     """
     document = await document_service.get_document(
         document_id=document_id,
@@ -157,18 +265,230 @@ async def get_document_content(
         db=db
     )
     
-    # Get file from Supabase Storage
-    file_content = await document_service.get_document_content(document.s3_path)
+    local_path = document_service.storage.local_path(document.s3_path)
+    if local_path:
+        return LocalFileResponse(
+            local_path,
+            media_type=document.mime_type,
+            filename=document.original_filename,
+            content_disposition_type="inline"
+        )
+    
+    headers = {
+        'Content-Disposition': f'inline; filename="{document.original_filename}"',
+        'Accept-Ranges': 'bytes'
+    }
+    range_header = request.headers.get("range")
+    byte_range = None
+    if range_header:
+        info = await document_service.storage.head(document.s3_path)
+        if info is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document content not found in storage"
+            )
+        byte_range = parse_byte_range(range_header, info.size)
     
-    # Return file with appropriate headers
+    content = await document_service.open_document(document.s3_path, *(byte_range or (0, None)))
+    headers['Content-Length'] = str(content.length)
+    if byte_range:
+        headers['Content-Range'] = f"bytes {content.start}-{content.end}/{content.size}"
     return StreamingResponse(
-        iter([file_content]),
+        content.chunks,
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
         media_type=document.mime_type,
-        headers={
-            'Content-Disposition': f'inline; filename="{document.original_filename}"'
-        }
+        headers=headers
     )
 
+@router.get("/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    document_id: uuid.UUID,
+    request: Request,
+    kind: Literal["thumbnail", "preview"] = Query("thumbnail"),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns a small WebP image of a PDF's first page or of an image:
+    the thumbnail for file lists or the larger preview.
+    Renditions not made yet are generated on the spot. 404 when the
+    document has no rendition, e.g. for Word files.
+    """
+    document = await document_service.get_document(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+    
+    renditions = (document.document_metadata or {}).get("renditions")
+    if renditions is None:
+        renditions = await rendition_service.ensure(document.id)
+    path = renditions.get(kind)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No preview available for this document"
+        )
+    
+    # Rendition paths are derived from the content hash, so they identify the image
+    etag = make_etag(path)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.RENDITION_CACHE_SECONDS}"
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    local_path = document_service.storage.local_path(path)
+    if local_path:
+        return LocalFileResponse(local_path, media_type=RENDITION_CONTENT_TYPE, headers=headers)
+    content = await document_service.open_document(path)
+    headers["Content-Length"] = str(content.length)
+    return StreamingResponse(content.chunks, media_type=RENDITION_CONTENT_TYPE, headers=headers)
+
+@router.get("/{document_id}/pages")
+async def get_document_pages(
+    document_id: uuid.UUID,
+    request: Request,
+    page_range: str = Query(..., alias="range", max_length=200),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns a PDF holding only the requested pages of a PDF document.
+    range is 1-based and inclusive, e.g. 12-18 or 1-3,7,10-12; pages come
+    out in the order given. 416 when a page is past the end.
+    """
+    document = await document_service.get_document(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+    if document.mime_type != "application/pdf":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Pages can only be extracted from PDF documents"
+        )
+    try:
+        pages = parse_page_ranges(page_range, settings.PDF_EXTRACT_MAX_PAGES)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    etag = make_etag(document.s3_path, pages)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        data = await page_extraction_service.extract(document, pages)
+    except PageRangeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=f"The document has {e.page_count} pages"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error extracting pages: {str(e)}"
+        )
+    
+    stem = document.original_filename.rsplit(".", 1)[0]
+    headers['Content-Disposition'] = f'inline; filename="{stem} (pages {page_range.replace(" ", "")}).pdf"'
+    return Response(content=data, media_type="application/pdf", headers=headers)
+
+@router.get("/{document_id}/similar", response_model=List[SimilarDocument])
+async def get_similar_documents(
+    document_id: uuid.UUID,
+    min_score: Optional[float] = Query(None, ge=0.1, le=1.0),
+    limit: int = Query(10, ge=1, le=50),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Near-duplicates of a document in any of the advocate's cases, most
+    similar first. similarity estimates the share of text two documents
+    have in common; min_score defaults to SIMILARITY_MIN_SCORE. Documents
+    without extractable text, such as scanned PDFs, have no matches.
+    """
+    document = await document_service.get_document(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+    matches = await similarity_service.find_similar(
+        document,
+        current_advocate.id,
+        db,
+        settings.SIMILARITY_MIN_SCORE if min_score is None else min_score,
+        limit
+    )
+    return [SimilarDocument(document=match, similarity=round(score, 3)) for match, score in matches]
+
+@router.post("/{document_id}/versions", response_model=DocumentVersionResponse, status_code=status.HTTP_201_CREATED)
+async def add_document_version(
+    document_id: uuid.UUID,
+    file: UploadFile = File(...),
+    comment: Optional[str] = Form(None),
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Uploads a revision of a document. The file becomes the document's
+    content; the previous content stays available as an earlier version.
+    The first revision of a document also records its original upload as
+    version 1. 409 when another revision was added meanwhile.
+    """
+    return await document_version_service.add_version(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        file=file,
+        db=db,
+        comment=comment
+    )
+
+@router.get("/{document_id}/versions", response_model=List[DocumentVersionResponse])
+async def list_document_versions(
+    document_id: uuid.UUID,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """Versions of a document, newest first; empty until it is first revised"""
+    document = await document_service.get_document(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+    return document_version_service.list_versions(document, db)
+
+@router.get("/{document_id}/versions/{version}/content")
+async def get_document_version_content(
+    document_id: uuid.UUID,
+    version: int,
+    request: Request,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Streams the content of one version of a document. Versions stored as
+    deltas are rebuilt on the fly from the nearest earlier snapshot.
+    """
+    document = await document_service.get_document(
+        document_id=document_id,
+        advocate_id=current_advocate.id,
+        db=db
+    )
+    version_record = document_version_service.get_version(document, version, db)
+    
+    # A version's content never changes
+    etag = f'"{version_record.content_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    chunks = await document_version_service.open_version(document, version_record, db)
+    headers['Content-Disposition'] = f'inline; filename="{version_record.original_filename}"'
+    headers['Content-Length'] = str(version_record.file_size)
+    return StreamingResponse(chunks, media_type=version_record.mime_type, headers=headers)
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: uuid.UUID,
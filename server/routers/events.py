@@ -0,0 +1,57 @@
+# routers/events.py
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from auth import get_stream_advocate
+from config import get_settings
+from services.event_bus import event_bus, Event, RESYNC
+
+router = APIRouter()
+settings = get_settings()
+
+def format_event(event_id: int, event: Event) -> str:
+    return f"id: {event_id}\nevent: {event.type}\ndata: {json.dumps(event.data, default=str)}\n\n"
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_advocate = Depends(get_stream_advocate)
+):
+    """
+    Server-Sent Events feed of the current advocate's document status
+    changes and case updates. Events carry ids only; on a "resync" event
+    (sent after a reconnect or when the client fell behind) the client
+    should re-fetch whatever it is showing.
+    """
+    subscription = await event_bus.subscribe(current_advocate.id)
+
+    async def stream():
+        try:
+            # Event ids are per connection, so a reconnecting client has missed
+            # an unknown number of events and must resync
+            event_id = 0
+            yield "retry: 5000\n\n"
+            if request.headers.get("last-event-id") is not None:
+                event_id += 1
+                yield format_event(event_id, Event(RESYNC))
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), settings.EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id += 1
+                yield format_event(event_id, event)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -0,0 +1,58 @@
+# routers/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from database import engine, replicas
+from utils.db_pool import pool_status
+from services.result_cache import result_cache
+from services.access_service import case_access_cache
+from storage import get_storage
+
+router = APIRouter()
+
+@router.get("/live")
+async def liveness():
+    """The process is up; deliberately touches nothing else"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+def readiness():
+    """
+    Whether this instance can serve traffic: the primary answers a query
+    through the pool. Includes pool statistics, a pool-size recommendation
+    and replica health. Returns 503 when the primary is unreachable.
+    """
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        database_ok = True
+        error = None
+    except Exception as e:
+        database_ok = False
+        error = str(e)
+
+    body = {
+        "status": "ok" if database_ok else "unavailable",
+        "database": {"ok": database_ok, "error": error, "pool": pool_status(engine)},
+        "replicas": [
+            {"host": replica.name, "healthy": replica.healthy, "pool": pool_status(replica.engine)}
+            for replica in replicas.replicas
+        ],
+    }
+    return JSONResponse(body, status_code=200 if database_ok else 503)
+
+@router.get("/cache")
+async def cache_metrics():
+    """Result cache size and hit, miss, eviction and invalidation counters"""
+    return result_cache.metrics()
+
+@router.get("/access")
+async def access_cache_metrics():
+    """Size and hit and miss counters of the per-advocate case id cache"""
+    return case_access_cache.metrics()
+
+@router.get("/storage")
+async def storage_metrics():
+    """Storage backend in use and its transfer counters"""
+    storage = get_storage()
+    return {"backend": storage.name, **storage.metrics()}
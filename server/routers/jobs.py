@@ -0,0 +1,30 @@
+# routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from database import get_db
+from models import Job, JobResponse
+from auth import get_current_advocate
+import uuid
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: uuid.UUID,
+    current_advocate = Depends(get_current_advocate),
+    db: Session = Depends(get_db)
+):
+    """
+    Status of a background job started by the current advocate.
+    While the job runs, result holds its latest reported progress.
+    """
+    job = db.query(Job).filter(
+        Job.id == job_id,
+        Job.advocate_id == current_advocate.id
+    ).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
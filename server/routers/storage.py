@@ -0,0 +1,25 @@
+# routers/storage.py
+from fastapi import APIRouter, HTTPException, status
+from storage import get_storage
+from storage.local import LocalStorage, LocalFileResponse
+
+router = APIRouter()
+
+@router.get("/local/{path:path}")
+async def get_local_object(path: str, expires: int, signature: str):
+    """
+    Serves a file of the local storage backend through a URL signed by
+    LocalStorage.sign, the local counterpart of a Supabase or S3 signed URL.
+    """
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not storage.verify(path, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired download link"
+        )
+    local_path = storage.local_path(path)
+    if local_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return LocalFileResponse(local_path, filename=path.rsplit("/", 1)[-1])
@@ -0,0 +1,167 @@
+# services/access_service.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Query, Session
+from models import Case, Document
+from config import get_settings
+from services.result_cache import result_cache
+
+settings = get_settings()
+
+
+def owns_case(advocate_id: uuid.UUID):
+    """Documents in one of the advocate's cases, as a correlated EXISTS"""
+    return exists().where(Case.id == Document.case_id, Case.advocate_id == advocate_id)
+
+
+class CaseAccessCache:
+    """
+    Case ids each advocate owns, per process, least recently used evicted.
+
+    Only a hit is trusted: a case missing from a cached set may have been
+    created since, so the caller reloads the set before refusing. Sets are
+    dropped when the advocate's "cases" result cache namespace is
+    invalidated, here or in another worker, and after a TTL.
+    """
+
+    def __init__(self, max_advocates: int, ttl_seconds: float):
+        self.max_advocates = max_advocates
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[FrozenSet[uuid.UUID], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, advocate_id: uuid.UUID) -> Optional[FrozenSet[uuid.UUID]]:
+        key = str(advocate_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def begin(self) -> int:
+        """Call before loading a set, as with ResultCache.begin"""
+        return self._epoch
+
+    def store(self, epoch: int, advocate_id: uuid.UUID, case_ids: FrozenSet[uuid.UUID]) -> None:
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[str(advocate_id)] = (case_ids, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(str(advocate_id))
+            while len(self._entries) > self.max_advocates:
+                self._entries.popitem(last=False)
+
+    def on_invalidate(self, targets) -> None:
+        with self._lock:
+            self._epoch += 1
+            if targets is None:
+                self._entries.clear()
+                return
+            for advocate_id, namespace, _ in targets:
+                if namespace != "cases":
+                    continue
+                if advocate_id is None:
+                    self._entries.clear()
+                else:
+                    self._entries.pop(advocate_id, None)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.ACCESS_CACHE_ENABLED,
+                "advocates": len(self._entries),
+                "max_advocates": self.max_advocates,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+case_access_cache = CaseAccessCache(
+    max_advocates=settings.ACCESS_CACHE_MAX_ADVOCATES,
+    ttl_seconds=settings.ACCESS_CACHE_TTL_SECONDS
+)
+if settings.ACCESS_CACHE_ENABLED:
+    result_cache.subscribe(case_access_cache.on_invalidate)
+
+
+class AccessService:
+    """
+    Answers "may this advocate access this document or case" in at most
+    one query, loading the document in the same round trip. Case checks
+    are answered from the per-advocate case id cache when it holds the case.
+    """
+
+    def get_document(self, document_id: uuid.UUID, advocate_id: uuid.UUID, db: Session) -> Document:
+        """
+        Loads a document together with whether its case is the advocate's.
+        A missing document is a 404 and someone else's a 403, as before.
+        """
+        row = (
+            db.query(Document, (Case.advocate_id == advocate_id).label("allowed"))
+            .join(Case, Case.id == Document.case_id)
+            .filter(Document.id == document_id)
+            .first()
+        )
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found"
+            )
+        if not row.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this document"
+            )
+        return row.Document
+
+    def check_case(self, case_id: uuid.UUID, advocate_id: uuid.UUID, db: Session) -> None:
+        """Verify case exists and belongs to the advocate"""
+        if settings.ACCESS_CACHE_ENABLED:
+            case_ids = case_access_cache.get(advocate_id)
+            if case_ids is None or case_id not in case_ids:
+                case_ids = self._load_case_ids(advocate_id, db)
+            allowed = case_id in case_ids
+        else:
+            allowed = db.query(exists().where(Case.id == case_id, Case.advocate_id == advocate_id)).scalar()
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Case not found or you don't have access to it"
+            )
+
+    def case_documents(self, case_id: uuid.UUID, advocate_id: uuid.UUID, db: Session) -> Query:
+        """
+        Documents of a case, restricted to the advocate's cases by EXISTS
+        unless the cache already vouches for the case. An empty result does
+        not tell a missing case from an empty one; callers that get no rows
+        call check_case for the 404.
+        """
+        query = db.query(Document).filter(Document.case_id == case_id)
+        if settings.ACCESS_CACHE_ENABLED:
+            case_ids = case_access_cache.get(advocate_id)
+            if case_ids is not None and case_id in case_ids:
+                return query
+        return query.filter(owns_case(advocate_id))
+
+    @staticmethod
+    def _load_case_ids(advocate_id: uuid.UUID, db: Session) -> FrozenSet[uuid.UUID]:
+        epoch = case_access_cache.begin()
+        case_ids = frozenset(db.execute(select(Case.id).where(Case.advocate_id == advocate_id)).scalars())
+        case_access_cache.store(epoch, advocate_id, case_ids)
+        return case_ids
@@ -1,11 +1,14 @@
 # services/advocate_service.py
 from fastapi import HTTPException
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import Optional
 import uuid
 from passlib.context import CryptContext
 from models import Advocate
 from pydantic import EmailStr
+from utils.db_errors import raise_integrity_error
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,27 +24,28 @@ class AdvocateService:
         phone: Optional[str] = None,
         firm_name: Optional[str] = None
     ) -> Advocate:
-        # Check if advocate already exists
-        if db.query(Advocate).filter(Advocate.email == email).first():
-            raise HTTPException(status_code=400, detail="Email already registered")
-        
-        if db.query(Advocate).filter(Advocate.bar_number == bar_number).first():
-            raise HTTPException(status_code=400, detail="Bar number already registered")
-        
-        # Create new advocate
-        advocate = Advocate(
-            email=email,
-            password_hash=pwd_context.hash(password),
-            full_name=full_name,
-            phone=phone,
-            bar_number=bar_number,
-            license_state=license_state,
-            firm_name=firm_name
-        )
-        
-        db.add(advocate)
-        db.commit()
-        db.refresh(advocate)
+        # Email and bar number uniqueness is enforced by the table's constraints;
+        # RETURNING hands back the stored row without a second query
+        try:
+            advocate = db.execute(
+                insert(Advocate.__table__)
+                .values(
+                    id=uuid.uuid4(),
+                    email=email,
+                    password_hash=pwd_context.hash(password),
+                    full_name=full_name,
+                    phone=phone,
+                    bar_number=bar_number,
+                    license_state=license_state,
+                    firm_name=firm_name,
+                    is_active=True
+                )
+                .returning(*Advocate.__table__.c)
+            ).one()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise_integrity_error(e, "Could not register advocate")
         return advocate
 
     def get_advocate(self, db: Session, advocate_id: uuid.UUID) -> Advocate:
@@ -56,12 +60,22 @@ class AdvocateService:
         advocate_id: uuid.UUID,
         update_data: dict
     ) -> Advocate:
-        advocate = self.get_advocate(db, advocate_id)
+        values = {key: value for key, value in update_data.items() if key in Advocate.__table__.c}
+        if not values:
+            return self.get_advocate(db, advocate_id)
         
-        for key, value in update_data.items():
-            if hasattr(advocate, key):
-                setattr(advocate, key, value)
+        try:
+            advocate = db.execute(
+                update(Advocate.__table__)
+                .where(Advocate.id == advocate_id)
+                .values(**values)
+                .returning(*Advocate.__table__.c)
+            ).one_or_none()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise_integrity_error(e, "Could not update advocate")
         
-        db.commit()
-        db.refresh(advocate)
-        return advocate
\ No newline at end of file
+        if not advocate:
+            raise HTTPException(status_code=404, detail="Advocate not found")
+        return advocate
@@ -0,0 +1,201 @@
+# services/case_bundle_service.py
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import uuid
+from typing import Callable, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from jobs.handlers import COMPILE_CASE_BUNDLE
+from models import Case, Document, DocumentStatus, DocumentType, Job, JobStatus
+from config import get_settings
+from services.document_service import DocumentService
+from services.event_bus import publish
+from services.rendition_service import rendition_pool
+from services.result_cache import result_cache
+from storage import get_storage
+from utils.pdf_bundle import build_index, index_page_count, merge, normalize, number_pages
+
+settings = get_settings()
+
+# Bumped when the bundle layout changes, so cached bundles are rebuilt
+BUNDLE_FORMAT = 1
+
+# Lifetime of the signed URLs the compiler downloads sources through
+SOURCE_URL_EXPIRES_SECONDS = 3600
+
+
+def bundle_input_hash(case_id: uuid.UUID, title: str, documents: List[Document]) -> str:
+    """
+    Identifies a bundle by what goes into it. Storage paths change with the
+    content, so an edited document gives a new hash.
+    """
+    key = {
+        "format": BUNDLE_FORMAT,
+        "case_id": str(case_id),
+        "title": title,
+        "documents": [[str(document.id), document.s3_path] for document in documents],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def find_bundle(db: Session, case_id: uuid.UUID, input_hash: str) -> Optional[Document]:
+    """The stored bundle built from exactly this input, if any"""
+    return db.query(Document).filter(
+        Document.case_id == case_id,
+        Document.document_metadata["bundle"]["input_hash"].astext == input_hash
+    ).first()
+
+
+def find_bundle_job(db: Session, input_hash: str) -> Optional[Job]:
+    """A queued or running job already compiling this bundle"""
+    return db.query(Job).filter(
+        Job.kind == COMPILE_CASE_BUNDLE,
+        Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        Job.payload["input_hash"].astext == input_hash
+    ).first()
+
+
+class CaseBundleService:
+    """
+    Compiles documents of a case into one PDF for filing: index pages
+    listing every document with its page range, then the documents in the
+    order given, numbered continuously from the first index page.
+
+    Sources are fetched, images turned into pages and every document's
+    pages numbered in parallel in the rendition process pool; the parts
+    are then joined in one pass. The bundle is stored as a new document
+    whose metadata records the input hash it was built from.
+    """
+
+    async def compile(
+        self,
+        advocate_id: uuid.UUID,
+        case_id: uuid.UUID,
+        document_ids: List[uuid.UUID],
+        title: str,
+        input_hash: str,
+        report_progress: Callable[[dict], None]
+    ) -> dict:
+        with SessionLocal() as db:
+            existing = find_bundle(db, case_id, input_hash)
+            if existing is not None:
+                return {"document_id": str(existing.id), "cached": True}
+            case = db.query(Case).filter(Case.id == case_id, Case.advocate_id == advocate_id).first()
+            if case is None:
+                raise ValueError("Case not found")
+            by_id = {
+                document.id: document
+                for document in db.query(Document).filter(
+                    Document.case_id == case_id, Document.id.in_(document_ids)
+                )
+            }
+            missing = [str(document_id) for document_id in document_ids if document_id not in by_id]
+            if missing:
+                raise ValueError(f"Documents no longer in the case: {', '.join(missing)}")
+            documents = [by_id[document_id] for document_id in document_ids]
+            subtitle = " - ".join(part for part in (case.court_case_title, case.cnr) if part)
+            db.expunge_all()
+
+        storage = get_storage()
+        sources = [
+            storage.local_path(document.s3_path)
+            or await storage.sign(document.s3_path, SOURCE_URL_EXPIRES_SECONDS)
+            for document in documents
+        ]
+        loop = asyncio.get_running_loop()
+        pool = rendition_pool()
+        progress = {"stage": "fetching", "done": 0, "total": len(documents)}
+
+        async def step(func, *args):
+            result = await loop.run_in_executor(pool, func, *args)
+            progress["done"] += 1
+            await asyncio.to_thread(report_progress, dict(progress))
+            return result
+
+        with tempfile.TemporaryDirectory(prefix="bundle-") as workdir:
+            normalized = await asyncio.gather(*(
+                step(normalize, source, document.mime_type, workdir)
+                for source, document in zip(sources, documents)
+            ))
+
+            # The index comes first and is numbered too
+            first_numbers, entries = [], []
+            next_number = index_page_count(len(documents)) + 1
+            for document, (_, page_count) in zip(documents, normalized):
+                first_numbers.append(next_number)
+                entries.append((document.title, next_number, next_number + page_count - 1))
+                next_number += page_count
+
+            progress.update(stage="numbering", done=0)
+            parts = [os.path.join(workdir, f"part-{position}.pdf") for position in range(len(documents))]
+            await asyncio.gather(*(
+                step(number_pages, path, first_number, part)
+                for (path, _), first_number, part in zip(normalized, first_numbers, parts)
+            ))
+
+            progress.update(stage="merging", done=0, total=1)
+            index_path = os.path.join(workdir, "index.pdf")
+            bundle_path = os.path.join(workdir, "bundle.pdf")
+            await loop.run_in_executor(pool, build_index, title, subtitle or None, entries, index_path)
+            page_count = await step(merge, [index_path] + parts, bundle_path)
+
+            filename = re.sub(r"[\\/]", "-", title) + ".pdf"
+            storage_path = f"cases/{case_id}/documents/{uuid.uuid4()}-{filename}"
+            with open(bundle_path, "rb") as bundle:
+                file_size = await storage.put_file(storage_path, bundle, "application/pdf")
+
+        try:
+            document = await asyncio.to_thread(
+                self._insert_bundle, advocate_id, case_id, title, filename, storage_path, file_size, {
+                    "input_hash": input_hash,
+                    "document_ids": [str(document_id) for document_id in document_ids],
+                    "page_count": page_count,
+                }
+            )
+        except Exception:
+            await storage.delete(storage_path)
+            raise
+        return {"document_id": str(document.id), "page_count": page_count, "cached": False}
+
+    @staticmethod
+    def _insert_bundle(
+        advocate_id: uuid.UUID,
+        case_id: uuid.UUID,
+        title: str,
+        filename: str,
+        storage_path: str,
+        file_size: int,
+        bundle: dict
+    ):
+        with SessionLocal() as db:
+            document = db.execute(
+                insert(Document.__table__)
+                .values(
+                    id=uuid.uuid4(),
+                    case_id=case_id,
+                    title=title,
+                    document_type=DocumentType.OTHER,
+                    description=f"Bundle of {len(bundle['document_ids'])} documents, {bundle['page_count']} pages",
+                    s3_path=storage_path,
+                    original_filename=filename,
+                    file_size=file_size,
+                    mime_type="application/pdf",
+                    status=DocumentStatus.PROCESSED,
+                    document_metadata={"bundle": bundle}
+                )
+                .returning(*Document.__table__.c)
+            ).one()
+            DocumentService.queue_processing(db, document)
+            publish(db, advocate_id, "document.status", {
+                "document_id": document.id,
+                "case_id": case_id,
+                "status": document.status.value
+            })
+            result_cache.invalidate(db, advocate_id, "documents", scope=case_id)
+            db.commit()
+            return document
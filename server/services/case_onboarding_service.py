@@ -0,0 +1,118 @@
+# services/case_onboarding_service.py
+import asyncio
+import time
+import uuid
+from typing import Callable, Dict, List
+import httpx
+from sqlalchemy import insert, select
+from database import SessionLocal
+from models import Case
+from config import get_settings
+from services.court_service import CourtService, CourtCaseNotFound, case_values
+from services.event_bus import publish
+from services.result_cache import result_cache
+
+settings = get_settings()
+
+# Minimum seconds between progress updates written to the job
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+_insert_cases = insert(Case.__table__).returning(Case.__table__.c.id, Case.__table__.c.cnr)
+
+
+class CaseOnboardingService:
+    """
+    Creates cases for a list of CNR numbers from eCourts data.
+
+    Court data is fetched concurrently, at most COURT_FETCH_CONCURRENCY
+    requests at a time, and fetched cases are inserted in batches of
+    CASE_ONBOARD_BATCH_SIZE as they arrive. CNRs the advocate already has a
+    case for are skipped, so a retried job picks up where it stopped.
+    """
+
+    async def onboard(
+        self,
+        advocate_id: uuid.UUID,
+        client_id: uuid.UUID,
+        cnrs: List[str],
+        report_progress: Callable[[dict], None]
+    ) -> dict:
+        results: Dict[str, dict] = {cnr: {"status": "pending"} for cnr in cnrs}
+        with SessionLocal() as db:
+            existing = db.execute(
+                select(Case.cnr, Case.id).where(Case.advocate_id == advocate_id, Case.cnr.in_(cnrs))
+            ).all()
+        for cnr, case_id in existing:
+            results[cnr] = {"status": "exists", "case_id": str(case_id)}
+
+        pending = [cnr for cnr in cnrs if results[cnr]["status"] == "pending"]
+        fetched: List[dict] = []
+        semaphore = asyncio.Semaphore(settings.COURT_FETCH_CONCURRENCY)
+        reported_at = 0.0
+
+        async def flush() -> None:
+            if not fetched:
+                return
+            rows = await asyncio.to_thread(self._insert_cases, advocate_id, list(fetched))
+            fetched.clear()
+            for case_id, cnr in rows:
+                results[cnr] = {"status": "created", "case_id": str(case_id)}
+
+        async def report(force: bool = False) -> None:
+            nonlocal reported_at
+            if force or time.monotonic() - reported_at >= PROGRESS_INTERVAL_SECONDS:
+                reported_at = time.monotonic()
+                await asyncio.to_thread(report_progress, self._summary(results))
+
+        limits = httpx.Limits(max_connections=settings.COURT_FETCH_CONCURRENCY)
+        async with httpx.AsyncClient(timeout=settings.COURT_FETCH_TIMEOUT_SECONDS, limits=limits) as client:
+            court = CourtService(client)
+
+            async def fetch(cnr: str):
+                async with semaphore:
+                    try:
+                        return cnr, await court.fetch_case(cnr), None
+                    except CourtCaseNotFound:
+                        return cnr, None, None
+                    except Exception as e:
+                        return cnr, None, str(e) or type(e).__name__
+
+            await report(force=True)
+            for next_done in asyncio.as_completed([fetch(cnr) for cnr in pending]):
+                cnr, court_case, error = await next_done
+                if court_case is not None:
+                    # The API echoes the CNR; keep the one we were asked for
+                    fetched.append({**case_values(court_case, advocate_id, client_id), "cnr": cnr})
+                    results[cnr] = {"status": "fetched"}
+                elif error is None:
+                    results[cnr] = {"status": "not_found"}
+                else:
+                    results[cnr] = {"status": "failed", "error": error}
+                if len(fetched) >= settings.CASE_ONBOARD_BATCH_SIZE:
+                    await flush()
+                await report()
+            await flush()
+
+        return self._summary(results)
+
+    def _insert_cases(self, advocate_id: uuid.UUID, rows: List[dict]) -> list:
+        # A parameter list makes SQLAlchemy send multi-row INSERT ... VALUES
+        # statements, each returning the new ids
+        with SessionLocal() as db:
+            inserted = db.execute(_insert_cases, rows).all()
+            result_cache.invalidate(db, advocate_id, "cases")
+            publish(db, advocate_id, "cases.onboarded", {"case_ids": [case_id for case_id, _ in inserted]})
+            db.commit()
+        return inserted
+
+    @staticmethod
+    def _summary(results: Dict[str, dict]) -> dict:
+        counts: Dict[str, int] = {}
+        for result in results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return {
+            "total": len(results),
+            "done": sum(n for status, n in counts.items() if status not in ("pending", "fetched")),
+            "counts": counts,
+            "cnrs": results,
+        }
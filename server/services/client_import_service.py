@@ -0,0 +1,297 @@
+# services/client_import_service.py
+import codecs
+import csv
+import json
+import uuid
+import zipfile
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+from fastapi import UploadFile, HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from models import AdvocateClient, Client, ClientCreate, ClientImportResult, ClientImportRowError
+from services.result_cache import result_cache
+
+# Rows are validated, de-duplicated and inserted this many at a time
+BATCH_SIZE = 1000
+
+# Validates a whole batch in one call into pydantic-core
+_batch_adapter = TypeAdapter(List[ClientCreate])
+
+_insert_clients = (
+    pg_insert(Client.__table__)
+    .on_conflict_do_nothing(index_elements=["email"])
+    .returning(Client.__table__.c.id, Client.__table__.c.email)
+)
+
+_link_clients = pg_insert(AdvocateClient.__table__).on_conflict_do_nothing()
+
+# Spreadsheet headers people commonly use, mapped to ClientCreate fields
+HEADER_ALIASES = {
+    "name": "full_name",
+    "client_name": "full_name",
+    "email_address": "email",
+    "e-mail": "email",
+    "company": "company_name",
+    "phone_number": "phone",
+    "mobile": "phone",
+}
+
+
+def _normalize_header(header) -> str:
+    key = str(header or "").strip().lower().replace(" ", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _to_client_data(record: Dict[str, object]) -> dict:
+    """
+    Maps one spreadsheet record to ClientCreate input.
+    The address can come as a JSON object in an "address" column or spread
+    over "address_*" columns (address_city, address_state, ...).
+    """
+    data = {}
+    address = {}
+    for key, value in record.items():
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if key == "address":
+            if isinstance(value, str) and value.startswith("{"):
+                try:
+                    address.update(json.loads(value))
+                    continue
+                except ValueError:
+                    pass
+            address["line1"] = value
+        elif key.startswith("address_"):
+            address[key[len("address_"):]] = value
+        elif key in ClientCreate.model_fields:
+            data[key] = str(value) if not isinstance(value, str) else value
+    if address:
+        data["address"] = address
+    return data
+
+
+def _format_errors(errors: List[dict]) -> List[str]:
+    messages = []
+    for error in errors:
+        field = ".".join(str(part) for part in error["loc"][1:])
+        messages.append(f"{field}: {error['msg']}" if field else error["msg"])
+    return messages
+
+
+class ClientImportService:
+    def import_clients(self, file: UploadFile, advocate_id: uuid.UUID, db: Session) -> ClientImportResult:
+        """
+        Imports clients from a CSV or XLSX upload and links them to the advocate.
+        The file is read as a stream and processed in batches: each batch is
+        validated in one pass, checked for duplicate emails against the file
+        and the database with a single query, and inserted with one multi-row
+        INSERT ... ON CONFLICT DO NOTHING.
+        The whole file is imported in one transaction: if anything fails
+        part-way, no client from it is kept.
+        """
+        rows = self._read_rows(file)
+        total = 0
+        imported = 0
+        errors: List[ClientImportRowError] = []
+        seen_emails: Dict[str, int] = {}
+
+        try:
+            while True:
+                batch = list(islice(rows, BATCH_SIZE))
+                if not batch:
+                    break
+                total += len(batch)
+                batch_imported, batch_errors = self._import_batch(batch, seen_emails, advocate_id, db)
+                imported += batch_imported
+                errors.extend(batch_errors)
+            if imported:
+                result_cache.invalidate(db, advocate_id, "clients")
+            db.commit()
+        except HTTPException:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Client import failed, no clients were imported: {str(e)}"
+            )
+
+        errors.sort(key=lambda error: error.row)
+        return ClientImportResult(
+            total_rows=total,
+            imported=imported,
+            failed=len(errors),
+            errors=errors
+        )
+
+    def _import_batch(
+        self,
+        batch: List[Tuple[int, dict]],
+        seen_emails: Dict[str, int],
+        advocate_id: uuid.UUID,
+        db: Session
+    ) -> Tuple[int, List[ClientImportRowError]]:
+        errors: List[ClientImportRowError] = []
+        valid = self._validate_batch(batch, errors)
+
+        # Duplicates within the file; the first occurrence wins
+        candidates: List[Tuple[int, ClientCreate]] = []
+        for row_number, client in valid:
+            first_row = seen_emails.get(client.email)
+            if first_row is not None:
+                errors.append(ClientImportRowError(
+                    row=row_number,
+                    email=client.email,
+                    errors=[f"email: duplicate of row {first_row} in this file"]
+                ))
+                continue
+            seen_emails[client.email] = row_number
+            candidates.append((row_number, client))
+
+        if not candidates:
+            return 0, errors
+
+        # Duplicates against the database, one set-based query per batch
+        emails = [client.email for _, client in candidates]
+        existing = set(db.scalars(select(Client.email).where(Client.email.in_(emails))))
+
+        values = []
+        for row_number, client in candidates:
+            if client.email in existing:
+                errors.append(ClientImportRowError(
+                    row=row_number,
+                    email=client.email,
+                    errors=["email: a client with this email already exists"]
+                ))
+                continue
+            values.append({
+                "id": uuid.uuid4(),
+                "email": client.email,
+                "full_name": client.full_name,
+                "phone": client.phone,
+                "address": client.address,
+                "company_name": client.company_name,
+                "is_active": True,
+            })
+
+        if not values:
+            return 0, errors
+
+        # Rows inserted concurrently by someone else are skipped by ON CONFLICT
+        # and reported from the RETURNING set. Executing one cached statement
+        # with a parameter list lets SQLAlchemy send it as multi-row
+        # INSERT ... VALUES (...), (...) RETURNING pages without recompiling.
+        # import_clients commits once every batch is in
+        inserted_rows = db.execute(_insert_clients, values).all()
+        if inserted_rows:
+            db.execute(_link_clients, [
+                {"advocate_id": advocate_id, "client_id": row.id} for row in inserted_rows
+            ])
+
+        inserted = {row.email for row in inserted_rows}
+        row_by_email = {client.email: row_number for row_number, client in candidates}
+        for value in values:
+            if value["email"] not in inserted:
+                errors.append(ClientImportRowError(
+                    row=row_by_email[value["email"]],
+                    email=value["email"],
+                    errors=["email: a client with this email already exists"]
+                ))
+
+        return len(inserted), errors
+
+    def _validate_batch(
+        self,
+        batch: List[Tuple[int, dict]],
+        errors: List[ClientImportRowError]
+    ) -> List[Tuple[int, ClientCreate]]:
+        """
+        Validates the batch in one call. If some rows fail, they are reported
+        from the error locations and the remaining rows are validated again.
+        """
+        data = [record for _, record in batch]
+        try:
+            return list(zip((row for row, _ in batch), _batch_adapter.validate_python(data)))
+        except ValidationError as e:
+            by_index: Dict[int, List[dict]] = {}
+            for error in e.errors():
+                by_index.setdefault(error["loc"][0], []).append(error)
+
+        for index, row_errors in by_index.items():
+            row_number, record = batch[index]
+            errors.append(ClientImportRowError(
+                row=row_number,
+                email=record.get("email"),
+                errors=_format_errors(row_errors)
+            ))
+
+        remaining = [item for index, item in enumerate(batch) if index not in by_index]
+        if not remaining:
+            return []
+        clients = _batch_adapter.validate_python([record for _, record in remaining])
+        return list(zip((row for row, _ in remaining), clients))
+
+    def _read_rows(self, file: UploadFile) -> Iterator[Tuple[int, dict]]:
+        """Yields (row number, ClientCreate input) pairs without loading the whole file"""
+        filename = (file.filename or "").lower()
+        if filename.endswith(".xlsx") or file.content_type == (
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        ):
+            return self._read_xlsx(file)
+        if filename.endswith(".csv") or file.content_type in ("text/csv", "application/csv"):
+            return self._read_csv(file)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type, upload a .csv or .xlsx file"
+        )
+
+    def _read_csv(self, file: UploadFile) -> Iterator[Tuple[int, dict]]:
+        file.file.seek(0)
+        # utf-8-sig drops the BOM Excel adds to CSV exports
+        text = codecs.getreader("utf-8-sig")(file.file, errors="replace")
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        keys = [_normalize_header(column) for column in header]
+        for row_number, values in enumerate(reader, start=2):
+            if not any(value.strip() for value in values):
+                continue
+            yield row_number, _to_client_data(dict(zip(keys, values)))
+
+    def _read_xlsx(self, file: UploadFile) -> Iterator[Tuple[int, dict]]:
+        try:
+            from openpyxl import load_workbook
+            from openpyxl.utils.exceptions import InvalidFileException
+        except ImportError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="XLSX import is not available on this server, upload a .csv file"
+            )
+        file.file.seek(0)
+        try:
+            # read_only mode streams rows from the sheet XML instead of building the workbook
+            workbook = load_workbook(file.file, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not read the spreadsheet"
+            )
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            keys = [_normalize_header(column) for column in header]
+            for row_number, values in enumerate(rows, start=2):
+                if all(value is None or str(value).strip() == "" for value in values):
+                    continue
+                yield row_number, _to_client_data(dict(zip(keys, values)))
+        finally:
+            workbook.close()
@@ -0,0 +1,83 @@
+# services/court_service.py
+import asyncio
+import random
+import uuid
+from typing import Dict, Optional
+import httpx
+from config import get_settings
+
+settings = get_settings()
+
+# Responses worth asking again for; anything else is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CourtCaseNotFound(Exception):
+    pass
+
+
+def court_type_for(cnr: str) -> str:
+    """Which eCourts API serves a CNR"""
+    if cnr.startswith("DLHC"):  # Example pattern for High Court
+        return "high-court"
+    if cnr.startswith("SC"):  # Example pattern for Supreme Court
+        return "supreme-court"
+    return "district-court"
+
+
+def case_values(court_case: Dict, advocate_id: uuid.UUID, client_id: uuid.UUID) -> Dict:
+    """
+    Maps an eCourts case onto the Case columns, the same way the frontend
+    fills them when a single case is created from fetched details.
+    """
+    details = court_case.get("details") or {}
+    return {
+        "id": uuid.uuid4(),
+        "advocate_id": advocate_id,
+        "client_id": client_id,
+        "cnr": court_case.get("cnr"),
+        "court_case_title": court_case.get("title"),
+        "court_case_type": details.get("type"),
+        "filing_number": details.get("filingNumber"),
+        "registration_number": details.get("registrationNumber"),
+        "court_status": court_case.get("status") or {},
+        "parties_details": court_case.get("parties") or {},
+        "acts_sections": court_case.get("actsAndSections") or {},
+        "fir_details": court_case.get("firstInformationReport") or {},
+        "court_history": court_case.get("history") or [],
+        "case_metadata": {"source": "cnr_onboarding"},
+    }
+
+
+class CourtService:
+    """Async client for the eCourts API with retries for transient failures"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def fetch_case(self, cnr: str) -> Dict:
+        url = f"{settings.COURT_API_BASE_URL}/{court_type_for(cnr)}/case"
+        headers = {"Content-Type": "application/json", "X-API-Key": settings.COURT_API_KEY}
+        attempts = settings.COURT_FETCH_RETRIES + 1
+        for attempt in range(1, attempts + 1):
+            error: Optional[Exception] = None
+            retry_after: Optional[float] = None
+            try:
+                response = await self.client.post(url, json={"cnr": cnr}, headers=headers)
+                if response.status_code == 404:
+                    raise CourtCaseNotFound(cnr)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = httpx.HTTPStatusError(
+                    f"Court API returned {response.status_code}", request=response.request, response=response
+                )
+                if response.headers.get("retry-after", "").isdigit():
+                    retry_after = float(response.headers["retry-after"])
+            except httpx.TransportError as e:
+                error = e
+            if attempt == attempts:
+                raise error
+            # Exponential backoff with jitter, so a throttled fan-out doesn't retry in lockstep
+            delay = retry_after or settings.COURT_FETCH_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
@@ -1,39 +1,39 @@
 # services/document_service.py
 from fastapi import UploadFile, HTTPException, status
+from sqlalchemy import func, insert, literal, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Optional, List, Tuple
+import asyncio
 import uuid
-import os
-import tempfile
-import httpx
-from models import Document, DocumentType, DocumentStatus, Case
+from models import (
+    Document, DocumentType, DocumentStatus, DocumentVersion, DocumentResponse,
+    DocumentUploadResult, DocumentBatchUploadResult
+)
 from config import get_settings
+from database import SessionLocal
+from jobs import enqueue
+from jobs.handlers import (
+    DELETE_STORAGE_OBJECT, DeleteStorageObject, FINGERPRINT_DOCUMENT, FingerprintDocument,
+    RENDER_DOCUMENT, RenderDocument
+)
+from services.access_service import AccessService
+from services.event_bus import publish
+from services.result_cache import result_cache
+from storage import ObjectNotFound, ObjectStream, StorageBackend, get_storage
+from utils.minhash import can_fingerprint
+from utils.renditions import can_render
 
 settings = get_settings()
 
 class DocumentService:
     def __init__(self):
-        # Supabase storage API endpoint base URL
-        self.storage_url = f"https://{settings.SUPABASE_PROJECT_ID}.supabase.co/storage/v1"
-        # Default bucket name - create this in Supabase dashboard
-        self.bucket_name = "documents"
-        # Headers for Supabase API requests
-        self.headers = {
-            "apikey": settings.SUPABASE_ANON_KEY,
-            "Authorization": f"Bearer {settings.SUPABASE_ANON_KEY}"
-        }
-        
-        # S3 client setup remains for backward compatibility
-        # This can be used if you still need S3 for some features
-        if hasattr(settings, 'AWS_ACCESS_KEY') and settings.AWS_ACCESS_KEY:
-            import boto3
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=settings.AWS_ACCESS_KEY,
-                aws_secret_access_key=settings.AWS_SECRET_KEY,
-                region_name=settings.AWS_REGION
-            )
-            self.s3_bucket = settings.S3_BUCKET
+        self.access = AccessService()
+    
+    @property
+    def storage(self) -> StorageBackend:
+        # Supabase, S3 or local disk, as selected by STORAGE_BACKEND
+        return get_storage()
 
     async def upload_document(
         self,
@@ -45,83 +45,49 @@ class DocumentService:
         description: Optional[str] = None
     ) -> Document:
         """
-        Upload a document to Supabase Storage and create a database record
+        Upload a document to storage and create a database record
         """
-        # Verify case exists and belongs to the advocate
-        case = db.query(Case).filter(
-            Case.id == case_id,
-            Case.advocate_id == advocate_id
-        ).first()
+        self.access.check_case(case_id, advocate_id, db)
         
-        if not case:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Case not found or you don't have access to it"
-            )
-        
-        storage_path = None
+        storage_path = self.storage_path(case_id, file.filename)
+        uploaded = False
         
         try:
-            # Generate a file path similar to S3
-            file_uuid = uuid.uuid4()
-            storage_path = f"cases/{case_id}/documents/{file_uuid}-{file.filename}"
-            
-            # Create a temporary file to handle the upload
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                # Read file content
-                contents = await file.read()
-                # Write to temporary file
-                temp_file.write(contents)
-                temp_file.flush()
-                
-                # Upload to Supabase Storage using their REST API
-                async with httpx.AsyncClient() as client:
-                    with open(temp_file.name, "rb") as f:
-                        upload_url = f"{self.storage_url}/object/{self.bucket_name}/{storage_path}"
-                        response = await client.post(
-                            upload_url,
-                            headers=self.headers,
-                            files={"file": (file.filename, f, file.content_type)}
-                        )
-                        
-                        if response.status_code != 200:
-                            raise Exception(f"Upload failed with status {response.status_code}: {response.text}")
-                
-            # Clean up temporary file
-            os.unlink(temp_file.name)
+            # Streamed from the request's spooled file, without another copy
+            await file.seek(0)
+            file_size = await self.storage.put_file(storage_path, file.file, file.content_type)
+            uploaded = True
             
             # Reset file pointer for potential future use
             await file.seek(0)
             
-            # Create document record in database
-            document = Document(
-                case_id=case_id,
-                title=file.filename,
-                document_type=document_type,
-                description=description,
-                s3_path=storage_path,  # We're still using the same field name for compatibility
-                original_filename=file.filename,
-                file_size=file.size,
-                mime_type=file.content_type,
-                status=DocumentStatus.PROCESSED,
-                document_metadata={}
-            )
-            
-            db.add(document)
+            # Create document record in database; RETURNING gives back the
+            # stored row, defaults included, without a refresh query
+            document = db.execute(
+                insert(Document.__table__)
+                .values(self._document_values(
+                    file, case_id, document_type, description, storage_path, file_size
+                ))
+                .returning(*Document.__table__.c)
+            ).one()
+            self.queue_processing(db, document)
+            publish(db, advocate_id, "document.status", {
+                "document_id": document.id,
+                "case_id": case_id,
+                "status": document.status.value
+            })
+            result_cache.invalidate(db, advocate_id, "documents", scope=case_id)
             db.commit()
-            db.refresh(document)
             
             return document
             
         except Exception as e:
             # If there was an error and we uploaded, try to delete the file
-            if storage_path:
+            if uploaded:
                 try:
-                    async with httpx.AsyncClient() as client:
-                        delete_url = f"{self.storage_url}/object/{self.bucket_name}/{storage_path}"
-                        await client.delete(delete_url, headers=self.headers)
+                    await self.storage.delete(storage_path)
                 except Exception as delete_error:
-                    print(f"Error deleting Supabase storage object after upload failure: {delete_error}")
+                    print(f"Error deleting storage object after upload failure: {delete_error}")
             
             # Roll back the database transaction
             db.rollback()
@@ -132,29 +98,152 @@ class DocumentService:
                 detail=f"Document upload failed: {str(e)}"
             )
     
+    async def upload_documents(
+        self,
+        files: List[UploadFile],
+        case_id: uuid.UUID,
+        advocate_id: uuid.UUID,
+        document_type: DocumentType,
+        db: Session,
+        description: Optional[str] = None
+    ) -> DocumentBatchUploadResult:
+        """
+        Upload several files to one case. Access is checked once, the files
+        go to storage a few at a time and all rows are inserted in one
+        transaction. A file that cannot be stored is reported and skipped;
+        if the insert fails, every stored file is removed again.
+        """
+        self.access.check_case(case_id, advocate_id, db)
+        slots = asyncio.Semaphore(settings.DOCUMENT_UPLOAD_CONCURRENCY)
+        
+        async def store(file: UploadFile) -> Tuple[str, int]:
+            storage_path = self.storage_path(case_id, file.filename)
+            async with slots:
+                await file.seek(0)
+                return storage_path, await self.storage.put_file(storage_path, file.file, file.content_type)
+        
+        outcomes = await asyncio.gather(*(store(file) for file in files), return_exceptions=True)
+        stored = [
+            (file, outcome) for file, outcome in zip(files, outcomes)
+            if not isinstance(outcome, BaseException)
+        ]
+        
+        documents = []
+        if stored:
+            try:
+                # One multi-row INSERT; rows come back in parameter order
+                documents = db.execute(
+                    insert(Document.__table__).returning(*Document.__table__.c, sort_by_parameter_order=True),
+                    [
+                        self._document_values(file, case_id, document_type, description, storage_path, file_size)
+                        for file, (storage_path, file_size) in stored
+                    ]
+                ).all()
+                for document in documents:
+                    self.queue_processing(db, document)
+                    publish(db, advocate_id, "document.status", {
+                        "document_id": document.id,
+                        "case_id": case_id,
+                        "status": document.status.value
+                    })
+                result_cache.invalidate(db, advocate_id, "documents", scope=case_id)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                cleanup = await asyncio.gather(
+                    *(self.storage.delete(storage_path) for _, (storage_path, _) in stored),
+                    return_exceptions=True
+                )
+                for error in cleanup:
+                    if error is not None:
+                        print(f"Error deleting storage object after upload failure: {error}")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Document upload failed: {str(e)}"
+                )
+        
+        created = iter(documents)
+        results = []
+        for file, outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Error uploading {file.filename}: {outcome}")
+                results.append(DocumentUploadResult(filename=file.filename, error=f"Upload failed: {str(outcome)}"))
+            else:
+                results.append(DocumentUploadResult(
+                    filename=file.filename,
+                    document=DocumentResponse.model_validate(next(created))
+                ))
+        return DocumentBatchUploadResult(
+            uploaded=len(documents),
+            failed=len(files) - len(documents),
+            results=results
+        )
+    
+    @staticmethod
+    def merge_metadata(document_id: uuid.UUID, values: dict) -> None:
+        """
+        Merges values into a document's document_metadata in one statement,
+        leaving other keys alone. updated_at is kept: derived data such as
+        renditions and indexes does not change the document itself.
+        """
+        with SessionLocal() as db:
+            db.execute(
+                update(Document)
+                .where(Document.id == document_id)
+                .values(
+                    document_metadata=func.coalesce(Document.document_metadata, literal({}, JSONB))
+                    .op("||")(literal(values, JSONB)),
+                    updated_at=Document.updated_at
+                )
+            )
+            db.commit()
+    
+    @staticmethod
+    def queue_processing(db: Session, document) -> None:
+        """
+        Thumbnails and the near-duplicate index entry are made in the
+        background, by jobs committed with the row
+        """
+        if can_render(document.mime_type):
+            enqueue(db, RENDER_DOCUMENT, RenderDocument(document_id=document.id))
+        if can_fingerprint(document.mime_type):
+            enqueue(db, FINGERPRINT_DOCUMENT, FingerprintDocument(document_id=document.id))
+    
+    @staticmethod
+    def storage_path(case_id: uuid.UUID, filename: str) -> str:
+        return f"cases/{case_id}/documents/{uuid.uuid4()}-{filename}"
+    
+    @staticmethod
+    def _document_values(
+        file: UploadFile,
+        case_id: uuid.UUID,
+        document_type: DocumentType,
+        description: Optional[str],
+        storage_path: str,
+        file_size: int
+    ) -> dict:
+        return dict(
+            id=uuid.uuid4(),
+            case_id=case_id,
+            title=file.filename,
+            document_type=document_type,
+            description=description,
+            s3_path=storage_path,  # We're still using the same field name for compatibility
+            original_filename=file.filename,
+            file_size=file_size,
+            mime_type=file.content_type,
+            status=DocumentStatus.PROCESSED,
+            document_metadata={}
+        )
+    
     async def get_document(
         self,
         document_id: uuid.UUID,
         advocate_id: uuid.UUID,
         db: Session
     ) -> Document:
-        """Get a document with advocate permission check"""
-        document = db.query(Document).filter(Document.id == document_id).first()
-        if not document:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-        
-        # Get the case to check advocate access
-        case = db.query(Case).filter(Case.id == document.case_id).first()
-        if not case or case.advocate_id != advocate_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this document"
-            )
-        
-        return document
+        """Get a document with advocate permission check, in one query"""
+        return self.access.get_document(document_id, advocate_id, db)
     
     async def get_case_documents(
         self,
@@ -163,39 +252,21 @@ class DocumentService:
         db: Session
     ) -> List[Document]:
         """Get all documents for a case with advocate permission check"""
-        # Check if the case exists and belongs to the advocate
-        case = db.query(Case).filter(
-            Case.id == case_id,
-            Case.advocate_id == advocate_id
-        ).first()
-        
-        if not case:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Case not found or you don't have access to it"
-            )
-        
-        # Get all documents for the case
-        documents = db.query(Document).filter(Document.case_id == case_id).all()
+        documents = self.access.case_documents(case_id, advocate_id, db).all()
+        if not documents:
+            # Tells an empty case from one the advocate can't see
+            self.access.check_case(case_id, advocate_id, db)
         return documents
 
-    async def get_document_content(self, s3_path: str) -> bytes:
-        """Get document content from Supabase Storage"""
+    async def open_document(self, s3_path: str, start: int = 0, end: Optional[int] = None) -> ObjectStream:
+        """Stream a document's content, or a byte range of it, from storage"""
         try:
-            # Get a download URL from Supabase
-            download_url = f"{self.storage_url}/object/public/{self.bucket_name}/{s3_path}"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    download_url,
-                    headers=self.headers
-                )
-                
-                if response.status_code != 200:
-                    raise Exception(f"Download failed with status {response.status_code}")
-                    
-                return response.content
-                
+            return await self.storage.get_stream(s3_path, start, end)
+        except ObjectNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document content not found in storage"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -213,17 +284,20 @@ class DocumentService:
         document = await self.get_document(document_id, advocate_id, db)
         
         try:
-            # Delete from Supabase Storage
-            async with httpx.AsyncClient() as client:
-                delete_url = f"{self.storage_url}/object/{self.bucket_name}/{document.s3_path}"
-                response = await client.delete(delete_url, headers=self.headers)
-                
-                if response.status_code not in (200, 204):
-                    print(f"Warning: Failed to delete file from storage: {response.status_code}")
-                    # Continue to delete from database even if storage delete fails
-            
-            # Delete from database
+            # The storage objects, earlier versions' included, are removed by
+            # background jobs queued in the same transaction, so they are
+            # deleted if and only if the row is
+            paths = {document.s3_path} | {
+                path for path, in db.query(DocumentVersion.storage_path).filter(DocumentVersion.document_id == document.id)
+            }
             db.delete(document)
+            for path in sorted(paths):
+                enqueue(db, DELETE_STORAGE_OBJECT, DeleteStorageObject(path=path))
+            publish(db, advocate_id, "document.deleted", {
+                "document_id": document.id,
+                "case_id": document.case_id
+            })
+            result_cache.invalidate(db, advocate_id, "documents", scope=document.case_id)
             db.commit()
             return True
             
@@ -233,32 +307,11 @@ class DocumentService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Error deleting document: {str(e)}"
             )
+
+    async def delete_storage_object(self, s3_path: str) -> None:
+        """Delete an object from storage; an already missing object counts as deleted"""
+        await self.storage.delete(s3_path)
     
-    def generate_download_url(self, s3_path: str) -> str:
-        """Generate a public download URL for a document"""
-        # For Supabase Storage, we can use a signed URL
-        signed_url = f"{self.storage_url}/object/sign/{self.bucket_name}/{s3_path}"
-        
-        # By default, sign URLs that expire in 60 minutes
-        expires_in = 60 * 60
-        
-        try:
-            # We need to make a synchronous request here since this method isn't async
-            import requests
-            response = requests.post(
-                signed_url,
-                headers=self.headers,
-                json={"expiresIn": expires_in}
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Failed to generate signed URL: {response.status_code}")
-                
-            # Get the signed URL from the response
-            data = response.json()
-            return data.get("signedURL")
-            
-        except Exception as e:
-            print(f"Error generating download URL: {str(e)}")
-            # Fallback to a public URL
-            return f"{self.storage_url}/object/public/{self.bucket_name}/{s3_path}?download=true"
+    async def generate_download_url(self, s3_path: str) -> str:
+        """Generate a signed download URL for a document"""
+        return await self.storage.sign(s3_path, settings.SIGNED_URL_EXPIRES_SECONDS)
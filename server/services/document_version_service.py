@@ -0,0 +1,328 @@
+# services/document_version_service.py
+import asyncio
+import hashlib
+import io
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+from models import Document, DocumentVersion, DocumentVersionStorage
+from config import get_settings
+from jobs import enqueue
+from jobs.handlers import DELETE_STORAGE_OBJECT, DeleteStorageObject
+from services.document_service import DocumentService
+from services.event_bus import publish
+from services.rendition_service import rendition_pool
+from services.result_cache import result_cache
+from storage import ObjectNotFound, StorageBackend, get_storage
+from storage.base import CHUNK_SIZE
+from utils.binary_delta import Piece, compose, make_delta
+
+settings = get_settings()
+
+# Metadata derived from the content, dropped when a new version replaces it
+CONTENT_METADATA_KEYS = ("content_hash", "renditions", "pdf_index")
+
+# Snapshot ranges this close together are read in one request, skipping the gap
+READ_GAP = 64 * 1024
+
+
+def _hash_file(file: BinaryIO) -> Tuple[int, str]:
+    """Size and SHA-256 of a file object, which is left at its start"""
+    file.seek(0)
+    digest, size = hashlib.sha256(), 0
+    while chunk := file.read(CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return size, digest.hexdigest()
+
+
+class DocumentVersionService:
+    """
+    Revisions of a document.
+
+    The current content is always stored whole at Document.s3_path, so
+    everything else reads it as before. Each revision is also recorded in
+    document_versions: as a binary delta against the revision before it
+    when that is under DOCUMENT_VERSION_MAX_DELTA_RATIO of its size,
+    otherwise, and every DOCUMENT_VERSION_SNAPSHOT_INTERVAL revisions, as
+    a snapshot. A snapshot shares its object with the current content.
+    Once a delta revision is superseded its whole copy is deleted, so a
+    run of small edits costs one delta each plus a periodic snapshot.
+
+    Older revisions are rebuilt by resolving the deltas since the last
+    snapshot into ranges of that snapshot and inserted bytes, which are
+    streamed without materializing the intermediate revisions. Recently
+    rebuilt revisions are kept in an LRU bounded by
+    DOCUMENT_VERSION_CACHE_MB.
+    """
+
+    def __init__(self):
+        self.documents = DocumentService()
+        self._cache: "OrderedDict[uuid.UUID, bytes]" = OrderedDict()
+        self._cached_bytes = 0
+
+    @property
+    def storage(self) -> StorageBackend:
+        return get_storage()
+
+    async def add_version(
+        self,
+        document_id: uuid.UUID,
+        advocate_id: uuid.UUID,
+        file: UploadFile,
+        db: Session,
+        comment: Optional[str] = None
+    ) -> DocumentVersion:
+        """Make the uploaded file the current content of a document, keeping the previous one"""
+        document = await self.documents.get_document(document_id, advocate_id, db)
+        head_path, case_id = document.s3_path, document.case_id
+        versions = db.query(DocumentVersion).filter(
+            DocumentVersion.document_id == document_id
+        ).order_by(DocumentVersion.version).all()
+        previous = versions[-1] if versions else None
+
+        file_size, content_hash = await asyncio.to_thread(_hash_file, file.file)
+        max_bytes = settings.DOCUMENT_VERSION_DELTA_MAX_MB * 1024 * 1024
+        head_size = previous.file_size if previous else document.file_size
+        deltas_since_snapshot = 0
+        for version in reversed(versions):
+            if version.storage != DocumentVersionStorage.DELTA:
+                break
+            deltas_since_snapshot += 1
+
+        base = None
+        if file_size <= max_bytes and (head_size or 0) <= max_bytes:
+            base = await self._read(head_path)
+            head_size = len(base)
+        if previous:
+            head_hash = previous.content_hash
+        elif base is not None:
+            head_hash = (await asyncio.to_thread(hashlib.sha256, base)).hexdigest()
+        else:
+            head_size, head_hash = await self._hash_object(head_path)
+        if content_hash == head_hash:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The file is identical to the current version"
+            )
+
+        delta = None
+        if base is not None and deltas_since_snapshot + 1 < settings.DOCUMENT_VERSION_SNAPSHOT_INTERVAL:
+            target = await asyncio.to_thread(file.file.read)
+            file.file.seek(0)
+            loop = asyncio.get_running_loop()
+            delta = await loop.run_in_executor(rendition_pool(), make_delta, base, target)
+            if len(delta) > file_size * settings.DOCUMENT_VERSION_MAX_DELTA_RATIO:
+                delta = None
+        base = None
+
+        new_path = DocumentService.storage_path(case_id, file.filename)
+        written: List[str] = []
+        try:
+            await self.storage.put_file(new_path, file.file, file.content_type)
+            written.append(new_path)
+            storage_path = new_path
+            if delta is not None:
+                storage_path = f"cases/{case_id}/documents/versions/{document_id}/{uuid.uuid4()}.delta"
+                await self.storage.put_file(storage_path, io.BytesIO(delta), "application/octet-stream")
+                written.append(storage_path)
+
+            # Whoever locks the row first wins; the other upload is based on stale content
+            locked = db.query(Document).filter(Document.id == document_id).with_for_update().populate_existing().one()
+            if locked.s3_path != head_path:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The document was revised meanwhile; upload again"
+                )
+            if previous is None:
+                # The original upload becomes version 1, stored where it already is
+                db.add(DocumentVersion(
+                    document_id=document_id,
+                    version=1,
+                    storage=DocumentVersionStorage.SNAPSHOT,
+                    storage_path=head_path,
+                    stored_size=head_size,
+                    file_size=head_size,
+                    content_hash=head_hash,
+                    original_filename=locked.original_filename,
+                    mime_type=locked.mime_type,
+                    created_at=locked.created_at
+                ))
+            elif previous.storage == DocumentVersionStorage.DELTA:
+                # Its whole copy was only kept while it was the current content
+                enqueue(db, DELETE_STORAGE_OBJECT, DeleteStorageObject(path=head_path))
+
+            version = DocumentVersion(
+                document_id=document_id,
+                version=(previous.version if previous else 1) + 1,
+                storage=DocumentVersionStorage.DELTA if delta is not None else DocumentVersionStorage.SNAPSHOT,
+                storage_path=storage_path,
+                stored_size=len(delta) if delta is not None else file_size,
+                file_size=file_size,
+                content_hash=content_hash,
+                original_filename=file.filename,
+                mime_type=file.content_type,
+                comment=comment,
+                created_by=advocate_id
+            )
+            db.add(version)
+            locked.s3_path = new_path
+            locked.original_filename = file.filename
+            locked.mime_type = file.content_type
+            locked.file_size = file_size
+            locked.document_metadata = {
+                key: value for key, value in (locked.document_metadata or {}).items()
+                if key not in CONTENT_METADATA_KEYS
+            }
+            db.flush()
+            DocumentService.queue_processing(db, locked)
+            publish(db, advocate_id, "document.version", {
+                "document_id": document_id,
+                "case_id": case_id,
+                "version": version.version
+            })
+            result_cache.invalidate(db, advocate_id, "documents", scope=case_id)
+            db.commit()
+            db.refresh(version)
+            return version
+
+        except Exception as e:
+            db.rollback()
+            for path in written:
+                try:
+                    await self.storage.delete(path)
+                except Exception as delete_error:
+                    print(f"Error deleting storage object after failed revision: {delete_error}")
+            if isinstance(e, HTTPException):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Adding the version failed: {str(e)}"
+            )
+
+    def list_versions(self, document: Document, db: Session) -> List[DocumentVersion]:
+        """Newest first; empty for a document that was never revised"""
+        return db.query(DocumentVersion).filter(
+            DocumentVersion.document_id == document.id
+        ).order_by(DocumentVersion.version.desc()).all()
+
+    def get_version(self, document: Document, number: int, db: Session) -> DocumentVersion:
+        version = db.query(DocumentVersion).filter(
+            DocumentVersion.document_id == document.id,
+            DocumentVersion.version == number
+        ).first()
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Version not found"
+            )
+        return version
+
+    async def open_version(self, document: Document, version: DocumentVersion, db: Session) -> AsyncIterator[bytes]:
+        """A version's content as a stream of chunks"""
+        cached = self._cache.get(version.id)
+        if cached is not None:
+            self._cache.move_to_end(version.id)
+            return self._iter_bytes(cached)
+
+        versions = db.query(DocumentVersion).filter(
+            DocumentVersion.document_id == document.id
+        ).order_by(DocumentVersion.version).all()
+        if version.version == versions[-1].version or version.storage == DocumentVersionStorage.SNAPSHOT:
+            # The current content is kept whole at the document's path
+            path = document.s3_path if version.version == versions[-1].version else version.storage_path
+            content = await self.documents.open_document(path)
+            return content.chunks
+
+        chain = []
+        for earlier in reversed(versions[:version.version]):
+            chain.append(earlier)
+            if earlier.storage == DocumentVersionStorage.SNAPSHOT:
+                break
+        snapshot, deltas = chain[-1], list(reversed(chain[:-1]))
+        try:
+            delta_data = await asyncio.gather(*(self._read(delta.storage_path) for delta in deltas))
+        except ObjectNotFound:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Version content not found in storage"
+            )
+        pieces = await asyncio.to_thread(compose, snapshot.file_size, delta_data)
+        return self._stream_pieces(version, snapshot.storage_path, pieces)
+
+    async def _stream_pieces(self, version: DocumentVersion, snapshot_path: str, pieces: List[Piece]) -> AsyncIterator[bytes]:
+        """
+        Yields a rebuilt version, reading runs of nearby snapshot ranges
+        with one ranged request each
+        """
+        keep = version.file_size <= settings.DOCUMENT_VERSION_CACHE_MB * 1024 * 1024 // 4
+        digest, parts = hashlib.sha256(), []
+        index = 0
+        while index < len(pieces):
+            length, source = pieces[index]
+            if not isinstance(source, int):
+                chunks = self._iter_bytes(bytes(source))
+                index += 1
+            else:
+                run = [pieces[index]]
+                index += 1
+                while index < len(pieces) and isinstance(pieces[index][1], int):
+                    end = run[-1][1] + run[-1][0]
+                    if not 0 <= pieces[index][1] - end <= READ_GAP:
+                        break
+                    run.append(pieces[index])
+                    index += 1
+                chunks = self._read_run(snapshot_path, run)
+            async for chunk in chunks:
+                digest.update(chunk)
+                if keep:
+                    parts.append(chunk)
+                yield chunk
+
+        if digest.hexdigest() != version.content_hash:
+            print(f"Rebuilt version {version.id} does not match its content hash")
+        elif keep:
+            self._remember(version.id, b"".join(parts))
+
+    async def _read_run(self, path: str, run: List[Piece]) -> AsyncIterator[bytes]:
+        """Cuts ascending snapshot ranges out of one ranged read spanning them"""
+        start = run[0][1]
+        stream = await self.storage.get_stream(path, start, run[-1][1] + run[-1][0] - 1)
+        chunks = stream.chunks.__aiter__()
+        buffer, buffer_start = b"", start
+        for length, offset in run:
+            while length:
+                if offset >= buffer_start + len(buffer):
+                    buffer_start += len(buffer)
+                    buffer = await chunks.__anext__()
+                    continue
+                skip = offset - buffer_start
+                chunk = buffer[skip:skip + length]
+                yield chunk
+                offset, length = offset + len(chunk), length - len(chunk)
+
+    @staticmethod
+    async def _iter_bytes(data: bytes) -> AsyncIterator[bytes]:
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield data[start:start + CHUNK_SIZE]
+
+    async def _read(self, path: str) -> bytes:
+        stream = await self.storage.get_stream(path)
+        return b"".join([chunk async for chunk in stream.chunks])
+
+    async def _hash_object(self, path: str) -> Tuple[int, str]:
+        stream = await self.storage.get_stream(path)
+        digest = hashlib.sha256()
+        async for chunk in stream.chunks:
+            digest.update(chunk)
+        return stream.size, digest.hexdigest()
+
+    def _remember(self, version_id: uuid.UUID, data: bytes) -> None:
+        self._cache[version_id] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > settings.DOCUMENT_VERSION_CACHE_MB * 1024 * 1024:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
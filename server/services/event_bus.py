@@ -0,0 +1,125 @@
+# services/event_bus.py
+import asyncio
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+from sqlalchemy.orm import Session
+from config import get_settings
+from utils.pg_listener import PgListener, notify
+
+settings = get_settings()
+
+EVENTS_CHANNEL = "lex_events"
+
+# Sent instead of the events a subscriber missed; the client re-fetches
+RESYNC = "resync"
+
+
+def publish(db: Session, advocate_id: uuid.UUID, event_type: str, data: dict) -> None:
+    """
+    Queues an event for an advocate's live feed in the caller's transaction.
+    It is delivered to every API worker only if the transaction commits.
+    Keep data small (ids and statuses): NOTIFY payloads are limited to 8000 bytes.
+    """
+    payload = json.dumps(
+        {"advocate_id": str(advocate_id), "type": event_type, "data": data},
+        default=str
+    )
+    notify(db, EVENTS_CHANNEL, payload)
+
+
+@dataclass
+class Event:
+    type: str
+    data: dict = field(default_factory=dict)
+
+
+class Subscription:
+    """
+    One connected client's bounded queue.
+    A consumer too slow to keep up loses its backlog and gets a single
+    resync event instead, so memory per client stays bounded.
+    """
+
+    def __init__(self, advocate_id: str, maxsize: int):
+        self.advocate_id = advocate_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event: Event) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.resync()
+
+    def resync(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(Event(RESYNC))
+
+    async def get(self) -> Event:
+        return await self.queue.get()
+
+
+class EventBus:
+    """
+    Fans NOTIFY events out to the SSE clients connected to this process
+    through a single LISTEN connection, however many clients there are.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._listener: Optional[PgListener] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._listener is not None:
+                return
+            listener = PgListener([EVENTS_CHANNEL], self._dispatch, on_reconnect=self._resync_all)
+            await listener.start()
+            self._listener = listener
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.stop()
+            self._listener = None
+
+    async def subscribe(self, advocate_id: uuid.UUID) -> Subscription:
+        await self.start()
+        subscription = Subscription(str(advocate_id), self.queue_size)
+        self._subscriptions.setdefault(subscription.advocate_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.advocate_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.advocate_id]
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def _dispatch(self, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        subscriptions = self._subscriptions.get(message.get("advocate_id"))
+        if not subscriptions:
+            return
+        event = Event(message["type"], message.get("data") or {})
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def _resync_all(self) -> None:
+        # Events may have been missed while the listener was reconnecting
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.resync()
+
+
+event_bus = EventBus(queue_size=settings.EVENT_QUEUE_SIZE)
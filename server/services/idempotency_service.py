@@ -0,0 +1,180 @@
+# services/idempotency_service.py
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database import SessionLocal
+from models import IdempotencyKey, IdempotencyStatus
+from config import get_settings
+
+settings = get_settings()
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# How often a waiting duplicate checks on the original
+POLL_SECONDS = 0.2
+
+PRUNE_INTERVAL_SECONDS = 600
+
+
+def fingerprint(endpoint: str, params: Dict[str, Any]) -> str:
+    data = json.dumps({"endpoint": endpoint, **params}, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Runs a request at most once per Idempotency-Key.
+
+    The first request with a key claims it in its own short transaction,
+    so concurrent duplicates see the claim at once. They wait for the
+    original to finish and replay its stored response instead of doing the
+    work again. Client errors are stored and replayed too; server errors
+    release the key so a retry can run. Keys expire after
+    IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+
+    def __init__(self):
+        self._pruned_at = time.monotonic()
+
+    async def run(
+        self,
+        key: Optional[str],
+        advocate_id: uuid.UUID,
+        endpoint: str,
+        params: Dict[str, Any],
+        func: Callable[[], Awaitable[Any]],
+        response_model: Type[BaseModel]
+    ):
+        if key is None:
+            return await func()
+
+        request_fingerprint = fingerprint(endpoint, params)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            claimed, record = self._claim(advocate_id, key, request_fingerprint)
+            if claimed:
+                break
+            if record is None:
+                # Released between the insert and the select; try again
+                continue
+            if record.fingerprint != request_fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+            if record.status == IdempotencyStatus.COMPLETED:
+                return JSONResponse(
+                    record.response_body,
+                    status_code=record.response_status,
+                    headers={REPLAYED_HEADER: "true"}
+                )
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "5"}
+                )
+            await asyncio.sleep(POLL_SECONDS)
+
+        try:
+            result = await func()
+        except HTTPException as e:
+            if e.status_code >= 500:
+                self._release(advocate_id, key)
+            else:
+                self._complete(advocate_id, key, e.status_code, {"detail": jsonable_encoder(e.detail)})
+            raise
+        except BaseException:
+            self._release(advocate_id, key)
+            raise
+
+        body = jsonable_encoder(response_model.model_validate(result))
+        self._complete(advocate_id, key, status.HTTP_200_OK, body)
+        return JSONResponse(body)
+
+    def _claim(self, advocate_id: uuid.UUID, key: str, request_fingerprint: str):
+        """
+        Returns (True, None) when this request now owns the key, else (False,
+        the existing record), or (False, None) when the key was released
+        before it could be read
+        """
+        now = datetime.now(timezone.utc)
+        claim = {
+            "fingerprint": request_fingerprint,
+            "status": IdempotencyStatus.IN_PROGRESS,
+            "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+            "response_status": None,
+            "response_body": None,
+            "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        }
+        key_filter = (IdempotencyKey.advocate_id == advocate_id, IdempotencyKey.key == key)
+        with SessionLocal() as db:
+            self._prune(db)
+            inserted = db.execute(
+                pg_insert(IdempotencyKey)
+                .values(advocate_id=advocate_id, key=key, **claim)
+                .on_conflict_do_nothing()
+                .returning(IdempotencyKey.key)
+            ).first()
+            if inserted is None:
+                # Take over keys that expired or whose original died
+                inserted = db.execute(
+                    update(IdempotencyKey)
+                    .where(*key_filter, or_(
+                        IdempotencyKey.expires_at < func.now(),
+                        (IdempotencyKey.status == IdempotencyStatus.IN_PROGRESS)
+                        & (IdempotencyKey.locked_until < func.now())
+                    ))
+                    .values(**claim)
+                    .returning(IdempotencyKey.key)
+                ).first()
+            if inserted is not None:
+                db.commit()
+                return True, None
+            record = db.execute(select(IdempotencyKey).where(*key_filter)).scalar_one_or_none()
+            if record is not None:
+                db.expunge(record)
+            db.commit()
+        return False, record
+
+    def _complete(self, advocate_id: uuid.UUID, key: str, response_status: int, body: Any) -> None:
+        with SessionLocal() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.advocate_id == advocate_id, IdempotencyKey.key == key)
+                .values(
+                    status=IdempotencyStatus.COMPLETED,
+                    locked_until=None,
+                    response_status=response_status,
+                    response_body=body
+                )
+            )
+            db.commit()
+
+    def _release(self, advocate_id: uuid.UUID, key: str) -> None:
+        try:
+            with SessionLocal() as db:
+                db.execute(
+                    delete(IdempotencyKey)
+                    .where(IdempotencyKey.advocate_id == advocate_id, IdempotencyKey.key == key)
+                )
+                db.commit()
+        except Exception as e:
+            # The lock expires on its own after IDEMPOTENCY_LOCK_SECONDS
+            print(f"Could not release idempotency key {key}: {e}")
+
+    def _prune(self, db) -> None:
+        if time.monotonic() - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
@@ -0,0 +1,73 @@
+# services/page_extraction_service.py
+import asyncio
+from collections import OrderedDict
+from typing import List, Tuple
+from config import get_settings
+from services.document_service import DocumentService
+from services.rendition_service import rendition_pool
+from storage import get_storage
+from utils.pdf_pages import PageRangeError, extract_pages
+
+settings = get_settings()
+
+# Lifetime of the signed URL the extractor reads a remote PDF through
+SOURCE_URL_EXPIRES_SECONDS = 300
+
+
+class PageExtractionService:
+    """
+    Builds PDFs holding a subset of a document's pages.
+
+    The extractor runs in the rendition process pool and reads the source
+    through ranged reads, so only the trailer, cross-reference section and
+    the requested pages' objects are fetched, not the whole file. The
+    source's size, page count and startxref offset are kept in
+    document_metadata["pdf_index"]: requests past the last page are then
+    rejected without touching storage, and later extractions fetch the
+    cross-reference section in their first request. Recent extracts are
+    kept in a small in-process LRU bounded by PDF_PAGE_CACHE_MB.
+    """
+
+    def __init__(self):
+        self._cache: "OrderedDict[Tuple[str, Tuple[int, ...]], bytes]" = OrderedDict()
+        self._cached_bytes = 0
+
+    async def extract(self, document, pages: List[int]) -> bytes:
+        # The storage path changes whenever the content does, so it keys the cache
+        key = (document.s3_path, tuple(pages))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        index = (document.document_metadata or {}).get("pdf_index")
+        if index and any(page >= index["page_count"] for page in pages):
+            raise PageRangeError(index["page_count"], index)
+
+        storage = get_storage()
+        source = storage.local_path(document.s3_path) or await storage.sign(
+            document.s3_path, SOURCE_URL_EXPIRES_SECONDS
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            data, new_index = await loop.run_in_executor(rendition_pool(), extract_pages, source, pages, index)
+        except PageRangeError as e:
+            if e.index and e.index != index:
+                await asyncio.to_thread(DocumentService.merge_metadata, document.id, {"pdf_index": e.index})
+            raise
+        if new_index != index:
+            await asyncio.to_thread(DocumentService.merge_metadata, document.id, {"pdf_index": new_index})
+
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key: Tuple[str, Tuple[int, ...]], data: bytes) -> None:
+        limit = settings.PDF_PAGE_CACHE_MB * 1024 * 1024
+        if len(data) > limit // 4:
+            # One huge extract would push out everything else
+            return
+        self._cache[key] = data
+        self._cached_bytes += len(data)
+        while self._cached_bytes > limit:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_bytes -= len(evicted)
@@ -0,0 +1,128 @@
+# services/rendition_service.py
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+from sqlalchemy import select
+from database import SessionLocal
+from models import Document
+from config import get_settings
+from services.document_service import DocumentService
+from storage import StorageBackend, get_storage
+from utils.renditions import CONTENT_TYPE, can_render, render
+
+settings = get_settings()
+
+RENDITION_KINDS = ("thumbnail", "preview")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+# Renditions being generated in this process, by document
+_in_flight: Dict[uuid.UUID, asyncio.Task] = {}
+
+
+def rendition_pool() -> ProcessPoolExecutor:
+    """Process pool for PDFium and image work, created on first use"""
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process with live threads and
+        # database connections is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.RENDITION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_rendition_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def rendition_path(content_hash: str, kind: str) -> str:
+    return f"renditions/{content_hash[:2]}/{content_hash}/{kind}.webp"
+
+
+class RenditionService:
+    """
+    First-page thumbnails and previews of PDFs and images.
+
+    Renditions are generated after upload by a background job, or on demand
+    when one is requested before the job ran. They are stored in the same
+    storage backend as the originals under the SHA-256 of the original's
+    content, so identical files uploaded to several cases share them, and
+    recorded in the document's document_metadata. Concurrent requests for
+    the same document in one process share a single generation; across
+    processes a duplicate generation only rewrites identical objects.
+    """
+
+    @property
+    def storage(self) -> StorageBackend:
+        return get_storage()
+
+    async def ensure(self, document_id: uuid.UUID) -> Dict[str, str]:
+        """
+        Rendition paths of a document by kind, generating them when missing.
+        Empty when the document cannot be rendered.
+        """
+        task = _in_flight.get(document_id)
+        if task is None:
+            task = asyncio.create_task(self._generate(document_id))
+            _in_flight[document_id] = task
+            task.add_done_callback(lambda _: _in_flight.pop(document_id, None))
+        # Shielded so one cancelled request does not abort it for the others
+        return await asyncio.shield(task)
+
+    async def _generate(self, document_id: uuid.UUID) -> Dict[str, str]:
+        with SessionLocal() as db:
+            document = db.execute(
+                select(Document.s3_path, Document.mime_type, Document.file_size, Document.document_metadata)
+                .where(Document.id == document_id)
+            ).one_or_none()
+        if document is None:
+            return {}
+        metadata = document.document_metadata or {}
+        if "renditions" in metadata:
+            return metadata["renditions"]
+
+        max_bytes = settings.RENDITION_MAX_SOURCE_MB * 1024 * 1024
+        if not can_render(document.mime_type) or (document.file_size or 0) > max_bytes:
+            await asyncio.to_thread(DocumentService.merge_metadata, document_id, {"renditions": {}})
+            return {}
+
+        stream = await self.storage.get_stream(document.s3_path)
+        data = b"".join([chunk async for chunk in stream.chunks])
+        content_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        paths = {kind: rendition_path(content_hash, kind) for kind in RENDITION_KINDS}
+
+        # A file with the same content may have been rendered already
+        existing = await asyncio.gather(*(self.storage.head(path) for path in paths.values()))
+        if not all(existing):
+            sizes = {"thumbnail": settings.RENDITION_THUMBNAIL_PX, "preview": settings.RENDITION_PREVIEW_PX}
+            loop = asyncio.get_running_loop()
+            try:
+                renditions = await loop.run_in_executor(rendition_pool(), render, data, document.mime_type, sizes)
+            except BrokenProcessPool:
+                # A renderer process died; start a fresh pool next time
+                shutdown_rendition_pool()
+                raise
+            except Exception as e:
+                # Corrupt or unsupported files are not retried on every request
+                print(f"Error rendering document {document_id}: {str(e)}")
+                await asyncio.to_thread(
+                    DocumentService.merge_metadata, document_id, {"content_hash": content_hash, "renditions": {}}
+                )
+                return {}
+            await asyncio.gather(*(
+                self.storage.put_file(paths[kind], io.BytesIO(renditions[kind]), CONTENT_TYPE)
+                for kind in RENDITION_KINDS
+            ))
+
+        await asyncio.to_thread(DocumentService.merge_metadata, document_id, {"content_hash": content_hash, "renditions": paths})
+        return paths
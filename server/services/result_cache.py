@@ -0,0 +1,254 @@
+# services/result_cache.py
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config import get_settings
+from database import SessionLocal
+from utils.etag import etag_matches, not_modified
+from utils.pg_listener import PgListener, notify
+
+settings = get_settings()
+
+CACHE_CHANNEL = "lex_cache"
+
+# Identifies this process, so it can skip its own invalidation notices
+ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Response headers kept with a cached body
+CACHED_HEADERS = ("etag", "cache-control", "x-next-cursor")
+
+Key = Tuple[str, str, Optional[str], Hashable]
+
+
+@dataclass
+class CachedResult:
+    body: bytes
+    media_type: str
+    headers: Dict[str, str]
+    expires_at: float
+
+    def respond(self, request: Request) -> Response:
+        etag = self.headers.get("etag")
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
+        return Response(content=self.body, media_type=self.media_type, headers=self.headers)
+
+
+class ResultCache:
+    """
+    Bounded in-memory cache of list responses, per advocate.
+
+    Entries are keyed by (advocate, namespace, scope, params) and expire
+    after a TTL; the least recently used entry is evicted when full. Write
+    paths call invalidate(), which drops the affected entries once their
+    transaction commits, in this process directly and in other workers
+    through NOTIFY.
+
+    A load that overlaps an invalidation is not stored: store() compares the
+    invalidation epoch taken by begin() before the load's queries ran. A
+    load read from a replica shortly after an invalidation for its advocate
+    is not stored either, as the replica may not have replayed the write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Key, CachedResult]" = OrderedDict()
+        self._owners: Dict[Tuple[str, str], Set[Key]] = {}
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._listener: Optional[PgListener] = None
+        self._subscribers: List[Callable[[Optional[list]], None]] = []
+        # When each advocate's (None: everyone's) results were last invalidated
+        self._invalidated_at: Dict[Optional[str], float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(advocate_id, namespace: str, scope, params: Hashable) -> Key:
+        return (str(advocate_id), namespace, None if scope is None else str(scope), params)
+
+    def lookup(self, advocate_id, namespace: str, params: Hashable = (), scope=None) -> Optional[CachedResult]:
+        if not settings.RESULT_CACHE_ENABLED:
+            return None
+        key = self._key(advocate_id, namespace, scope, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def begin(self) -> int:
+        """Call before running the queries whose result will be stored"""
+        return self._epoch
+
+    def store(self, epoch: int, advocate_id, namespace: str, response: Response,
+              params: Hashable = (), scope=None, db: Optional[Session] = None) -> None:
+        """Pass the session the result was read with, so replica reads can be told apart"""
+        if not settings.RESULT_CACHE_ENABLED or response.status_code != 200:
+            return
+        if db is not None and db.info.get("replica") and self._recently_invalidated(advocate_id):
+            return
+        key = self._key(advocate_id, namespace, scope, params)
+        entry = CachedResult(
+            body=response.body,
+            media_type=response.media_type or "application/json",
+            headers={name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._owners.setdefault(key[:2], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _recently_invalidated(self, advocate_id) -> bool:
+        # A replica can fall up to the lag limit behind before the next
+        # health check notices and takes it out of rotation
+        window = settings.DB_REPLICA_MAX_LAG_SECONDS + settings.DB_REPLICA_CHECK_INTERVAL
+        cutoff = time.monotonic() - window
+        with self._lock:
+            return any(
+                self._invalidated_at.get(key, cutoff) > cutoff
+                for key in (str(advocate_id), None)
+            )
+
+    def _remove(self, key: Key) -> None:
+        self._entries.pop(key, None)
+        owned = self._owners.get(key[:2])
+        if owned is not None:
+            owned.discard(key)
+            if not owned:
+                del self._owners[key[:2]]
+
+    def invalidate(self, db: Session, advocate_id, namespace: str, scope=None) -> None:
+        """
+        Marks cached results stale as part of the session's transaction.
+        advocate_id None affects every advocate (e.g. a shared client changed);
+        scope None affects every scope within the namespace.
+        """
+        target = (None if advocate_id is None else str(advocate_id), namespace,
+                  None if scope is None else str(scope))
+        db.info.setdefault("cache_invalidations", set()).add(target)
+        if settings.RESULT_CACHE_NOTIFY:
+            notify(db, CACHE_CHANNEL, json.dumps({"origin": ORIGIN, "target": target}))
+
+    def subscribe(self, callback: Callable[[Optional[list]], None]) -> None:
+        """
+        Lets another per-process cache follow the same invalidations: the
+        callback gets every applied list of (advocate_id, namespace, scope)
+        targets, local or from NOTIFY, and None when everything is cleared.
+        """
+        self._subscribers.append(callback)
+
+    def apply(self, targets) -> None:
+        targets = list(targets)
+        for callback in self._subscribers:
+            callback(targets)
+        now = time.monotonic()
+        with self._lock:
+            self._epoch += 1
+            for advocate_id, _, _ in targets:
+                self._invalidated_at[advocate_id] = now
+            if len(self._invalidated_at) > self.max_entries:
+                cutoff = now - settings.DB_REPLICA_MAX_LAG_SECONDS - settings.DB_REPLICA_CHECK_INTERVAL
+                for key in [key for key, at in self._invalidated_at.items() if at < cutoff]:
+                    del self._invalidated_at[key]
+            for advocate_id, namespace, scope in targets:
+                if advocate_id is None:
+                    keys = [key for key in self._entries if key[1] == namespace]
+                else:
+                    keys = list(self._owners.get((advocate_id, namespace), ()))
+                for key in keys:
+                    if scope is None or key[2] == scope:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self) -> None:
+        for callback in self._subscribers:
+            callback(None)
+        with self._lock:
+            self._epoch += 1
+            # Invalidations may have been missed, so treat everyone as just invalidated
+            self._invalidated_at[None] = time.monotonic()
+            self._entries.clear()
+            self._owners.clear()
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        message = json.loads(payload)
+        if message.get("origin") != ORIGIN:
+            self.apply([tuple(message["target"])])
+
+    async def start(self) -> None:
+        """Subscribes to other workers' invalidations"""
+        enabled = settings.RESULT_CACHE_ENABLED or self._subscribers
+        if not enabled or not settings.RESULT_CACHE_NOTIFY or self._listener is not None:
+            return
+        # Invalidations may have been missed while disconnected
+        listener = PgListener([CACHE_CHANNEL], self._on_notify, on_reconnect=self.clear)
+        await listener.start()
+        self._listener = listener
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            await self._listener.stop()
+            self._listener = None
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.RESULT_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "cross_worker": self._listener is not None,
+            }
+
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS
+)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_invalidations(session):
+    targets = session.info.pop("cache_invalidations", None)
+    if targets:
+        result_cache.apply(targets)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("cache_invalidations", None)
@@ -0,0 +1,155 @@
+# services/similarity_service.py
+import asyncio
+import uuid
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+import httpx
+import numpy as np
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Case, Document, DocumentLshBucket, DocumentSignature
+from config import get_settings
+from services.rendition_service import rendition_pool, shutdown_rendition_pool
+from storage import get_storage
+from utils.minhash import SCHEME, band_buckets, can_fingerprint, fingerprint, similarity
+
+settings = get_settings()
+
+# Lifetime of the signed URL the fingerprinter downloads a source through
+SOURCE_URL_EXPIRES_SECONDS = 3600
+
+# Documents sharing a bucket with the target that are scored at most; only
+# reached when many near-identical documents exist
+MAX_CANDIDATES = 2000
+
+
+class SimilarityService:
+    """
+    Near-duplicate detection over document text.
+
+    Each document's text gets a MinHash signature, whose bands are hashed
+    into the document_lsh_buckets table. Documents sharing a bucket with
+    a target are its candidates; their signatures are compared with the
+    target's to estimate how much text they have in common. Lookups cost
+    one indexed query however many documents there are.
+
+    Documents are indexed after upload by a background job, on demand
+    when asked for before the job ran, or in bulk by
+    backfill_similarity.py. Index rows go with the document through
+    ON DELETE CASCADE.
+    """
+
+    async def index(self, document_id: uuid.UUID, pool: Optional[Executor] = None) -> Optional[np.ndarray]:
+        """
+        Computes and stores a document's signature; None when the document
+        is gone or has too little text to compare.
+        """
+        with SessionLocal() as db:
+            document = db.execute(
+                select(Document.s3_path, Document.mime_type, Document.file_size)
+                .where(Document.id == document_id)
+            ).one_or_none()
+        if document is None:
+            return None
+
+        signature, shingle_count = None, 0
+        max_bytes = settings.SIMILARITY_MAX_SOURCE_MB * 1024 * 1024
+        if can_fingerprint(document.mime_type) and (document.file_size or 0) <= max_bytes:
+            storage = get_storage()
+            source = storage.local_path(document.s3_path) or await storage.sign(
+                document.s3_path, SOURCE_URL_EXPIRES_SECONDS
+            )
+            loop = asyncio.get_running_loop()
+            try:
+                signature, shingle_count = await loop.run_in_executor(
+                    pool or rendition_pool(), fingerprint, source, document.mime_type
+                )
+            except BrokenProcessPool:
+                if pool is None:
+                    shutdown_rendition_pool()
+                raise
+            except (httpx.HTTPError, OSError):
+                # Storage trouble is worth retrying
+                raise
+            except Exception as e:
+                # Unreadable files are recorded so they are not tried again
+                print(f"Error fingerprinting document {document_id}: {str(e)}")
+
+        await asyncio.to_thread(self._store, document_id, signature, shingle_count)
+        return np.frombuffer(signature, dtype=np.uint32) if signature else None
+
+    @staticmethod
+    def _store(document_id: uuid.UUID, signature: Optional[bytes], shingle_count: int) -> None:
+        with SessionLocal() as db:
+            db.execute(delete(DocumentLshBucket).where(DocumentLshBucket.document_id == document_id))
+            values = dict(scheme=SCHEME, signature=signature, shingle_count=shingle_count)
+            db.execute(
+                insert(DocumentSignature)
+                .values(document_id=document_id, **values)
+                .on_conflict_do_update(index_elements=[DocumentSignature.document_id], set_=values)
+            )
+            if signature:
+                buckets = band_buckets(np.frombuffer(signature, dtype=np.uint32))
+                db.execute(
+                    insert(DocumentLshBucket).on_conflict_do_nothing(),
+                    [{"band": band, "bucket": bucket, "document_id": document_id} for band, bucket in enumerate(buckets)]
+                )
+            try:
+                db.commit()
+            except IntegrityError:
+                # The document was deleted meanwhile
+                db.rollback()
+
+    async def find_similar(
+        self,
+        document: Document,
+        advocate_id: uuid.UUID,
+        db: Session,
+        min_score: float,
+        limit: int
+    ) -> List[Tuple[Document, float]]:
+        """Near-duplicates of a document among the advocate's cases, most similar first"""
+        stored = db.execute(
+            select(DocumentSignature.scheme, DocumentSignature.signature)
+            .where(DocumentSignature.document_id == document.id)
+        ).one_or_none()
+        if stored is None or stored.scheme != SCHEME:
+            signature = await self.index(document.id)
+        else:
+            signature = np.frombuffer(stored.signature, dtype=np.uint32) if stored.signature else None
+        if signature is None:
+            return []
+
+        keys = [(band, bucket) for band, bucket in enumerate(band_buckets(signature))]
+        candidates = (
+            select(DocumentLshBucket.document_id)
+            .where(
+                tuple_(DocumentLshBucket.band, DocumentLshBucket.bucket).in_(keys),
+                DocumentLshBucket.document_id != document.id
+            )
+            .distinct()
+            .subquery()
+        )
+        rows = db.execute(
+            select(Document, DocumentSignature.signature)
+            .join(candidates, candidates.c.document_id == Document.id)
+            .join(DocumentSignature, DocumentSignature.document_id == Document.id)
+            .join(Case, Case.id == Document.case_id)
+            .where(Case.advocate_id == advocate_id, DocumentSignature.scheme == SCHEME)
+            .limit(MAX_CANDIDATES)
+        ).all()
+        if not rows:
+            return []
+
+        others = np.frombuffer(b"".join(row.signature for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+        scores = similarity(signature, others)
+        ranked = np.argsort(-scores, kind="stable")
+        return [
+            (rows[position].Document, float(scores[position]))
+            for position in ranked[:limit]
+            if scores[position] >= min_score
+        ]
@@ -0,0 +1,33 @@
+# storage/__init__.py
+from functools import lru_cache
+from config import get_settings
+from storage.base import (
+    CHUNK_SIZE, ObjectInfo, ObjectNotFound, ObjectStream, StorageBackend, StorageError, iter_file
+)
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    """The storage backend selected by STORAGE_BACKEND, created once per process"""
+    settings = get_settings()
+    backend = settings.STORAGE_BACKEND.lower()
+    if backend == "supabase":
+        from storage.supabase import SupabaseStorage
+        return SupabaseStorage(settings.storage_api_url, settings.SUPABASE_ANON_KEY, settings.SUPABASE_BUCKET)
+    if backend == "s3":
+        from storage.s3 import S3Storage
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            region=settings.AWS_REGION,
+            access_key=settings.AWS_ACCESS_KEY,
+            secret_key=settings.AWS_SECRET_KEY,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            part_size=settings.S3_MULTIPART_PART_SIZE_MB * 1024 * 1024,
+            part_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+            transfer_threads=settings.S3_TRANSFER_THREADS,
+            abort_after_hours=settings.S3_MULTIPART_ABORT_AFTER_HOURS
+        )
+    if backend == "local":
+        from storage.local import LocalStorage
+        return LocalStorage(settings.STORAGE_LOCAL_ROOT, settings.PUBLIC_API_URL, settings.JWT_SECRET_KEY)
+    raise ValueError(f"Unknown STORAGE_BACKEND {settings.STORAGE_BACKEND!r}; use supabase, s3 or local")
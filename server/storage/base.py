@@ -0,0 +1,111 @@
+# storage/base.py
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional
+
+# Bytes read or written per step when streaming objects
+CHUNK_SIZE = 1024 * 1024
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectNotFound(StorageError):
+    pass
+
+
+@dataclass
+class ObjectInfo:
+    path: str
+    size: int
+    content_type: Optional[str] = None
+    modified: Optional[datetime] = None
+
+
+@dataclass
+class ObjectStream:
+    """
+    An object's bytes, or a range of them, as they arrive.
+    start and end are inclusive offsets; size is the whole object's size.
+    """
+    chunks: AsyncIterator[bytes]
+    size: int
+    start: int
+    end: int
+    content_type: Optional[str] = None
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def partial(self) -> bool:
+        return self.length != self.size
+
+
+async def iter_file(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Reads a blocking file object in a worker thread, chunk by chunk"""
+    while chunk := await asyncio.to_thread(file.read, chunk_size):
+        yield chunk
+
+
+class StorageBackend(ABC):
+    """
+    Where document files live. Paths are relative keys such as
+    cases/<case_id>/documents/<uuid>-<filename>, identical across backends.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def put_stream(
+        self, path: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> int:
+        """Stores an object from a stream of chunks; returns its size"""
+
+    async def put_file(self, path: str, file: BinaryIO, content_type: Optional[str] = None) -> int:
+        """Stores an object from a blocking file object, e.g. an UploadFile's spooled file"""
+        return await self.put_stream(path, iter_file(file), content_type)
+
+    @abstractmethod
+    async def get_stream(self, path: str, start: int = 0, end: Optional[int] = None) -> ObjectStream:
+        """
+        Streams an object from start to end (inclusive, None for the end).
+        Raises ObjectNotFound when it does not exist.
+        """
+
+    @abstractmethod
+    async def delete(self, path: str) -> None:
+        """Removes an object; a missing object counts as deleted"""
+
+    @abstractmethod
+    async def sign(self, path: str, expires_in: int = 3600) -> str:
+        """A URL the browser can download the object from until it expires"""
+
+    @abstractmethod
+    async def head(self, path: str) -> Optional[ObjectInfo]:
+        """Size and type of an object, or None when it does not exist"""
+
+    @abstractmethod
+    async def list(self, prefix: str = "") -> List[ObjectInfo]:
+        """Objects whose path starts with prefix"""
+
+    def local_path(self, path: str) -> Optional[str]:
+        """
+        Filesystem path of the object when the backend keeps it on local
+        disk, so it can be sent without passing through Python.
+        """
+        return None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Transfer counters for the health endpoint"""
+        return {}
+
+    async def cleanup(self) -> None:
+        """Removes leftovers of transfers interrupted in earlier runs"""
+
+    async def close(self) -> None:
+        pass
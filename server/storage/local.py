@@ -0,0 +1,199 @@
+# storage/local.py
+import asyncio
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional
+from urllib.parse import quote, urlencode
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+from storage.base import CHUNK_SIZE, ObjectInfo, ObjectNotFound, ObjectStream, StorageBackend, StorageError
+
+# Prefix of files still being written; never listed or served
+PARTIAL_PREFIX = ".partial-"
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as plain files under a root directory, for on-prem installs and
+    for running the whole system offline.
+
+    Uploads are copied straight from the request's spooled file into a
+    temporary file next to the target and renamed into place, so readers
+    never see half-written objects. Downloads are served from the file by
+    LocalFileResponse. Signed URLs point at GET /storage/local/... on this
+    API and are checked with an HMAC.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, base_url: str, secret_key: str):
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        self._secret = secret_key.encode()
+
+    def _resolve(self, path: str) -> Path:
+        target = (self.root / path).resolve()
+        if self.root not in target.parents:
+            raise StorageError(f"Invalid object path: {path}")
+        return target
+
+    def _partial_path(self, target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target.parent / f"{PARTIAL_PREFIX}{uuid.uuid4().hex}"
+
+    async def put_stream(
+        self, path: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> int:
+        target = self._resolve(path)
+        partial = self._partial_path(target)
+        size = 0
+        out = await asyncio.to_thread(open, partial, "wb", buffering=CHUNK_SIZE)
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(out.write, chunk)
+                size += len(chunk)
+            await asyncio.to_thread(out.close)
+            os.replace(partial, target)
+        except BaseException:
+            out.close()
+            partial.unlink(missing_ok=True)
+            raise
+        return size
+
+    async def put_file(self, path: str, file: BinaryIO, content_type: Optional[str] = None) -> int:
+        target = self._resolve(path)
+        partial = self._partial_path(target)
+
+        def copy() -> int:
+            try:
+                with open(partial, "wb", buffering=CHUNK_SIZE) as out:
+                    shutil.copyfileobj(file, out, CHUNK_SIZE)
+                    size = out.tell()
+                os.replace(partial, target)
+                return size
+            except BaseException:
+                partial.unlink(missing_ok=True)
+                raise
+
+        # One thread hop for the whole copy instead of one per chunk
+        return await asyncio.to_thread(copy)
+
+    async def get_stream(self, path: str, start: int = 0, end: Optional[int] = None) -> ObjectStream:
+        target = self._resolve(path)
+        try:
+            file = await asyncio.to_thread(open, target, "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(path)
+        size = os.fstat(file.fileno()).st_size
+        end = size - 1 if end is None else min(end, size - 1)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                await asyncio.to_thread(file.seek, start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await asyncio.to_thread(file.read, min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+            finally:
+                file.close()
+
+        return ObjectStream(
+            chunks=chunks(), size=size, start=start, end=end,
+            content_type=mimetypes.guess_type(target.name)[0]
+        )
+
+    async def delete(self, path: str) -> None:
+        self._resolve(path).unlink(missing_ok=True)
+
+    def signature(self, path: str, expires: int) -> str:
+        return hmac.new(self._secret, f"{path}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def verify(self, path: str, expires: int, signature: str) -> bool:
+        return expires >= time.time() and hmac.compare_digest(self.signature(path, expires), signature)
+
+    async def sign(self, path: str, expires_in: int = 3600) -> str:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"expires": expires, "signature": self.signature(path, expires)})
+        return f"{self.base_url}/storage/local/{quote(path)}?{query}"
+
+    def _info(self, target: Path) -> ObjectInfo:
+        stat = target.stat()
+        return ObjectInfo(
+            path=target.relative_to(self.root).as_posix(),
+            size=stat.st_size,
+            content_type=mimetypes.guess_type(target.name)[0],
+            modified=datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+        )
+
+    async def head(self, path: str) -> Optional[ObjectInfo]:
+        target = self._resolve(path)
+        try:
+            return await asyncio.to_thread(self._info, target)
+        except FileNotFoundError:
+            return None
+
+    async def list(self, prefix: str = "") -> List[ObjectInfo]:
+        def walk() -> List[ObjectInfo]:
+            # Only the directory holding the prefix can contain matches
+            base = self.root / prefix
+            if not prefix.endswith("/"):
+                base = base.parent
+            base = base.resolve()
+            if (base != self.root and self.root not in base.parents) or not base.is_dir():
+                return []
+            found = []
+            for directory, _, files in os.walk(base):
+                for name in files:
+                    target = Path(directory) / name
+                    relative = target.relative_to(self.root).as_posix()
+                    if not name.startswith(PARTIAL_PREFIX) and relative.startswith(prefix):
+                        found.append(self._info(target))
+            return sorted(found, key=lambda info: info.path)
+
+        return await asyncio.to_thread(walk)
+
+    def local_path(self, path: str) -> Optional[str]:
+        target = self._resolve(path)
+        return str(target) if target.is_file() else None
+
+
+class LocalFileResponse(FileResponse):
+    """
+    FileResponse that hands whole-file responses to the server when it
+    supports zero-copy sending: the ASGI pathsend extension (the server
+    opens and streams the file itself) or zerocopysend (sendfile on an open
+    descriptor). Range requests and servers without either extension fall
+    back to FileResponse's chunked reads, in larger chunks.
+    """
+
+    chunk_size = CHUNK_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        headers = dict(scope.get("headers") or [])
+        zero_copy = "http.response.pathsend" in extensions or "http.response.zerocopysend" in extensions
+        if not zero_copy or b"range" in headers or scope["method"].upper() == "HEAD":
+            await super().__call__(scope, receive, send)
+            return
+
+        if self.stat_result is None:
+            self.set_stat_headers(await asyncio.to_thread(os.stat, self.path))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file.fileno()})
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,310 @@
+# storage/s3.py
+import asyncio
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from storage.base import CHUNK_SIZE, ObjectInfo, ObjectNotFound, ObjectStream, StorageBackend
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+MISSING_CODES = {"404", "NoSuchKey", "NotFound"}
+
+# S3 rejects multipart parts smaller than this, except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _missing(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in MISSING_CODES
+
+
+class TransferMetrics:
+    """Upload and download counters; only touched from the event loop"""
+
+    def __init__(self):
+        self.uploads = 0
+        self.multipart_uploads = 0
+        self.failed_uploads = 0
+        self.aborted_uploads = 0
+        self.parts_uploaded = 0
+        self.bytes_uploaded = 0
+        self.upload_seconds = 0.0
+        self.bytes_downloaded = 0
+        self.active_uploads = 0
+        self.active_parts = 0
+        self.last_upload_bytes_per_second = 0.0
+
+    def uploaded(self, size: int, seconds: float) -> None:
+        self.uploads += 1
+        self.bytes_uploaded += size
+        self.upload_seconds += seconds
+        if seconds > 0:
+            self.last_upload_bytes_per_second = size / seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "uploads": self.uploads,
+            "multipart_uploads": self.multipart_uploads,
+            "failed_uploads": self.failed_uploads,
+            "aborted_uploads": self.aborted_uploads,
+            "parts_uploaded": self.parts_uploaded,
+            "bytes_uploaded": self.bytes_uploaded,
+            "bytes_downloaded": self.bytes_downloaded,
+            "active_uploads": self.active_uploads,
+            "active_parts": self.active_parts,
+            # Average over completed uploads, while they were in flight
+            "upload_bytes_per_second": round(self.bytes_uploaded / self.upload_seconds) if self.upload_seconds else 0,
+            "last_upload_bytes_per_second": round(self.last_upload_bytes_per_second),
+        }
+
+
+class S3Storage(StorageBackend):
+    """
+    AWS S3 or an S3-compatible service (MinIO, Ceph, R2) through boto3.
+
+    boto3 is blocking, so every call runs on a thread pool of our own rather
+    than the default executor, which database work shares. Objects up to
+    one part in size are sent with a single PUT; larger ones as multipart
+    uploads with up to part_concurrency parts in flight per object, so one
+    big file uses the whole uplink. A failed or cancelled multipart upload
+    is aborted, and cleanup() aborts ones left behind by crashed processes,
+    since S3 keeps (and bills) their parts until then.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        region: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+        part_concurrency: int = 8,
+        transfer_threads: int = 16,
+        abort_after_hours: int = 24
+    ):
+        self.bucket = bucket
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.part_concurrency = max(part_concurrency, 1)
+        self.abort_after = timedelta(hours=abort_after_hours)
+        self.executor = ThreadPoolExecutor(max_workers=transfer_threads, thread_name_prefix="s3-transfer")
+        self.client = boto3.client(
+            's3',
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+            endpoint_url=endpoint_url,
+            # One pooled connection per transfer thread
+            config=Config(max_pool_connections=transfer_threads, retries={"mode": "standard"})
+        )
+        self.transfers = TransferMetrics()
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def _read_parts(self, file: BinaryIO) -> AsyncIterator[bytes]:
+        while chunk := await self._call(file.read, self.part_size):
+            yield chunk
+
+    async def put_file(self, path: str, file: BinaryIO, content_type: Optional[str] = None) -> int:
+        file.seek(0)
+        return await self.put_stream(path, self._read_parts(file), content_type)
+
+    async def put_stream(
+        self, path: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> int:
+        extra = {
+            "ContentType": content_type or "application/octet-stream",
+            "ServerSideEncryption": "AES256"
+        }
+        started = time.monotonic()
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts: Dict[int, str] = {}
+        tasks: List[asyncio.Task] = []
+        errors: List[BaseException] = []
+        slots = asyncio.Semaphore(self.part_concurrency)
+
+        async def send_part(number: int, data: bytes) -> None:
+            self.transfers.active_parts += 1
+            try:
+                response = await self._call(
+                    self.client.upload_part,
+                    Bucket=self.bucket, Key=path, UploadId=upload_id, PartNumber=number, Body=data
+                )
+            except BaseException as e:
+                errors.append(e)
+                raise
+            finally:
+                self.transfers.active_parts -= 1
+                slots.release()
+            parts[number] = response["ETag"]
+            self.transfers.parts_uploaded += 1
+
+        async def start_part(data: bytes) -> None:
+            # Waiting for a slot caps memory at part_concurrency buffered parts
+            await slots.acquire()
+            if errors:
+                # Stop reading the source as soon as a part has failed
+                slots.release()
+                raise errors[0]
+            tasks.append(asyncio.create_task(send_part(len(tasks) + 1, data)))
+
+        self.transfers.active_uploads += 1
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                # Strictly more than a part, so objects of one part or less are a single PUT
+                while len(buffer) > self.part_size:
+                    if upload_id is None:
+                        response = await self._call(
+                            self.client.create_multipart_upload, Bucket=self.bucket, Key=path, **extra
+                        )
+                        upload_id = response["UploadId"]
+                        self.transfers.multipart_uploads += 1
+                    data = bytes(buffer[:self.part_size])
+                    del buffer[:self.part_size]
+                    await start_part(data)
+
+            if upload_id is None:
+                await self._call(self.client.put_object, Bucket=self.bucket, Key=path, Body=bytes(buffer), **extra)
+            else:
+                if buffer:
+                    await start_part(bytes(buffer))
+                await asyncio.gather(*tasks)
+                await self._call(
+                    self.client.complete_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=path,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": [
+                        {"PartNumber": number, "ETag": parts[number]} for number in sorted(parts)
+                    ]}
+                )
+        except BaseException:
+            self.transfers.failed_uploads += 1
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if upload_id is not None:
+                # Shielded so a cancelled request still frees the stored parts
+                await asyncio.shield(self._abort(path, upload_id))
+            raise
+        finally:
+            self.transfers.active_uploads -= 1
+
+        self.transfers.uploaded(size, time.monotonic() - started)
+        return size
+
+    async def _abort(self, path: str, upload_id: str) -> None:
+        try:
+            await self._call(self.client.abort_multipart_upload, Bucket=self.bucket, Key=path, UploadId=upload_id)
+            self.transfers.aborted_uploads += 1
+        except Exception as e:
+            print(f"Error aborting multipart upload of {path}: {str(e)}")
+
+    async def cleanup(self) -> None:
+        """Aborts multipart uploads started more than abort_after ago"""
+        cutoff = datetime.now(timezone.utc) - self.abort_after
+
+        def stale_uploads() -> List[Dict]:
+            found = []
+            paginator = self.client.get_paginator("list_multipart_uploads")
+            for page in paginator.paginate(Bucket=self.bucket):
+                found.extend(upload for upload in page.get("Uploads", []) if upload["Initiated"] < cutoff)
+            return found
+
+        stale = await self._call(stale_uploads)
+        for upload in stale:
+            await self._abort(upload["Key"], upload["UploadId"])
+        if stale:
+            print(f"Aborted {len(stale)} incomplete multipart uploads")
+
+    async def get_stream(self, path: str, start: int = 0, end: Optional[int] = None) -> ObjectStream:
+        params = {"Bucket": self.bucket, "Key": path}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            response = await self._call(self.client.get_object, **params)
+        except ClientError as e:
+            if _missing(e):
+                raise ObjectNotFound(path)
+            raise
+
+        match = CONTENT_RANGE.match(response.get("ContentRange") or "")
+        if match:
+            start, end, size = (int(group) for group in match.groups())
+        else:
+            size = response["ContentLength"]
+            start, end = 0, size - 1
+        body = response["Body"]
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await self._call(body.read, CHUNK_SIZE):
+                    self.transfers.bytes_downloaded += len(chunk)
+                    yield chunk
+            finally:
+                body.close()
+
+        return ObjectStream(
+            chunks=chunks(), size=size, start=start, end=end,
+            content_type=response.get("ContentType")
+        )
+
+    async def delete(self, path: str) -> None:
+        # S3 deletes are idempotent: a missing key is not an error
+        await self._call(self.client.delete_object, Bucket=self.bucket, Key=path)
+
+    async def sign(self, path: str, expires_in: int = 3600) -> str:
+        # Presigning is computed locally, without a request
+        return self.client.generate_presigned_url(
+            'get_object',
+            Params={"Bucket": self.bucket, "Key": path},
+            ExpiresIn=expires_in
+        )
+
+    async def head(self, path: str) -> Optional[ObjectInfo]:
+        try:
+            response = await self._call(self.client.head_object, Bucket=self.bucket, Key=path)
+        except ClientError as e:
+            if _missing(e):
+                return None
+            raise
+        return ObjectInfo(
+            path=path,
+            size=response["ContentLength"],
+            content_type=response.get("ContentType"),
+            modified=response.get("LastModified")
+        )
+
+    async def list(self, prefix: str = "") -> List[ObjectInfo]:
+        def list_all() -> List[ObjectInfo]:
+            found = []
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+                for entry in page.get("Contents", []):
+                    found.append(ObjectInfo(path=entry["Key"], size=entry["Size"], modified=entry["LastModified"]))
+            return found
+
+        return await self._call(list_all)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "part_size": self.part_size,
+            "part_concurrency": self.part_concurrency,
+            **self.transfers.snapshot()
+        }
+
+    async def close(self) -> None:
+        self.executor.shutdown(wait=False)
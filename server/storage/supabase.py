@@ -0,0 +1,182 @@
+# storage/supabase.py
+import asyncio
+import re
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
+from storage.base import CHUNK_SIZE, ObjectInfo, ObjectNotFound, ObjectStream, StorageBackend, StorageError
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+# Objects listed per request
+LIST_PAGE_SIZE = 1000
+
+
+class SupabaseStorage(StorageBackend):
+    """Supabase Storage over its REST API"""
+
+    name = "supabase"
+
+    def __init__(self, storage_url: str, api_key: str, bucket: str):
+        self.storage_url = storage_url.rstrip("/")
+        self.bucket = bucket
+        self.headers = {"apikey": api_key, "Authorization": f"Bearer {api_key}"}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # One pooled client per event loop; the API and each worker run their own
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(30.0, read=300.0, write=300.0)
+            )
+            self._client_loop = loop
+        return self._client
+
+    def _object_url(self, path: str) -> str:
+        return f"{self.storage_url}/object/{self.bucket}/{path}"
+
+    @staticmethod
+    def _is_missing(response: httpx.Response) -> bool:
+        # Missing objects come back as 404, or as 400 with a not_found error
+        return response.status_code == 404 or (
+            response.status_code == 400 and "not_found" in response.text.lower()
+        )
+
+    async def put_stream(
+        self, path: str, chunks: AsyncIterator[bytes], content_type: Optional[str] = None
+    ) -> int:
+        size = 0
+
+        async def counted() -> AsyncIterator[bytes]:
+            nonlocal size
+            async for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+
+        # A raw body is streamed as it is read, unlike a multipart form
+        response = await self.client.post(
+            self._object_url(path),
+            content=counted(),
+            headers={"Content-Type": content_type or "application/octet-stream"}
+        )
+        if response.status_code != 200:
+            raise StorageError(f"Upload failed with status {response.status_code}: {response.text}")
+        return size
+
+    async def get_stream(self, path: str, start: int = 0, end: Optional[int] = None) -> ObjectStream:
+        headers = {}
+        if start or end is not None:
+            headers["Range"] = f"bytes={start}-{'' if end is None else end}"
+        request = self.client.build_request("GET", self._object_url(path), headers=headers)
+        response = await self.client.send(request, stream=True)
+        if response.status_code not in (200, 206):
+            await response.aread()
+            await response.aclose()
+            if self._is_missing(response):
+                raise ObjectNotFound(path)
+            raise StorageError(f"Download failed with status {response.status_code}")
+
+        match = CONTENT_RANGE.match(response.headers.get("content-range", ""))
+        if response.status_code == 206 and match:
+            first, last, size = (int(group) for group in match.groups())
+            skip = 0
+        else:
+            # The whole object came back; skip to the requested range ourselves
+            size = int(response.headers.get("content-length", 0))
+            first, skip = 0, start
+            last = size - 1
+        end = last if end is None else min(end, last)
+        start = max(start, first)
+
+        async def chunks() -> AsyncIterator[bytes]:
+            to_skip, remaining = skip, end - start + 1
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    if to_skip:
+                        dropped = min(to_skip, len(chunk))
+                        chunk, to_skip = chunk[dropped:], to_skip - dropped
+                    if chunk and remaining > 0:
+                        chunk = chunk[:remaining]
+                        remaining -= len(chunk)
+                        yield chunk
+                    if remaining <= 0:
+                        break
+            finally:
+                await response.aclose()
+
+        return ObjectStream(
+            chunks=chunks(), size=size, start=start, end=end,
+            content_type=response.headers.get("content-type")
+        )
+
+    async def delete(self, path: str) -> None:
+        response = await self.client.delete(self._object_url(path))
+        if response.status_code not in (200, 204) and not self._is_missing(response):
+            raise StorageError(f"Storage delete failed with status {response.status_code}: {response.text}")
+
+    async def sign(self, path: str, expires_in: int = 3600) -> str:
+        try:
+            response = await self.client.post(
+                f"{self.storage_url}/object/sign/{self.bucket}/{path}",
+                json={"expiresIn": expires_in}
+            )
+            if response.status_code != 200:
+                raise StorageError(f"Failed to generate signed URL: {response.status_code}")
+            signed_url = response.json().get("signedURL")
+            # Supabase answers with a path relative to the storage API
+            return signed_url if signed_url.startswith("http") else f"{self.storage_url}{signed_url}"
+        except Exception as e:
+            print(f"Error generating download URL: {str(e)}")
+            # Fallback to a public URL
+            return f"{self.storage_url}/object/public/{self.bucket}/{path}?download=true"
+
+    async def head(self, path: str) -> Optional[ObjectInfo]:
+        response = await self.client.head(self._object_url(path))
+        if self._is_missing(response):
+            return None
+        if response.status_code != 200:
+            raise StorageError(f"Storage head failed with status {response.status_code}")
+        return ObjectInfo(
+            path=path,
+            size=int(response.headers.get("content-length", 0)),
+            content_type=response.headers.get("content-type")
+        )
+
+    async def list(self, prefix: str = "") -> List[ObjectInfo]:
+        # Supabase lists one folder at a time, filtered by a name search
+        folder, _, search = prefix.rpartition("/")
+        found: List[ObjectInfo] = []
+        offset = 0
+        while True:
+            body: Dict = {"prefix": folder, "limit": LIST_PAGE_SIZE, "offset": offset}
+            if search:
+                body["search"] = search
+            response = await self.client.post(f"{self.storage_url}/object/list/{self.bucket}", json=body)
+            if response.status_code != 200:
+                raise StorageError(f"Storage list failed with status {response.status_code}")
+            entries = response.json()
+            for entry in entries:
+                path = f"{folder}/{entry['name']}" if folder else entry["name"]
+                if not path.startswith(prefix):
+                    continue
+                metadata = entry.get("metadata")
+                if metadata is None:
+                    # Folders have no metadata
+                    found.extend(await self.list(path + "/"))
+                else:
+                    found.append(ObjectInfo(
+                        path=path,
+                        size=int(metadata.get("size", 0)),
+                        content_type=metadata.get("mimetype")
+                    ))
+            if len(entries) < LIST_PAGE_SIZE:
+                return found
+            offset += LIST_PAGE_SIZE
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
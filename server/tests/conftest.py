@@ -0,0 +1,15 @@
+# tests/conftest.py
+import os
+
+# Settings the app refuses to start without; the tests never connect with them
+for name, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_NAME": "test",
+    "SUPABASE_PROJECT_ID": "test",
+    "SUPABASE_ANON_KEY": "test",
+    "SUPABASE_SERVICE_KEY": "test",
+    "JWT_SECRET_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,89 @@
+# tests/test_batch.py
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from auth import get_current_advocate
+from database import get_db
+from middleware.rate_limit import MemoryBucketStore, RateLimitMiddleware, RouteClass
+from models import Case
+from routers import batch, cases
+from services.result_cache import result_cache
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def app():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Case.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    app = FastAPI()
+    app.include_router(cases.router, prefix="/cases")
+    app.include_router(batch.router, prefix="/batch")
+    app.dependency_overrides[get_current_advocate] = lambda: SimpleNamespace(id=uuid.uuid4())
+    app.dependency_overrides[get_db] = lambda: session
+    result_cache.clear()
+    yield app
+    session.close()
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+def run_batch(client, *items):
+    response = client.post("/batch", json={"requests": list(items)})
+    assert response.status_code == 200
+    return {item["id"]: item for item in response.json()["responses"]}
+
+
+def test_batch_runs_reads(client):
+    responses = run_batch(client, {"id": "a", "path": "/cases/"}, {"id": "b", "path": "/cases/?limit=5"})
+    assert responses["a"]["status"] == 200
+    assert responses["a"]["body"] == []
+    assert responses["b"]["status"] == 200
+
+
+@pytest.mark.parametrize("method,path", [
+    ("POST", "/documents/upload/"),
+    ("POST", "/documents/upload/batch"),
+    ("POST", f"/documents/{uuid.uuid4()}/versions"),
+    ("POST", "/clients/import"),
+    ("POST", "/auth/token"),
+    ("POST", "/batch"),
+    ("GET", "/health/live"),
+])
+def test_batch_rejects_excluded_paths(client, method, path):
+    responses = run_batch(client, {"id": "x", "method": method, "path": path})
+    assert responses["x"]["status"] == 400
+
+
+def test_batch_allows_listing_versions(client):
+    # Only uploading a version is excluded; this app has no documents router
+    responses = run_batch(client, {"id": "x", "path": f"/documents/{uuid.uuid4()}/versions"})
+    assert responses["x"]["status"] == 404
+
+
+def test_batch_items_are_rate_limited(app):
+    app.add_middleware(
+        RateLimitMiddleware,
+        classes={"read": RouteClass("read", 0.001, 1), "write": RouteClass("write", 1, 10)},
+        store=MemoryBucketStore(),
+        secret_key="test",
+        algorithm="HS256",
+    )
+    responses = run_batch(TestClient(app), {"id": "a", "path": "/cases/"}, {"id": "b", "path": "/cases/"})
+    assert responses["a"]["status"] == 200
+    assert responses["b"]["status"] == 429
+    assert "retry-after" in responses["b"]["headers"]
@@ -0,0 +1,77 @@
+# tests/test_binary_delta.py
+import random
+import pytest
+from utils.binary_delta import BLOCK_SIZE, COPY, MAGIC, compose, make_delta, parse_delta
+
+
+def materialize(snapshot: bytes, pieces) -> bytes:
+    return b"".join(
+        snapshot[source:source + length] if isinstance(source, int) else bytes(source)
+        for length, source in pieces
+    )
+
+
+def edited(data: bytes, rng: random.Random, edits: int = 5) -> bytes:
+    data = bytearray(data)
+    for _ in range(edits):
+        position = rng.randrange(len(data))
+        if rng.random() < 0.5:
+            data[position:position] = rng.randbytes(rng.randrange(1, 200))
+        else:
+            del data[position:position + rng.randrange(1, 200)]
+    return bytes(data)
+
+
+@pytest.mark.parametrize("base,target", [
+    (b"", b""),
+    (b"", b"only inserts"),
+    (b"something", b""),
+    (b"short", b"shorter than a block"),
+    (bytes(range(256)) * 40, bytes(range(256)) * 40),
+])
+def test_round_trip_edge_cases(base, target):
+    assert materialize(base, compose(len(base), [make_delta(base, target)])) == target
+
+
+def test_round_trip_edited_file():
+    rng = random.Random(7)
+    base = rng.randbytes(200_000)
+    target = edited(base, rng)
+    delta = make_delta(base, target)
+    assert materialize(base, compose(len(base), [delta])) == target
+    # Mostly copies: far smaller than the file
+    assert len(delta) < len(target) // 10
+
+
+def test_moved_blocks_become_copies():
+    rng = random.Random(1)
+    first, second = rng.randbytes(10 * BLOCK_SIZE), rng.randbytes(10 * BLOCK_SIZE)
+    base, target = first + second, second + first
+    base_size, target_size, pieces = parse_delta(make_delta(base, target))
+    assert (base_size, target_size) == (len(base), len(target))
+    assert pieces == [(len(second), len(first)), (len(first), 0)]
+
+
+def test_compose_chain():
+    rng = random.Random(3)
+    versions = [rng.randbytes(50_000)]
+    for _ in range(4):
+        versions.append(edited(versions[-1], rng))
+    deltas = [make_delta(a, b) for a, b in zip(versions, versions[1:])]
+    for count in range(len(deltas) + 1):
+        pieces = compose(len(versions[0]), deltas[:count])
+        assert materialize(versions[0], pieces) == versions[count]
+
+
+def test_compose_rejects_delta_for_another_base():
+    delta = make_delta(b"a" * 100, b"b" * 100)
+    with pytest.raises(ValueError):
+        compose(50, [delta])
+
+
+def test_parse_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_delta(b"not a delta")
+    with pytest.raises(ValueError):
+        parse_delta(MAGIC + bytes([0, 0, 7]))
+    assert parse_delta(MAGIC + bytes([4, 4, COPY, 0, 4]))[2] == [(4, 0)]
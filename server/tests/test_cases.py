@@ -0,0 +1,89 @@
+# tests/test_cases.py
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from auth import get_current_advocate, get_read_db
+from database import get_db
+from models import Case
+from routers import cases
+from services.result_cache import result_cache
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Case.__table__.create(engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def advocate():
+    return SimpleNamespace(id=uuid.uuid4())
+
+
+@pytest.fixture
+def client(session, advocate):
+    app = FastAPI()
+    app.include_router(cases.router, prefix="/cases")
+    app.dependency_overrides[get_current_advocate] = lambda: advocate
+    app.dependency_overrides[get_read_db] = lambda: session
+    app.dependency_overrides[get_db] = lambda: session
+    result_cache.clear()
+    return TestClient(app)
+
+
+def test_list_cases_empty(client):
+    response = client.get("/cases/")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_list_cases_only_own(client, session, advocate):
+    session.add_all([
+        Case(advocate_id=advocate.id, client_id=uuid.uuid4(), cnr="DLCT010000012024",
+             court_case_title="A vs B", court_history=[{"purpose": "Appearance"}]),
+        Case(advocate_id=uuid.uuid4(), client_id=uuid.uuid4(), cnr="DLCT010000022024"),
+    ])
+    session.commit()
+
+    response = client.get("/cases/")
+    assert response.status_code == 200
+    [case] = response.json()
+    assert case["cnr"] == "DLCT010000012024"
+    assert case["court_case_title"] == "A vs B"
+    assert case["court_history"] == [{"purpose": "Appearance"}]
+    assert response.headers["etag"]
+
+    # The same list again is a 304
+    assert client.get("/cases/", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_get_case_etag(client, session, advocate):
+    case = Case(advocate_id=advocate.id, client_id=uuid.uuid4(), cnr="DLCT010000032024")
+    session.add(case)
+    session.commit()
+
+    response = client.get(f"/cases/{case.id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert client.get(f"/cases/{case.id}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/cases/{case.id}", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+    # Someone else's case is a 404 even with a matching tag
+    other = Case(advocate_id=uuid.uuid4(), client_id=uuid.uuid4(), cnr="DLCT010000042024")
+    session.add(other)
+    session.commit()
+    assert client.get(f"/cases/{other.id}", headers={"If-None-Match": "*"}).status_code == 404
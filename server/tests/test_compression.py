@@ -0,0 +1,123 @@
+# tests/test_compression.py
+import zlib
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from middleware.compression import (
+    CompressionMiddleware, _Encoder, available_encodings, brotli, negotiate, zstandard
+)
+
+TEXT = b"The quick brown fox jumps over the lazy dog. " * 200
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return zlib.decompress(data, 31)
+    if encoding == "br":
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_encoder_oneshot_round_trip(encoding):
+    encoder = _Encoder(encoding, 3)
+    assert decompress(encoding, encoder.oneshot(TEXT)) == TEXT
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_encoder_flushes_each_chunk(encoding):
+    encoder = _Encoder(encoding, 3)
+    first = encoder.compress(TEXT[:1000], flush=True)
+    # Everything written so far is decodable before the stream ends
+    if encoding == "gzip":
+        assert zlib.decompressobj(31).decompress(first) == TEXT[:1000]
+    rest = encoder.compress(TEXT[1000:], flush=True) + encoder.finish()
+    assert decompress(encoding, first + rest) == TEXT
+
+
+def test_negotiate():
+    assert negotiate("gzip, br;q=0.5", ["zstd", "br", "gzip"]) == "gzip"
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) in ("br", "gzip")
+    assert negotiate("*;q=0.1, gzip;q=0", ["gzip"]) is None
+    assert negotiate("identity", ["gzip"]) is None
+
+
+async def stream(request):
+    async def chunks():
+        for start in range(0, len(TEXT), 1000):
+            yield TEXT[start:start + 1000]
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+async def buffered(request):
+    return PlainTextResponse(TEXT.decode())
+
+
+async def partial(request):
+    return Response(TEXT[:5000], status_code=206, media_type="text/plain",
+                    headers={"Content-Range": f"bytes 0-4999/{len(TEXT)}"})
+
+
+async def no_transform(request):
+    return PlainTextResponse(TEXT.decode(), headers={"Cache-Control": "no-transform"})
+
+
+async def small(request):
+    return PlainTextResponse("short")
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/stream", stream), Route("/buffered", buffered), Route("/partial", partial),
+        Route("/no-transform", no_transform), Route("/small", small)
+    ])
+    return TestClient(CompressionMiddleware(app, minimum_size=500))
+
+
+@pytest.mark.parametrize("path", ["/stream", "/buffered"])
+def test_compresses_responses(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.content == TEXT
+
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_streamed_chunks_are_all_compressed(client, encoding):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": encoding}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == encoding
+    assert "content-length" not in response.headers
+    assert decompress(encoding, raw) == TEXT
+
+
+@pytest.mark.parametrize("path", ["/partial", "/no-transform", "/small"])
+def test_passes_through(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    if path == "/partial":
+        assert response.status_code == 206
+        assert response.content == TEXT[:5000]
+
+
+def test_identity_is_untouched(client):
+    response = client.get("/buffered", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == TEXT
+
+
+@pytest.mark.parametrize("path,accept", [
+    ("/buffered", "gzip"), ("/small", "gzip"), ("/buffered", "identity"), ("/small", ""), ("/partial", "gzip")
+])
+def test_compressible_responses_vary(client, path, accept):
+    # Sent plain here, but another client could get them compressed
+    response = client.get(path, headers={"Accept-Encoding": accept})
+    assert [v.strip().lower() for v in response.headers["vary"].split(",")].count("accept-encoding") == 1
+
+
+def test_no_transform_does_not_vary(client):
+    response = client.get("/no-transform", headers={"Accept-Encoding": "gzip"})
+    assert "vary" not in response.headers
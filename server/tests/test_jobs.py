@@ -0,0 +1,41 @@
+# tests/test_jobs.py
+import pytest
+from pydantic import BaseModel
+import jobs.handlers  # noqa: F401 - registers the job kinds
+from jobs.registry import _handlers, all_handlers, get_handler, job_handler
+
+
+class Payload(BaseModel):
+    value: int
+
+
+@pytest.fixture
+def kind():
+    yield "test.echo"
+    _handlers.pop("test.echo", None)
+
+
+def test_handlers_are_registered():
+    handlers = all_handlers()
+    assert handlers
+    for kind, handler in handlers.items():
+        assert handler.kind == kind
+        assert issubclass(handler.payload_model, BaseModel)
+        assert handler.max_attempts >= 1
+
+
+def test_job_handler_registers(kind):
+    @job_handler(kind, Payload, max_attempts=2, concurrency=1)
+    def echo(payload, context):
+        return {"value": payload.value}
+
+    handler = get_handler(kind)
+    assert handler.func is echo
+    assert (handler.payload_model, handler.max_attempts, handler.concurrency) == (Payload, 2, 1)
+    assert get_handler("test.missing") is None
+
+
+def test_duplicate_kind_is_rejected(kind):
+    job_handler(kind, Payload)(lambda payload, context: None)
+    with pytest.raises(ValueError):
+        job_handler(kind, Payload)(lambda payload, context: None)
@@ -0,0 +1,74 @@
+# tests/test_minhash.py
+import random
+import numpy as np
+from utils.minhash import (
+    BANDS, MIN_SHINGLES, NUM_PERM, SHINGLE_SIZE,
+    band_buckets, can_fingerprint, fingerprint, minhash, normalize, shingle_hashes, similarity
+)
+
+WORDS = ["court", "order", "hearing", "petition", "appeal", "section", "witness", "evidence",
+         "judgment", "bail", "counsel", "respondent", "adjourned", "filed", "notice", "decree"]
+
+
+def text(seed: int, words: int = 2000) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) + str(rng.randrange(100)) for _ in range(words))
+
+
+def signature(value: str) -> np.ndarray:
+    return minhash(shingle_hashes(value))
+
+
+def test_normalize():
+    assert normalize("  The  Court,\nordered:  BAIL_granted! ") == "the court ordered bail granted"
+
+
+def test_shingles():
+    assert len(shingle_hashes("a" * (SHINGLE_SIZE - 1))) == 0
+    # One distinct shingle however often it repeats
+    assert len(shingle_hashes("a" * 100)) == 1
+    # Formatting does not change the shingles
+    assert np.array_equal(shingle_hashes("Order of the Court."), shingle_hashes("order  OF the court"))
+
+
+def test_signature_shape():
+    value = signature(text(1))
+    assert value.dtype == np.uint32
+    assert value.shape == (NUM_PERM,)
+    assert len(band_buckets(value)) == BANDS
+
+
+def test_similarity_tracks_overlap():
+    original = text(1)
+    words = original.split()
+    near = " ".join(words[:1900] + text(2, 100).split())
+    unrelated = text(3)
+    signatures = np.stack([signature(original), signature(near), signature(unrelated)])
+    scores = similarity(signatures[0], signatures)
+    assert scores[0] == 1.0
+    assert scores[1] > 0.8
+    assert scores[2] < 0.2
+
+
+def test_identical_text_shares_every_band():
+    first, second = band_buckets(signature(text(4))), band_buckets(signature(text(4)))
+    assert first == second
+    assert not set(first) & set(band_buckets(signature(text(5))))
+
+
+def test_can_fingerprint():
+    assert can_fingerprint("application/pdf")
+    assert can_fingerprint("text/plain")
+    assert not can_fingerprint("image/png")
+    assert not can_fingerprint(None)
+
+
+def test_fingerprint_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(text(6))
+    value, shingles = fingerprint(str(path), "text/plain")
+    assert shingles >= MIN_SHINGLES
+    assert np.array_equal(np.frombuffer(value, dtype=np.uint32), signature(text(6)))
+
+    path.write_text("too short")
+    assert fingerprint(str(path), "text/plain") == (None, 1)
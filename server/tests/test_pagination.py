@@ -0,0 +1,46 @@
+# tests/test_pagination.py
+import base64
+import uuid
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from utils.pagination import decode_cursor, encode_cursor, escape_like
+
+
+def test_cursor_round_trip():
+    client_id = uuid.uuid4()
+    cursor = encode_cursor("Aarti Shah", client_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, str, uuid.UUID) == ["Aarti Shah", client_id]
+
+
+def test_cursor_round_trip_datetime():
+    created_at = datetime(2024, 5, 1, 10, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 7)
+    assert decode_cursor(cursor, datetime.fromisoformat, int) == [created_at, 7]
+
+
+def forged(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    forged(b"not json"),
+    forged(b"\xff\xfe"),
+    forged(b'{"a": "b"}'),
+    forged(b'["only one"]'),
+    forged(b'["a", "b", "c"]'),
+    forged(b'["a", 1]'),
+    forged(b'["a", "not-a-uuid"]'),
+])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, str, uuid.UUID)
+    assert error.value.status_code == 400
+
+
+def test_escape_like():
+    assert escape_like("50%_off\\") == "50\\%\\_off\\\\"
+    assert escape_like("plain") == "plain"
@@ -0,0 +1,57 @@
+# tests/test_pdf_pages.py
+import pypdfium2 as pdfium
+import pytest
+from utils.pdf_pages import PageRangeError, extract_pages, parse_page_ranges
+
+
+@pytest.mark.parametrize("spec,pages", [
+    ("1", [0]),
+    ("12-18", list(range(11, 18))),
+    ("1-3,7,10-12", [0, 1, 2, 6, 9, 10, 11]),
+    (" 4 - 5 , 2 ", [3, 4, 1]),
+    ("3-3", [2]),
+])
+def test_parse_page_ranges(spec, pages):
+    assert parse_page_ranges(spec, 50) == pages
+
+
+@pytest.mark.parametrize("spec", ["", "0", "5-2", "a-b", "1,,2", "1-2-3", "-3", "1;2"])
+def test_parse_page_ranges_rejects_bad_syntax(spec):
+    with pytest.raises(ValueError):
+        parse_page_ranges(spec, 50)
+
+
+def test_parse_page_ranges_limit():
+    assert len(parse_page_ranges("1-10", 10)) == 10
+    with pytest.raises(ValueError):
+        parse_page_ranges("1-10,12", 10)
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    document = pdfium.PdfDocument.new()
+    # Page n is n * 10 points wide, so extracted pages can be told apart
+    for number in range(1, 6):
+        document.new_page(number * 10, 100)
+    path = tmp_path / "source.pdf"
+    document.save(str(path))
+    document.close()
+    return str(path)
+
+
+def test_extract_pages(pdf):
+    data, index = extract_pages(pdf, [3, 0])
+    assert index["page_count"] == 5
+    assert index["startxref"] is not None
+    extract = pdfium.PdfDocument(data)
+    try:
+        assert [extract[i].get_width() for i in range(len(extract))] == [40, 10]
+    finally:
+        extract.close()
+
+
+def test_extract_pages_past_the_end(pdf):
+    with pytest.raises(PageRangeError) as error:
+        extract_pages(pdf, [5])
+    assert error.value.page_count == 5
+    assert error.value.index["page_count"] == 5
@@ -0,0 +1,124 @@
+# tests/test_rate_limit.py
+import asyncio
+import pytest
+from jose import jwt
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from middleware import rate_limit
+from middleware.rate_limit import ConcurrencyLimit, MemoryBucketStore, RateLimitMiddleware, RouteClass, classify
+
+SECRET = "test-secret"
+
+
+@pytest.mark.parametrize("method,path,expected", [
+    ("GET", "/cases/", "read"),
+    ("HEAD", "/clients/", "read"),
+    ("POST", "/clients/", "write"),
+    ("DELETE", "/documents/abc", "write"),
+    ("POST", "/batch", "write"),
+    ("POST", "/auth/token", "auth"),
+    ("POST", "/advocates/signup", "auth"),
+    ("GET", "/advocates/", "read"),
+    ("POST", "/documents/upload/", "upload"),
+    ("POST", "/documents/upload/batch", "upload"),
+    ("POST", "/documents/abc/versions", "upload"),
+    ("GET", "/documents/abc/versions", "read"),
+    ("POST", "/clients/import", "upload"),
+    ("POST", "/cases/fetch-court-details", "court"),
+    ("POST", "/cases/onboard", "court"),
+    ("GET", "/health/live", None),
+    ("OPTIONS", "/cases/", None),
+])
+def test_classify(method, path, expected):
+    assert classify(method, path) == expected
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_bucket_burst_then_refill(clock):
+    store = MemoryBucketStore()
+
+    def take(cost=1.0):
+        return asyncio.run(store.take("read:ip:1", rate=2.0, burst=3, cost=cost))
+
+    assert [take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: one token arrives in half a second at 2 per second
+    assert take() == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert take() == 0.0
+    # Refill is capped at the burst
+    clock[0] += 60
+    assert take(cost=3) == 0.0
+    assert take() == pytest.approx(0.5)
+
+
+def test_buckets_are_per_key(clock):
+    store = MemoryBucketStore()
+    assert asyncio.run(store.take("a", 1.0, 1)) == 0.0
+    assert asyncio.run(store.take("a", 1.0, 1)) > 0
+    assert asyncio.run(store.take("b", 1.0, 1)) == 0.0
+
+
+def test_concurrency_limit():
+    async def scenario():
+        limit = ConcurrencyLimit(1)
+        assert await limit.acquire(0.01)
+        assert not await limit.acquire(0.01)
+        limit.release()
+        assert await limit.acquire(0.01)
+
+    asyncio.run(scenario())
+
+
+async def ok(request):
+    return PlainTextResponse("ok")
+
+
+def client_for(classes) -> TestClient:
+    app = Starlette(routes=[Route("/cases/", ok), Route("/health/live", ok), Route("/auth/token", ok, methods=["POST"])])
+    return TestClient(RateLimitMiddleware(app, classes, MemoryBucketStore(), SECRET, "HS256", queue_timeout=0.01))
+
+
+def test_middleware_rejects_over_rate():
+    client = client_for({"read": RouteClass("read", 0.01, 2)})
+    assert [client.get("/cases/").status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get("/cases/")
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.json()["detail"]
+    # Probes are never limited
+    assert client.get("/health/live").status_code == 200
+
+
+def bearer(advocate_id):
+    return {"Authorization": f"Bearer {jwt.encode({'sub': advocate_id}, SECRET, algorithm='HS256')}"}
+
+
+def test_middleware_limits_each_advocate_separately():
+    client = client_for({"read": RouteClass("read", 0.01, 1)})
+    assert client.get("/cases/", headers=bearer("a")).status_code == 200
+    assert client.get("/cases/", headers=bearer("a")).status_code == 429
+    assert client.get("/cases/", headers=bearer("b")).status_code == 200
+
+
+def test_middleware_global_rate_is_shared():
+    client = client_for({"read": RouteClass("read", 0.01, 2, global_rate=0.01)})
+    assert client.get("/cases/", headers=bearer("a")).status_code == 200
+    assert client.get("/cases/", headers=bearer("b")).status_code == 200
+    # b has tokens of its own left, but the shared quota is spent
+    assert client.get("/cases/", headers=bearer("b")).status_code == 429
+
+
+def test_middleware_answers_503_without_a_slot():
+    limit = ConcurrencyLimit(1)
+    asyncio.run(limit.acquire(0.01))
+    client = client_for({"auth": RouteClass("auth", 100, 100, concurrency=limit)})
+    response = client.post("/auth/token")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
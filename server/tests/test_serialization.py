@@ -0,0 +1,42 @@
+# tests/test_serialization.py
+import json
+from typing import Optional
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.orm import declarative_base
+from utils.serialization import _projection, dumps
+
+Base = declarative_base()
+
+
+class Widget(Base):
+    __tablename__ = "widgets"
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+class WidgetResponse(BaseModel):
+    id: int
+    name: Optional[str] = None
+    tags: list = []
+
+
+class StrictWidgetResponse(BaseModel):
+    id: int
+    colour: str
+
+
+def test_projection_fills_defaults():
+    columns, defaults = _projection(Widget, WidgetResponse)
+    assert [column.key for column in columns] == ["id", "name"]
+    assert defaults == {"tags": []}
+
+
+def test_projection_rejects_required_field_without_column():
+    with pytest.raises(ValueError, match="colour"):
+        _projection(Widget, StrictWidgetResponse)
+
+
+def test_dumps():
+    assert json.loads(dumps({"id": 1, "name": None})) == {"id": 1, "name": None}
@@ -0,0 +1,217 @@
+# utils/binary_delta.py
+import bisect
+from typing import List, Tuple, Union
+import numpy as np
+
+# A delta rebuilds a target file from a base file with two operations:
+# copy a byte range of the base, or insert literal bytes.
+#
+#   MAGIC, varint base size, varint target size, then per operation
+#   0x00 varint offset varint length   (copy from the base)
+#   0x01 varint length, bytes          (insert)
+MAGIC = b"LXD1"
+COPY, INSERT = 0, 1
+
+# Shortest run of identical bytes turned into a copy; base blocks are
+# indexed at multiples of this
+BLOCK_SIZE = 32
+# Target bytes hashed per step, bounding memory on large files
+CHUNK_SIZE = 1024 * 1024
+
+# Multiplier of the polynomial window hash; odd, so invertible mod 2**64
+_MULTIPLIER = 0x100000001B3
+_INVERSE = pow(_MULTIPLIER, -1, 1 << 64)
+
+# A piece of a reconstructed file: its length and either an offset into
+# the snapshot the chain starts from, or literal bytes
+Piece = Tuple[int, Union[int, memoryview]]
+
+
+def _powers(value: int, count: int) -> np.ndarray:
+    powers = np.full(count, value, dtype=np.uint64)
+    powers[0] = 1
+    # Wraps mod 2**64, as the hash does
+    return np.cumprod(powers, out=powers)
+
+
+_POWERS = _powers(_MULTIPLIER, CHUNK_SIZE + BLOCK_SIZE)
+_INVERSES = _powers(_INVERSE, CHUNK_SIZE + BLOCK_SIZE)
+
+
+def _window_hashes(data: np.ndarray) -> np.ndarray:
+    """
+    Hash of the BLOCK_SIZE bytes starting at every offset of data, from
+    prefix sums: window i is (prefix[i + B] - prefix[i]) / multiplier**i.
+    """
+    prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data.astype(np.uint64) * _POWERS[:len(data)], out=prefix[1:])
+    return (prefix[BLOCK_SIZE:] - prefix[:-BLOCK_SIZE]) * _INVERSES[:len(data) - BLOCK_SIZE + 1]
+
+
+def _block_index(base: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashes of the base's aligned blocks, sorted, and the block each came from"""
+    hashes = []
+    for start in range(0, len(base) - BLOCK_SIZE + 1, CHUNK_SIZE):
+        chunk = base[start:start + CHUNK_SIZE + BLOCK_SIZE - 1]
+        hashes.append(_window_hashes(chunk)[::BLOCK_SIZE])
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    # Stable, so a block repeated in the base resolves to its first copy
+    order = np.argsort(hashes, kind="stable")
+    return hashes[order], order
+
+
+def _candidates(base: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Target offsets whose window hashes like an aligned base block, and that block"""
+    block_hashes, blocks = _block_index(base)
+    offsets, matches = [], []
+    if len(block_hashes):
+        for start in range(0, len(target) - BLOCK_SIZE + 1, CHUNK_SIZE):
+            hashes = _window_hashes(target[start:start + CHUNK_SIZE + BLOCK_SIZE - 1])
+            positions = np.minimum(np.searchsorted(block_hashes, hashes), len(block_hashes) - 1)
+            hits = np.flatnonzero(block_hashes[positions] == hashes)
+            offsets.append(hits + start)
+            matches.append(blocks[positions[hits]])
+    if not offsets:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(offsets), np.concatenate(matches)
+
+
+def _common_length(a: np.ndarray, a_start: int, b: np.ndarray, b_start: int) -> int:
+    """Length of the run where a from a_start equals b from b_start"""
+    length, step = 0, 4096
+    while True:
+        x = a[a_start + length:a_start + length + step]
+        y = b[b_start + length:b_start + length + step]
+        size = min(len(x), len(y))
+        mismatches = np.flatnonzero(x[:size] != y[:size])
+        if len(mismatches):
+            return length + int(mismatches[0])
+        length += size
+        if size < step:
+            return length
+        step = min(step * 2, CHUNK_SIZE)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def make_delta(base: bytes, target: bytes) -> bytes:
+    """
+    A delta that rebuilds target from base. Runs of at least BLOCK_SIZE
+    bytes found anywhere in base become copies; the rest is inserted.
+    Hashing is vectorized; the Python loop runs once per copy found.
+    """
+    base_array = np.frombuffer(base, dtype=np.uint8)
+    target_array = np.frombuffer(target, dtype=np.uint8)
+    offsets, blocks = _candidates(base_array, target_array)
+
+    out = bytearray(MAGIC + _varint(len(base)) + _varint(len(target)))
+    literal_start = position = 0
+    while True:
+        candidate = bisect.bisect_left(offsets, position)
+        if candidate == len(offsets):
+            break
+        start, base_start = int(offsets[candidate]), int(blocks[candidate]) * BLOCK_SIZE
+        length = _common_length(base_array, base_start, target_array, start)
+        if length < BLOCK_SIZE:
+            # Hash collision
+            position = start + 1
+            continue
+        # The match may begin before the window that found it
+        while start > literal_start and base_start > 0 and target[start - 1] == base[base_start - 1]:
+            start, base_start, length = start - 1, base_start - 1, length + 1
+        if start > literal_start:
+            out += bytes([INSERT]) + _varint(start - literal_start) + target[literal_start:start]
+        out += bytes([COPY]) + _varint(base_start) + _varint(length)
+        literal_start = position = start + length
+    if literal_start < len(target):
+        out += bytes([INSERT]) + _varint(len(target) - literal_start) + target[literal_start:]
+    return bytes(out)
+
+
+def _read_varint(data: memoryview, position: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def parse_delta(data: bytes) -> Tuple[int, int, List[Piece]]:
+    """Base size, target size and operations of a delta, as pieces against the base"""
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a delta")
+    base_size, position = _read_varint(view, len(MAGIC))
+    target_size, position = _read_varint(view, position)
+    pieces: List[Piece] = []
+    while position < len(view):
+        operation = view[position]
+        if operation == COPY:
+            offset, position = _read_varint(view, position + 1)
+            length, position = _read_varint(view, position)
+            pieces.append((length, offset))
+        elif operation == INSERT:
+            length, position = _read_varint(view, position + 1)
+            pieces.append((length, view[position:position + length]))
+            position += length
+        else:
+            raise ValueError(f"Unknown delta operation {operation}")
+    return base_size, target_size, pieces
+
+
+def compose(snapshot_size: int, deltas: List[bytes]) -> List[Piece]:
+    """
+    Resolves a chain of deltas, each against the file the previous one
+    produced, into pieces of the last file: ranges of the snapshot the
+    chain starts from and literal bytes. Nothing is materialized, so the
+    result can be streamed with range reads of the snapshot.
+    """
+    pieces: List[Piece] = [(snapshot_size, 0)] if snapshot_size else []
+    for delta in deltas:
+        base_size, target_size, operations = parse_delta(delta)
+        if base_size != sum(length for length, _ in pieces):
+            raise ValueError("Delta does not apply to the previous version")
+        starts = []
+        position = 0
+        for length, _ in pieces:
+            starts.append(position)
+            position += length
+
+        resolved: List[Piece] = []
+
+        def add(length: int, source) -> None:
+            if resolved and isinstance(source, int) and isinstance(resolved[-1][1], int) \
+                    and resolved[-1][1] + resolved[-1][0] == source:
+                resolved[-1] = (resolved[-1][0] + length, resolved[-1][1])
+            else:
+                resolved.append((length, source))
+
+        for length, source in operations:
+            if not isinstance(source, int):
+                add(length, source)
+                continue
+            # Copy of the previous file's range [source, source + length)
+            index = bisect.bisect_right(starts, source) - 1
+            while length:
+                piece_length, piece_source = pieces[index]
+                skip = source - starts[index]
+                take = min(piece_length - skip, length)
+                if isinstance(piece_source, int):
+                    add(take, piece_source + skip)
+                else:
+                    add(take, piece_source[skip:skip + take])
+                source, length, index = source + take, length - take, index + 1
+        if sum(length for length, _ in resolved) != target_size:
+            raise ValueError("Delta is corrupt")
+        pieces = resolved
+    return pieces
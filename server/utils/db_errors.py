@@ -0,0 +1,28 @@
+# utils/db_errors.py
+from typing import NoReturn, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+# Unique constraints (Postgres' default <table>_<column>_key names) and the
+# message shown when a write collides with one
+UNIQUE_VIOLATIONS = {
+    "advocates_email_key": "Email already registered",
+    "advocates_bar_number_key": "Bar number already registered",
+    "clients_email_key": "A client with this email already exists",
+}
+
+def constraint_name(error: IntegrityError) -> Optional[str]:
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None)
+
+def raise_integrity_error(error: IntegrityError, detail: str) -> NoReturn:
+    """
+    Turns a constraint violation into a 400.
+    Writes rely on the database's constraints rather than checking first,
+    which would cost a query and still race with concurrent writes.
+    """
+    name = constraint_name(error)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=UNIQUE_VIOLATIONS.get(name, f"{detail}: violates {name}" if name else detail)
+    )
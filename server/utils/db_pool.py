@@ -0,0 +1,237 @@
+# utils/db_pool.py
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Latest samples kept for percentiles
+SAMPLE_SIZE = 2048
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(math.ceil(fraction * len(ordered))) - 1)]
+
+
+class PoolStats:
+    """Counters and recent samples for one engine's connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.stale_pings = 0
+        self.peak_checked_out = 0
+        self.wait_ms = deque(maxlen=SAMPLE_SIZE)
+        self.hold_ms = deque(maxlen=SAMPLE_SIZE)
+        self.concurrency = deque(maxlen=SAMPLE_SIZE)
+        self.age_s = deque(maxlen=SAMPLE_SIZE)
+
+    def record_wait(self, seconds: float, checked_out: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms.append(seconds * 1000)
+            self.concurrency.append(checked_out)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def reset_usage(self) -> None:
+        """Forgets checkout samples, e.g. the artificial burst of a warmup"""
+        with self._lock:
+            self.checkouts = 0
+            self.peak_checked_out = 0
+            for samples in (self.wait_ms, self.hold_ms, self.concurrency, self.age_s):
+                samples.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            wait = list(self.wait_ms)
+            hold = list(self.hold_ms)
+            concurrency = list(self.concurrency)
+            age = list(self.age_s)
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "pings": self.pings,
+                "stale_connections_replaced": self.stale_pings,
+                "peak_checked_out": self.peak_checked_out,
+                "checkout_wait_ms": {
+                    "p50": round(_percentile(wait, 0.5), 3),
+                    "p95": round(_percentile(wait, 0.95), 3),
+                    "p99": round(_percentile(wait, 0.99), 3),
+                    "max": round(max(wait, default=0.0), 3),
+                },
+                "hold_ms": {
+                    "p50": round(_percentile(hold, 0.5), 3),
+                    "p95": round(_percentile(hold, 0.95), 3),
+                },
+                "concurrency": {
+                    "p50": _percentile(concurrency, 0.5),
+                    "p95": _percentile(concurrency, 0.95),
+                    "max": max(concurrency, default=0),
+                },
+                "connection_age_s": {
+                    "p50": round(_percentile(age, 0.5), 1),
+                    "max": round(max(age, default=0.0), 1),
+                },
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that measures how long each checkout waited for a connection
+    and how many connections were in use when it got one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_wait(time.perf_counter() - started, self.checkedout())
+        return record
+
+    def recreate(self):
+        # Keep collecting into the same stats when the pool is recreated
+        # after a disconnect
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def instrument_engine(engine: Engine, ping_idle_seconds: float) -> None:
+    """
+    Adds connection age and hold time tracking, and cheap liveness checks:
+    a connection is pinged only when it sat idle in the pool for longer than
+    ping_idle_seconds, which is when the server or a proxy may have dropped
+    it. Busy connections are handed out without an extra round trip, unlike
+    pool_pre_ping which pings on every checkout.
+    """
+    stats: PoolStats = engine.pool.stats
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        connection_record.info["checked_in_at"] = time.monotonic()
+        with stats._lock:
+            stats.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        now = time.monotonic()
+        info = connection_record.info
+        if ping_idle_seconds and now - info.get("checked_in_at", now) > ping_idle_seconds:
+            with stats._lock:
+                stats.pings += 1
+            try:
+                cursor = dbapi_connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception:
+                with stats._lock:
+                    stats.stale_pings += 1
+                # Tells the pool to discard this connection and try another
+                raise exc.DisconnectionError("Idle connection was closed by the server")
+        info["checked_out_at"] = now
+        with stats._lock:
+            stats.age_s.append(now - info.get("connected_at", now))
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        now = time.monotonic()
+        info = connection_record.info
+        checked_out_at = info.pop("checked_out_at", None)
+        info["checked_in_at"] = now
+        if checked_out_at is not None:
+            with stats._lock:
+                stats.hold_ms.append((now - checked_out_at) * 1000)
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        with stats._lock:
+            stats.invalidations += 1
+
+
+def warm_pool(engine: Engine, connections: int) -> int:
+    """
+    Opens up to connections pooled connections ahead of traffic, so the
+    first requests after a start or deploy don't pay TCP, TLS and auth setup.
+    Returns how many were opened.
+    """
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.raw_connection())
+    except Exception as e:
+        print(f"Pool warmup stopped after {len(opened)} connections: {e}")
+    finally:
+        for connection in opened:
+            connection.close()
+    stats: Optional[PoolStats] = getattr(engine.pool, "stats", None)
+    if stats is not None:
+        # The warmup burst says nothing about real demand
+        stats.reset_usage()
+    return len(opened)
+
+
+def pool_status(engine: Engine) -> Dict:
+    pool = engine.pool
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is not None:
+        status["stats"] = stats.snapshot()
+        status["advice"] = advise(pool, stats)
+    return status
+
+
+def advise(pool: QueuePool, stats: PoolStats) -> Dict:
+    """
+    Recommends pool_size and max_overflow from observed concurrency:
+    the pool should hold the typical busy-time demand (p95 of connections
+    in use), with overflow covering the observed peak.
+    """
+    snapshot = stats.snapshot()
+    if snapshot["checkouts"] < 100:
+        return {"reason": "Not enough traffic observed yet"}
+
+    p95 = snapshot["concurrency"]["p95"]
+    peak = snapshot["peak_checked_out"]
+    pool_size = max(1, math.ceil(p95 * 1.2))
+    max_overflow = max(0, math.ceil(peak * 1.2) - pool_size)
+    if stats.timeouts:
+        reason = "Checkouts timed out waiting for a connection; the pool is too small"
+        max_overflow = max(max_overflow, pool.size() + pool._max_overflow - pool_size)
+    elif snapshot["checkout_wait_ms"]["p95"] > 5:
+        reason = "Checkouts are queueing for connections"
+    elif pool_size < pool.size():
+        reason = "Fewer connections are in use than the pool keeps open"
+    else:
+        reason = "Sized from observed concurrency"
+    return {"pool_size": pool_size, "max_overflow": max_overflow, "reason": reason}
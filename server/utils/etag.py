@@ -0,0 +1,124 @@
+# utils/etag.py
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response, status
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a weak ETag from the given parts.
+    The tag is weak because it identifies the data, not the exact bytes
+    on the wire (those change with compression or field ordering).
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:24]}"'
+
+
+def _timestamp(value) -> str:
+    return value.isoformat() if value is not None else ""
+
+
+def collection_etag(query: Query, model, *extra) -> str:
+    """
+    Computes the ETag of a collection as (max(updated_at), count) in SQL.
+    The filters of the given query are reused, but no rows are loaded.
+    Extra parts (e.g. a page cursor) distinguish views of the same collection.
+    """
+    last_updated, count = query.with_entities(
+        func.max(model.updated_at),
+        func.count(model.id)
+    ).order_by(None).one()
+    return make_etag(model.__tablename__, _timestamp(last_updated), count, *extra)
+
+
+def collection_etag_from_rows(rows: Iterable, model) -> str:
+    """
+    Computes the same ETag as collection_etag from rows that are already loaded,
+    so unconditional requests don't pay for an extra query.
+    Accepts ORM objects as well as projected dicts.
+    """
+    rows = list(rows)
+    last_updated = max(
+        (row["updated_at"] if isinstance(row, dict) else row.updated_at for row in rows),
+        default=None
+    )
+    return make_etag(model.__tablename__, _timestamp(last_updated), len(rows))
+
+
+def page_etag_from_rows(rows: Iterable, model, *extra) -> str:
+    """
+    Computes the ETag of one page of a collection from its loaded rows.
+    Every row's id and updated_at is included, so the tag changes exactly
+    when the page does, without an aggregate over the whole collection.
+    Accepts ORM objects as well as projected dicts.
+    """
+    parts = [
+        f"{row['id']}@{_timestamp(row['updated_at'])}" if isinstance(row, dict)
+        else f"{row.id}@{_timestamp(row.updated_at)}"
+        for row in rows
+    ]
+    return make_etag(model.__tablename__, *extra, *parts)
+
+
+def resource_etag(query: Query, model) -> Optional[str]:
+    """
+    Computes the ETag of a single resource from (id, updated_at) in SQL.
+    Returns None if the query matches no row.
+    """
+    row = query.with_entities(model.id, model.updated_at).first()
+    if row is None:
+        return None
+    return make_etag(model.__tablename__, row.id, _timestamp(row.updated_at))
+
+
+def resource_etag_from_row(row, model) -> str:
+    """Computes the same ETag as resource_etag from a loaded row"""
+    return make_etag(model.__tablename__, row.id, _timestamp(row.updated_at))
+
+
+def is_conditional(request: Request) -> bool:
+    """Whether the client sent an If-None-Match header worth checking"""
+    return bool(request.headers.get("if-none-match"))
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Weak comparison of the If-None-Match header against the current ETag,
+    as required for GET/HEAD by RFC 9110.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """
+    Attaches the ETag to a response.
+    no-cache makes the browser revalidate on every use instead of serving
+    a stale list, which is what makes If-None-Match worthwhile.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Returns an empty 304 response.
+    Returning a Response directly skips response_model validation entirely.
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"}
+    )
@@ -0,0 +1,32 @@
+# utils/http_range.py
+import re
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+
+BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single-range Range header into inclusive (start, end) offsets.
+    Returns None when the header should be ignored (multiple or malformed
+    ranges), which means serving the whole object. Raises 416 when the
+    range lies outside the object.
+    """
+    match = BYTE_RANGE.fullmatch(header.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(match.group(2)))
+        end = size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
@@ -0,0 +1,114 @@
+# utils/minhash.py
+import os
+import re
+import tempfile
+from typing import List, Optional, Tuple
+import numpy as np
+from utils.pdf_bundle import download
+
+# Bumped when any parameter below changes, so stored signatures are rebuilt
+SCHEME = 1
+
+SHINGLE_SIZE = 9  # Characters per shingle, after normalization
+NUM_PERM = 128
+# 16 bands of 8 rows: documents sharing about 70% of their shingles are
+# likely to land in a common bucket, ones sharing under 40% rarely do
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Fewer shingles than this is too little text to compare meaningfully
+MIN_SHINGLES = 50
+# Only this much text is shingled; later text rarely decides a duplicate
+MAX_TEXT_CHARS = 2_000_000
+
+# Shingle hashes are multiplied in blocks of this many, bounding memory
+BLOCK = 4096
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(0x5EED)
+# Below 2**31 so a * x + b cannot overflow 64 bits for 32-bit x
+_A = _rng.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+_SHINGLE_POWERS = np.array([pow(257, SHINGLE_SIZE - 1 - i, 1 << 64) for i in range(SHINGLE_SIZE)], dtype=np.uint64)
+_BAND_POWERS = np.array([pow(1_000_003, ROWS - 1 - i, 1 << 64) for i in range(ROWS)], dtype=np.uint64)
+
+TEXT_TYPES = ("application/pdf",)
+
+
+def can_fingerprint(mime_type: Optional[str]) -> bool:
+    return bool(mime_type) and (mime_type in TEXT_TYPES or mime_type.startswith("text/"))
+
+
+def normalize(text: str) -> str:
+    """Lower case with runs of whitespace and punctuation collapsed to one space"""
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Distinct 32-bit hashes of the text's character shingles"""
+    data = np.frombuffer(normalize(text)[:MAX_TEXT_CHARS].encode("utf-8"), dtype=np.uint8)
+    if len(data) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(data, SHINGLE_SIZE).astype(np.uint64)
+    hashes = windows @ _SHINGLE_POWERS
+    # Finalizer of MurmurHash3, so similar shingles get unrelated hashes
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= np.uint64(0xFF51AFD7ED558CCD)
+    hashes ^= hashes >> np.uint64(33)
+    return np.unique(hashes >> np.uint64(32))
+
+
+def minhash(hashes: np.ndarray) -> np.ndarray:
+    """NUM_PERM minimum hashes under random linear permutations"""
+    signature = np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), BLOCK):
+        block = hashes[start:start + BLOCK, np.newaxis]
+        np.minimum(signature, ((block * _A + _B) % _MERSENNE_PRIME).min(axis=0), out=signature)
+    return (signature & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit bucket per band, ready for a BIGINT column"""
+    bands = signature.astype(np.uint64).reshape(BANDS, ROWS)
+    return (bands @ _BAND_POWERS).view(np.int64).tolist()
+
+
+def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of one signature to each row of others"""
+    return (others == signature).mean(axis=1)
+
+
+def extract_text(path: str, mime_type: str) -> str:
+    if mime_type != "application/pdf":
+        with open(path, "rb") as file:
+            return file.read(MAX_TEXT_CHARS * 4).decode("utf-8", errors="replace")
+    import pypdfium2 as pdfium
+    document = pdfium.PdfDocument(path)
+    try:
+        parts, length = [], 0
+        for page in document:
+            text = page.get_textpage().get_text_bounded()
+            parts.append(text)
+            length += len(text)
+            if length >= MAX_TEXT_CHARS:
+                break
+        return "\n".join(parts)
+    finally:
+        document.close()
+
+
+def fingerprint(source: str, mime_type: str) -> Tuple[Optional[bytes], int]:
+    """
+    The MinHash signature of a document's text and its shingle count.
+    source is a file path or a URL. The signature is None for documents
+    with too little text, such as scanned PDFs. Runs in a worker process.
+    """
+    if source.startswith(("http://", "https://")):
+        with tempfile.TemporaryDirectory(prefix="fingerprint-") as workdir:
+            path = os.path.join(workdir, "source")
+            download(source, path)
+            hashes = shingle_hashes(extract_text(path, mime_type))
+    else:
+        hashes = shingle_hashes(extract_text(source, mime_type))
+    if len(hashes) < MIN_SHINGLES:
+        return None, len(hashes)
+    return minhash(hashes).tobytes(), len(hashes)
@@ -0,0 +1,40 @@
+# utils/pagination.py
+import base64
+import json
+from typing import Any, Callable, List
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the sort key of the last row on a page as an opaque cursor.
+    Clients pass it back unchanged to get the next page.
+    """
+    raw = json.dumps([str(value) for value in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[str], Any]) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor, rejecting anything malformed.
+    Each value is converted by the parser at its position (e.g. str,
+    uuid.UUID), so a forged cursor is a 400 rather than a database error.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("Unexpected cursor shape")
+        if not all(isinstance(value, str) for value in values):
+            raise ValueError("Unexpected cursor value")
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def escape_like(term: str) -> str:
+    """Escapes LIKE wildcards so user input is matched literally (escape char is a backslash)"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -0,0 +1,175 @@
+# utils/pdf_bundle.py
+import ctypes
+import math
+import os
+import uuid
+from typing import List, Optional, Tuple
+import httpx
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_raw
+from PIL import Image, ImageOps
+
+# Index pages are A4 portrait, in points
+PAGE_WIDTH, PAGE_HEIGHT = 595.0, 842.0
+MARGIN = 56.0
+ROWS_PER_INDEX_PAGE = 28
+ROW_HEIGHT = 22.0
+
+FONT = b"Helvetica"
+BOLD_FONT = b"Helvetica-Bold"
+
+# Page numbers sit this far above the bottom edge
+NUMBER_OFFSET = 20.0
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def index_page_count(entries: int) -> int:
+    return max(1, math.ceil(entries / ROWS_PER_INDEX_PAGE))
+
+
+def _text(document: pdfium.PdfDocument, text: str, size: float, font: bytes = FONT):
+    """A text object at the origin and its width"""
+    handle = pdfium_raw.FPDFText_LoadStandardFont(document.raw, font)
+    obj = pdfium_raw.FPDFPageObj_CreateTextObj(document.raw, handle, ctypes.c_float(size))
+    encoded = (text + "\x00").encode("utf-16-le")
+    pdfium_raw.FPDFText_SetText(obj, (ctypes.c_ushort * (len(encoded) // 2)).from_buffer_copy(encoded))
+    left, bottom, right, top = (ctypes.c_float() for _ in range(4))
+    pdfium_raw.FPDFPageObj_GetBounds(obj, left, bottom, right, top)
+    return obj, right.value - left.value
+
+
+def _place(page: pdfium.PdfPage, obj, x: float, y: float) -> None:
+    pdfium_raw.FPDFPageObj_Transform(obj, 1, 0, 0, 1, x, y)
+    pdfium_raw.FPDFPage_InsertObject(page.raw, obj)
+
+
+def _write(document, page, text: str, x: float, y: float, size: float = 11, font: bytes = FONT,
+           align: str = "left", max_width: Optional[float] = None) -> None:
+    obj, width = _text(document, text, size, font)
+    while max_width is not None and width > max_width and len(text) > 1:
+        pdfium_raw.FPDFPageObj_Destroy(obj)
+        # Cut in proportion to the overflow, leaving room for the ellipsis
+        text = text[:max(1, int(len(text) * max_width / width) - 3)]
+        obj, width = _text(document, text.rstrip() + "...", size, font)
+    if align == "center":
+        x -= width / 2
+    elif align == "right":
+        x -= width
+    _place(page, obj, x, y)
+
+
+def download(url: str, path: str) -> None:
+    """Saves a URL to a file, streaming it"""
+    with httpx.Client(timeout=httpx.Timeout(30.0, read=300.0), follow_redirects=True) as client:
+        with client.stream("GET", url) as response:
+            response.raise_for_status()
+            with open(path, "wb") as out:
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    out.write(chunk)
+
+
+def normalize(source: str, mime_type: str, workdir: str) -> Tuple[str, int]:
+    """
+    A local PDF file for one bundle entry and its page count. source is a
+    file path or a URL; images become a single page no larger than A4.
+    Runs in a worker process.
+    """
+    path = source
+    if source.startswith(("http://", "https://")):
+        path = os.path.join(workdir, uuid.uuid4().hex)
+        download(source, path)
+    if mime_type != "application/pdf":
+        image = ImageOps.exif_transpose(Image.open(path))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        pdf_path = os.path.join(workdir, f"{uuid.uuid4().hex}.pdf")
+        # Pillow sizes the page from the resolution; pick one that fits A4
+        resolution = 72.0 * max(image.width / PAGE_WIDTH, image.height / PAGE_HEIGHT, 1.0)
+        image.save(pdf_path, "PDF", resolution=resolution)
+        path = pdf_path
+    document = pdfium.PdfDocument(path)
+    try:
+        return path, len(document)
+    finally:
+        document.close()
+
+
+def number_pages(path: str, first_number: int, out_path: str) -> None:
+    """
+    Writes a copy of the PDF at path with every page numbered, starting at
+    first_number. Each source page is placed whole, as a form XObject, on
+    a fresh page of the same size, so its own content stream is never
+    rewritten; rotation is taken care of by PDFium. Runs in a worker process.
+    """
+    source = pdfium.PdfDocument(path)
+    out = pdfium.PdfDocument.new()
+    try:
+        for index in range(len(source)):
+            width, height = source[index].get_size()
+            xobject = pdfium_raw.FPDF_NewXObjectFromPage(out.raw, source.raw, index)
+            page = out.new_page(width, height)
+            pdfium_raw.FPDFPage_InsertObject(page.raw, pdfium_raw.FPDF_NewFormObjectFromXObject(xobject))
+            _write(out, page, str(first_number + index), width / 2, NUMBER_OFFSET, size=10, align="center")
+            pdfium_raw.FPDFPage_GenerateContent(page.raw)
+            pdfium_raw.FPDF_CloseXObject(xobject)
+        out.save(out_path)
+    finally:
+        out.close()
+        source.close()
+
+
+def build_index(title: str, subtitle: Optional[str], entries: List[Tuple[str, int, int]], out_path: str) -> None:
+    """
+    Writes the index pages: one row per entry with its title and page
+    range. The index is numbered from 1 like the rest of the bundle.
+    """
+    out = pdfium.PdfDocument.new()
+    try:
+        pages = index_page_count(len(entries))
+        number_x, pages_x = MARGIN, PAGE_WIDTH - MARGIN
+        title_x, title_width = MARGIN + 40, PAGE_WIDTH - 2 * MARGIN - 140
+        for page_number in range(pages):
+            page = out.new_page(PAGE_WIDTH, PAGE_HEIGHT)
+            y = PAGE_HEIGHT - MARGIN
+            _write(out, page, "INDEX", PAGE_WIDTH / 2, y, size=16, font=BOLD_FONT, align="center")
+            y -= 24
+            _write(out, page, title, PAGE_WIDTH / 2, y, size=12, align="center", max_width=PAGE_WIDTH - 2 * MARGIN)
+            if subtitle:
+                y -= 18
+                _write(out, page, subtitle, PAGE_WIDTH / 2, y, size=10, align="center",
+                       max_width=PAGE_WIDTH - 2 * MARGIN)
+            y -= 36
+            _write(out, page, "No.", number_x, y, font=BOLD_FONT)
+            _write(out, page, "Particulars", title_x, y, font=BOLD_FONT)
+            _write(out, page, "Pages", pages_x, y, font=BOLD_FONT, align="right")
+            y -= ROW_HEIGHT
+            rows = entries[page_number * ROWS_PER_INDEX_PAGE:(page_number + 1) * ROWS_PER_INDEX_PAGE]
+            for offset, (entry_title, first, last) in enumerate(rows):
+                number = page_number * ROWS_PER_INDEX_PAGE + offset + 1
+                _write(out, page, f"{number}.", number_x, y)
+                _write(out, page, entry_title, title_x, y, max_width=title_width)
+                _write(out, page, str(first) if first == last else f"{first} - {last}", pages_x, y, align="right")
+                y -= ROW_HEIGHT
+            _write(out, page, str(page_number + 1), PAGE_WIDTH / 2, NUMBER_OFFSET, size=10, align="center")
+            pdfium_raw.FPDFPage_GenerateContent(page.raw)
+        out.save(out_path)
+    finally:
+        out.close()
+
+
+def merge(paths: List[str], out_path: str) -> int:
+    """Concatenates PDFs into one; returns its page count"""
+    out = pdfium.PdfDocument.new()
+    try:
+        for path in paths:
+            part = pdfium.PdfDocument(path)
+            try:
+                out.import_pages(part)
+            finally:
+                part.close()
+        page_count = len(out)
+        out.save(out_path)
+        return page_count
+    finally:
+        out.close()
@@ -0,0 +1,186 @@
+# utils/pdf_pages.py
+import io
+import re
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import httpx
+
+# Remote PDFs are read in blocks of this size, the most recent ones kept
+BLOCK_SIZE = 256 * 1024
+MAX_CACHED_BLOCKS = 64
+# Blocks read from startxref onwards when the index is already known
+XREF_PREFETCH_BLOCKS = 4
+
+# How far from the end of the file startxref is looked for
+TAIL_SIZE = 2048
+
+STARTXREF = re.compile(rb"startxref\s+(\d+)")
+
+
+class PageRangeError(ValueError):
+    """A requested page is past the end of the document"""
+
+    def __init__(self, page_count: int, index: Optional[dict] = None):
+        super().__init__(page_count, index)
+        self.page_count = page_count
+        self.index = index
+
+
+def parse_page_ranges(spec: str, limit: int) -> List[int]:
+    """
+    Turns "12-18" or "1-3,7,10-12" (1-based, inclusive) into 0-based page
+    indices in the order given. Raises ValueError on bad syntax or when more
+    than limit pages are asked for.
+    """
+    pages: List[int] = []
+    for part in spec.split(","):
+        match = re.fullmatch(r"\s*(\d+)\s*(?:-\s*(\d+)\s*)?", part)
+        if not match:
+            raise ValueError(f"Invalid page range {part.strip()!r}")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range {part.strip()!r}")
+        if len(pages) + last - first + 1 > limit:
+            raise ValueError(f"At most {limit} pages can be extracted at once")
+        pages.extend(range(first - 1, last))
+    return pages
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Read-only file over HTTP range requests, so PDFium fetches only the
+    parts of a remote PDF it needs: the trailer, the cross-reference
+    table and the objects of the requested pages. Reads go by aligned
+    blocks; the most recent MAX_CACHED_BLOCKS are kept.
+    """
+
+    def __init__(self, url: str, size: Optional[int] = None, startxref: Optional[int] = None):
+        self.url = url
+        self.client = httpx.Client(timeout=httpx.Timeout(30.0, read=120.0), follow_redirects=True)
+        self.position = 0
+        self.blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self.whole: Optional[bytes] = None
+        self.size = size
+        if self.size is None:
+            self._fetch(0)
+        else:
+            # PDFium starts at the trailer, then jumps to the cross-reference
+            # section; with a known index both are fetched up front
+            self._block(max(self.size - 1, 0) // BLOCK_SIZE)
+            if startxref is not None:
+                self._fetch(startxref // BLOCK_SIZE, XREF_PREFETCH_BLOCKS)
+
+    def _fetch(self, first_block: int, blocks: int = 1) -> None:
+        """Reads blocks first_block onwards in one request and caches them"""
+        start = first_block * BLOCK_SIZE
+        end = start + blocks * BLOCK_SIZE - 1
+        if self.size is not None:
+            end = min(end, self.size - 1)
+        response = self.client.get(self.url, headers={"Range": f"bytes={start}-{end}"})
+        response.raise_for_status()
+        if response.status_code != 206:
+            # The server ignored the range and sent everything
+            self.whole = response.content
+            self.size = len(self.whole)
+            return
+        total = response.headers.get("content-range", "").rpartition("/")[2]
+        if not total.isdigit():
+            raise OSError("Storage did not report the object size")
+        self.size = int(total)
+        data = response.content
+        for offset in range(0, len(data), BLOCK_SIZE):
+            self.blocks[first_block + offset // BLOCK_SIZE] = data[offset:offset + BLOCK_SIZE]
+            self.blocks.move_to_end(first_block + offset // BLOCK_SIZE)
+        while len(self.blocks) > MAX_CACHED_BLOCKS:
+            self.blocks.popitem(last=False)
+
+    def _block(self, block: int) -> bytes:
+        if self.whole is not None:
+            return self.whole[block * BLOCK_SIZE:(block + 1) * BLOCK_SIZE]
+        if block not in self.blocks:
+            self._fetch(block)
+        self.blocks.move_to_end(block)
+        return self.blocks[block]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = base + offset
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        written = 0
+        while written < len(view) and self.position < self.size:
+            block, offset = divmod(self.position, BLOCK_SIZE)
+            chunk = self._block(block)[offset:offset + len(view) - written]
+            if not chunk:
+                break
+            view[written:written + len(chunk)] = chunk
+            written += len(chunk)
+            self.position += len(chunk)
+        return written
+
+    def close(self) -> None:
+        self.client.close()
+        super().close()
+
+
+def _find_startxref(file) -> Optional[int]:
+    size = file.seek(0, io.SEEK_END)
+    file.seek(max(0, size - TAIL_SIZE))
+    matches = STARTXREF.findall(file.read(TAIL_SIZE))
+    return int(matches[-1]) if matches else None
+
+
+def extract_pages(source: str, pages: List[int], index: Optional[dict] = None) -> Tuple[bytes, dict]:
+    """
+    Builds a PDF holding the given 0-based pages of the source, which is a
+    local file path or a URL that accepts range requests. Returns the PDF
+    and the source's index: its size, page count and startxref offset.
+    With a known index the first remote read covers the cross-reference
+    section directly. Runs in a worker process.
+    """
+    # Imported here, like the renderer, so the module stays cheap to import
+    import pypdfium2 as pdfium
+
+    if source.startswith(("http://", "https://")):
+        index = index or {}
+        file = RangeReader(source, index.get("size"), index.get("startxref"))
+        pdf_input = file
+    else:
+        file = open(source, "rb")
+        # PDFium reads local files itself
+        pdf_input = source
+
+    try:
+        startxref = index["startxref"] if index and "startxref" in index else _find_startxref(file)
+        size = file.seek(0, io.SEEK_END)
+        file.seek(0)
+        document = pdfium.PdfDocument(pdf_input)
+        try:
+            page_count = len(document)
+            index = {"size": size, "page_count": page_count, "startxref": startxref}
+            if any(page >= page_count for page in pages):
+                raise PageRangeError(page_count, index)
+            extract = pdfium.PdfDocument.new()
+            try:
+                extract.import_pages(document, pages)
+                out = io.BytesIO()
+                extract.save(out)
+            finally:
+                extract.close()
+        finally:
+            document.close()
+    finally:
+        file.close()
+    return out.getvalue(), index
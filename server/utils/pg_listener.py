@@ -0,0 +1,109 @@
+# utils/pg_listener.py
+import asyncio
+from typing import Callable, Iterable, Optional
+from sqlalchemy import text
+from database import listen_engine
+
+
+class PgListener:
+    """
+    A single dedicated LISTEN connection driven by the asyncio event loop.
+
+    The connection is detached from the pool and watched with add_reader, so
+    waiting for notifications costs no thread and no polling queries. If the
+    connection drops, it is re-established with backoff and on_reconnect is
+    called, since notifications sent in the meantime are lost.
+    """
+
+    def __init__(
+        self,
+        channels: Iterable[str],
+        on_notify: Callable[[str, str], None],
+        on_reconnect: Optional[Callable[[], None]] = None
+    ):
+        self.channels = list(channels)
+        self.on_notify = on_notify
+        self.on_reconnect = on_reconnect
+        self._connection = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = False
+        await self._connect()
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        self._close()
+
+    async def _connect(self) -> None:
+        connection = await asyncio.to_thread(self._open)
+        self._connection = connection
+        self._loop.add_reader(connection.fileno(), self._on_readable)
+
+    def _open(self):
+        raw = listen_engine.raw_connection()
+        connection = raw.driver_connection
+        # Keep this connection for the life of the process, outside the pool
+        raw.detach()
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for channel in self.channels:
+                cursor.execute(f'LISTEN "{channel}"')
+        return connection
+
+    def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            self._loop.remove_reader(connection.fileno())
+        except (ValueError, OSError):
+            pass
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _on_readable(self) -> None:
+        connection = self._connection
+        try:
+            connection.poll()
+        except Exception as e:
+            print(f"LISTEN connection lost: {e}")
+            self._close()
+            if not self._stopped:
+                self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+        while connection.notifies:
+            notification = connection.notifies.pop(0)
+            try:
+                self.on_notify(notification.channel, notification.payload)
+            except Exception as e:
+                print(f"Error handling notification on {notification.channel}: {e}")
+
+    async def _reconnect(self) -> None:
+        delay = 0.5
+        while not self._stopped:
+            try:
+                await self._connect()
+            except Exception as e:
+                print(f"Could not re-establish LISTEN connection: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            if self.on_reconnect is not None:
+                self.on_reconnect()
+            return
+
+
+def notify(db, channel: str, payload: str = "") -> None:
+    """
+    Queues a NOTIFY in the session's transaction.
+    Postgres delivers it only if and when the transaction commits.
+    """
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
@@ -0,0 +1,56 @@
+# utils/renditions.py
+import io
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+
+CONTENT_TYPE = "image/webp"
+
+
+def can_render(mime_type: Optional[str]) -> bool:
+    return bool(mime_type) and (mime_type == "application/pdf" or mime_type.startswith("image/"))
+
+
+def _pdf_first_page(data: bytes, longest_side: int) -> Image.Image:
+    # Imported here so image-only callers don't load the PDF engine
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(data)
+    try:
+        page = pdf[0]
+        width, height = page.get_size()
+        # Page sizes are in points; render straight at the largest size needed
+        bitmap = page.render(scale=longest_side / max(width, height, 1))
+        return bitmap.to_pil()
+    finally:
+        pdf.close()
+
+
+def _open_image(data: bytes, longest_side: int) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    # JPEGs can be decoded at a fraction of their size, which is far cheaper
+    image.draft("RGB", (longest_side, longest_side))
+    return ImageOps.exif_transpose(image)
+
+
+def render(data: bytes, mime_type: str, sizes: Dict[str, int], quality: int = 75) -> Dict[str, bytes]:
+    """
+    WebP renditions of an image or of a PDF's first page, each fitting in
+    a square of its size in pixels. Runs in a worker process, so it only
+    takes and returns bytes.
+    """
+    longest_side = max(sizes.values())
+    if mime_type == "application/pdf":
+        image = _pdf_first_page(data, longest_side)
+    else:
+        image = _open_image(data, longest_side)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    renditions = {}
+    # Largest first, each one scaled down from the previous
+    for name, side in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((side, side), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=quality, method=4)
+        renditions[name] = out.getvalue()
+    return renditions
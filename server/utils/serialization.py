@@ -0,0 +1,76 @@
+# utils/serialization.py
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Query
+
+# orjson is optional; pydantic_core.to_json handles the same types natively
+# (UUID, datetime, enum) and is always available with pydantic 2
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encodes plain Python data to JSON bytes without any model validation.
+    UUIDs, datetimes and enums are handled natively by the encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response that encodes projected rows directly.
+    Returning it from a route bypasses FastAPI's response_model validation
+    and jsonable_encoder, so only use it with data shaped like the schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _projection(model, schema: type[BaseModel]) -> Tuple[tuple, Dict[str, Any]]:
+    """
+    Works out, once per (model, schema) pair, which schema fields map to table
+    columns and which have to be filled from the schema defaults.
+    Raises ValueError if a required field has no column.
+    """
+    column_names = {column.key for column in sa_inspect(model).column_attrs}
+    columns = []
+    defaults = {}
+    missing = []
+    for name, field in schema.model_fields.items():
+        if name in column_names:
+            columns.append(getattr(model, name).label(name))
+        elif field.is_required():
+            missing.append(name)
+        else:
+            defaults[name] = field.get_default(call_default_factory=True)
+    # The projected path skips response validation, so a required field
+    # nothing can fill must fail here rather than be sent as null
+    if missing:
+        raise ValueError(
+            f"{schema.__name__} requires fields with no {model.__name__} column: {', '.join(missing)}"
+        )
+    return tuple(columns), defaults
+
+
+def project(query: Query, model, schema: type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Runs the query selecting only the columns the response schema needs
+    and returns them as plain dicts, skipping ORM object construction.
+    """
+    columns, defaults = _projection(model, schema)
+    rows = query.with_entities(*columns).all()
+    if not defaults:
+        return [row._asdict() for row in rows]
+    return [{**defaults, **row._asdict()} for row in rows]
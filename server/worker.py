@@ -0,0 +1,195 @@
+# worker.py
+"""
+Background job worker.
+
+    python worker.py [--processes N] [--concurrency N] [--kinds a,b]
+
+Runs N worker processes, each claiming jobs from the Postgres queue and
+running up to --concurrency of them at once. Throughput scales by adding
+processes here or on other machines; they coordinate only through the
+jobs table.
+"""
+import argparse
+import asyncio
+import inspect
+import multiprocessing
+import os
+import signal
+import socket
+import traceback
+from config import get_settings
+from database import SessionLocal
+from jobs import JOBS_CHANNEL
+from jobs.queue import (
+    ClaimedJob, claim_jobs, complete_job, fail_job, extend_lease, save_progress, recover_expired
+)
+from jobs.registry import JobContext, all_handlers, get_handler
+from utils.pg_listener import PgListener
+import jobs.handlers  # noqa: F401 - registers the job kinds
+
+settings = get_settings()
+
+# How often each process looks for jobs whose worker died
+RECOVERY_INTERVAL_SECONDS = 30
+
+
+def _in_session(func, *args):
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+class Worker:
+    def __init__(self, worker_id: str, kinds, concurrency: int, poll_interval: float):
+        self.worker_id = worker_id
+        self.kinds = list(kinds)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.running = set()
+        self.stopping = asyncio.Event()
+        self.wakeup = asyncio.Event()
+
+    def _on_notify(self, channel: str, payload: str) -> None:
+        self.wakeup.set()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        # A missed notification only delays work until the next poll
+        listener = PgListener([JOBS_CHANNEL], self._on_notify, on_reconnect=self.wakeup.set)
+        await listener.start()
+        print(f"Worker {self.worker_id} started for {', '.join(self.kinds)}")
+
+        last_recovery = 0.0
+        try:
+            while not self.stopping.is_set():
+                if loop.time() - last_recovery > RECOVERY_INTERVAL_SECONDS:
+                    last_recovery = loop.time()
+                    recovered = await asyncio.to_thread(_in_session, recover_expired)
+                    if recovered:
+                        print(f"Recovered {recovered} jobs with expired leases")
+
+                self.wakeup.clear()
+                capacity = self.concurrency - len(self.running)
+                claimed = []
+                if capacity > 0:
+                    try:
+                        claimed = await asyncio.to_thread(
+                            _in_session, claim_jobs, self.worker_id, self.kinds, capacity
+                        )
+                    except Exception as e:
+                        print(f"Error claiming jobs: {e}")
+
+                for job in claimed:
+                    task = asyncio.create_task(self.execute(job))
+                    self.running.add(task)
+                    task.add_done_callback(self._finished)
+
+                # Woken early by a NOTIFY, by a job finishing or by shutdown
+                await self._wait()
+        finally:
+            await listener.stop()
+            if self.running:
+                print(f"Worker {self.worker_id} waiting for {len(self.running)} running jobs")
+                await asyncio.gather(*self.running, return_exceptions=True)
+
+    def _finished(self, task) -> None:
+        self.running.discard(task)
+        # A free slot is a reason to look for more work
+        self.wakeup.set()
+
+    async def _wait(self) -> None:
+        waiters = [asyncio.create_task(self.wakeup.wait()), asyncio.create_task(self.stopping.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def execute(self, job: ClaimedJob) -> None:
+        handler = get_handler(job.kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job, handler.lease_seconds))
+        try:
+            try:
+                payload = handler.payload_model.model_validate(job.payload)
+            except Exception as e:
+                # A malformed payload will never succeed, so don't retry it
+                await asyncio.to_thread(_in_session, fail_job, job, self.worker_id, f"Invalid payload: {e}", False)
+                return
+
+            context = JobContext(
+                job_id=job.id,
+                attempt=job.attempts,
+                max_attempts=job.max_attempts,
+                report_progress=lambda progress: _in_session(save_progress, job.id, progress)
+            )
+            if inspect.iscoroutinefunction(handler.func):
+                result = await handler.func(payload, context)
+            else:
+                result = await asyncio.to_thread(handler.func, payload, context)
+            await asyncio.to_thread(_in_session, complete_job, job.id, self.worker_id, result)
+
+        except Exception as e:
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()
+            new_status = await asyncio.to_thread(_in_session, fail_job, job, self.worker_id, error)
+            print(f"Job {job.id} ({job.kind}) attempt {job.attempts} failed, now {new_status.value}: {error}")
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job: ClaimedJob, lease_seconds: int) -> None:
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                await asyncio.to_thread(_in_session, extend_lease, job.id, self.worker_id, lease_seconds)
+            except Exception as e:
+                print(f"Error extending lease of job {job.id}: {e}")
+
+
+def run_process(index: int, kinds, concurrency: int, poll_interval: float) -> None:
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    asyncio.run(Worker(worker_id, kinds, concurrency, poll_interval).run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--processes", type=int, default=settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL_SECONDS)
+    parser.add_argument("--kinds", help="Comma-separated job kinds to run (default: all)")
+    args = parser.parse_args()
+
+    kinds = args.kinds.split(",") if args.kinds else sorted(all_handlers())
+    unknown = [kind for kind in kinds if get_handler(kind) is None]
+    if unknown:
+        parser.error(f"Unknown job kinds: {', '.join(unknown)}")
+
+    if args.processes == 1:
+        run_process(0, kinds, args.concurrency, args.poll_interval)
+        return
+
+    # Spawned rather than forked so no process inherits the parent's pooled connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_process, args=(i, kinds, args.concurrency, args.poll_interval))
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()